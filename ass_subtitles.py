@@ -0,0 +1,133 @@
+# ass_subtitles.py
+import re
+import pysrt
+import text_renderer
+
+# Converts an SRT file plus the GUI subtitle style into an ASS script that ffmpeg's `ass` filter
+# (libass) renders during the encode, so no subtitle pixels are produced in Python.
+
+WEIGHT_BY_STYLE_WORD = {
+    'thin': 100, 'extralight': 200, 'light': 300, 'regular': 400, 'medium': 500,
+    'semibold': 600, 'bold': 700, 'extrabold': 800, 'black': 900,
+}
+
+
+def ass_color(color_value, default: str = "&H00FFFFFF") -> str:
+    """Converts a style color ('#RRGGBB', names, 'rgba(r,g,b,a)') to ASS &HAABBGGRR (alpha 00 is opaque)."""
+    rgba = text_renderer.parse_color(color_value)
+    if rgba is None:
+        return default
+    r, g, b, a = rgba
+    return f"&H{255 - a:02X}{b:02X}{g:02X}{r:02X}"
+
+def ass_time(seconds: float) -> str:
+    """Formats seconds as H:MM:SS.cc."""
+    centiseconds = max(0, int(round(seconds * 100)))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+def escape_ass_text(text: str) -> str:
+    """Makes SRT cue text safe for a Dialogue line: line breaks become \\N, override braces are neutralized."""
+    text = text.replace("\\", "\\\u200b") # A backslash followed by a zero-width space is not an escape sequence
+    text = text.replace("{", "(").replace("}", ")")
+    return "\\N".join(line.strip() for line in text.strip().splitlines())
+
+def _font_weight_and_italic(font_style: str) -> tuple[int, bool]:
+    style_words = font_style.lower().replace("-", " ").split()
+    italic = "italic" in style_words or "oblique" in style_words
+    compact_style = "".join(w for w in style_words if w not in ("italic", "oblique"))
+    return WEIGHT_BY_STYLE_WORD.get(compact_style, 400), italic
+
+def _alignment_and_margin(pos_tuple: tuple, text_align: str, frame_height: int) -> tuple[int, int]:
+    """
+    Maps the MoviePy relative position used by the other backends to an ASS numpad alignment and MarginV.
+    A float y (fraction of the frame height) is the top edge of the cue, like set_position(..., relative=True).
+    """
+    _, y = pos_tuple
+    column = {"left": 0, "center": 1, "right": 2}[text_align]
+    if isinstance(y, str):
+        row_base, margin_v = {"top": (7, 0), "center": (4, 0), "bottom": (1, 0)}.get(y, (4, 0))
+    else:
+        row_base, margin_v = 7, int(frame_height * y) # Top-anchored at y, so the cue grows downwards like a TextClip
+    return row_base + column, margin_v
+
+def build_ass_script(subs, current_style: dict, pos_tuple: tuple, frame_size: tuple, box_width_ratio: float = 0.90) -> str:
+    """
+    Builds an ASS script from pysrt items using the resolved subtitle style (see video_processor._resolve_subtitle_style).
+    Text color, stroke color/width, font and size follow the style dict; a non-transparent bg_color is drawn as a
+    box on a lower layer so it can coexist with the text outline.
+    """
+    frame_w, frame_h = int(frame_size[0]), int(frame_size[1])
+    font_family, font_style = text_renderer.get_font_face(current_style.get('font'))
+    weight, italic = _font_weight_and_italic(font_style)
+    fontsize = max(1, int(current_style.get('fontsize', 24)))
+    # libass sizes fonts by their Windows line height, PIL/ImageMagick by em size; convert so glyphs come out the same size
+    ass_fontsize = text_renderer.get_ass_fontsize(current_style.get('font'), fontsize)
+    stroke_width = float(current_style.get('stroke_width', 0) or 0)
+    stroke_color = ass_color(current_style.get('stroke_color'), default="&H00000000") if stroke_width > 0 else "&H00000000"
+    bg_color_rgba = text_renderer.parse_color(current_style.get('bg_color'))
+    text_align = text_renderer.horizontal_alignment(current_style.get('align'))
+    alignment, margin_v = _alignment_and_margin(pos_tuple, text_align, frame_h)
+    margin_h = int(frame_w * (1.0 - box_width_ratio) / 2)
+    common = f"{-1 if weight >= 700 else 0},{-1 if italic else 0},0,0,100,100,0,0"
+
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {frame_w}",
+        f"PlayResY: {frame_h}",
+        "WrapStyle: 0",
+        "ScaledBorderAndShadow: yes",
+        "YCbCr Matrix: None",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Default,{font_family},{ass_fontsize},{ass_color(current_style.get('color', 'white'))},&H000000FF,{stroke_color},&H00000000,"
+        f"{common},1,{stroke_width:g},0,{alignment},{margin_h},{margin_h},{margin_v},1",
+    ]
+    if bg_color_rgba:
+        box_padding = max(stroke_width, 1.0) # The box already spans the full line height, pad only by the stroke
+        lines.append(
+            f"Style: Box,{font_family},{ass_fontsize},&HFF000000,&HFF000000,{ass_color(current_style.get('bg_color'))},&HFF000000,"
+            f"{common},3,{box_padding:g},0,{alignment},{margin_h},{margin_h},{margin_v},1"
+        )
+    lines += ["", "[Events]", "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"]
+
+    for sub_item in subs:
+        start_s = sub_item.start.ordinal / 1000.0
+        end_s = sub_item.end.ordinal / 1000.0
+        if end_s - start_s <= 0: continue
+        text = escape_ass_text(sub_item.text)
+        if not text: continue
+        if weight not in (400, 700):
+            text = f"{{\\b{weight}}}{text}" # libass accepts numeric weights for e.g. Black/SemiBold faces
+        if bg_color_rgba:
+            lines.append(f"Dialogue: 0,{ass_time(start_s)},{ass_time(end_s)},Box,,0,0,0,,{text}")
+        lines.append(f"Dialogue: 1,{ass_time(start_s)},{ass_time(end_s)},Default,,0,0,0,,{text}")
+    return "\n".join(lines) + "\n"
+
+def write_ass_file(srt_path: str, current_style: dict, pos_tuple: tuple, frame_size: tuple, ass_path: str, box_width_ratio: float = 0.90) -> bool:
+    """Converts srt_path to an ASS script at ass_path. Returns True if at least one cue was written."""
+    try:
+        subs = pysrt.open(srt_path, encoding='utf-8')
+        script = build_ass_script(subs, current_style, pos_tuple, frame_size, box_width_ratio=box_width_ratio)
+        with open(ass_path, "w", encoding="utf-8") as f:
+            f.write(script)
+        return bool(re.search(r"^Dialogue:", script, re.MULTILINE))
+    except Exception as e:
+        print(f"ASS - Error converting {srt_path} to ASS: {e}")
+        return False
+
+
+if __name__ == '__main__':
+    print("--- Testing SRT to ASS Conversion ---")
+    test_subs = pysrt.SubRipFile()
+    test_subs.append(pysrt.SubRipItem(1, start=pysrt.SubRipTime(0, 0, 0, 0), end=pysrt.SubRipTime(0, 0, 1, 500), text="AITA for {not}\nsharing?"))
+    test_subs.append(pysrt.SubRipItem(2, start=pysrt.SubRipTime(0, 0, 1, 500), end=pysrt.SubRipTime(0, 0, 3, 0), text="Edit: thanks"))
+    test_style = {
+        'font': 'Montserrat-Black', 'fontsize': 64, 'color': '#FFFF00', 'stroke_color': '#000000', 'stroke_width': 3,
+        'bg_color': 'rgba(0,0,0,0.5)', 'method': 'caption', 'align': 'center'
+    }
+    print(build_ass_script(test_subs, test_style, ('center', 0.85), (1080, 1920)))
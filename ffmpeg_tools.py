@@ -0,0 +1,533 @@
+# ffmpeg_tools.py
+import io
+import os
+import json
+import re
+import math
+import time
+import shutil
+import threading
+import subprocess
+import traceback
+from collections import deque
+import numpy as np
+from PIL import Image
+
+DEFAULT_ENCODER_OPTIONS = {
+    'codec': 'libx264',
+    'preset': 'medium',
+    'crf': 23,
+    'pix_fmt': 'yuv420p',
+    'video_bitrate': None, # e.g. '8M'; replaces CRF with bitrate-targeted rate control when set
+    'threads': 0, # 0 lets libx264 pick its own thread count
+    'audio_codec': 'aac',
+    'audio_bitrate': '192k',
+}
+PROGRESS_REPORT_INTERVAL_S = 2.0
+
+
+def get_ffmpeg_binary() -> str:
+    """Returns the ffmpeg executable MoviePy is configured with, so both paths use the same build."""
+    try:
+        from moviepy.config import get_setting
+        return get_setting("FFMPEG_BINARY")
+    except Exception:
+        return shutil.which("ffmpeg") or "ffmpeg"
+
+def get_ffprobe_binary() -> str | None:
+    """Returns an ffprobe executable (PATH first, then next to ffmpeg), or None if there is none."""
+    on_path = shutil.which("ffprobe")
+    if on_path:
+        return on_path
+    ffmpeg_binary = get_ffmpeg_binary()
+    sibling = os.path.join(os.path.dirname(ffmpeg_binary), os.path.basename(ffmpeg_binary).replace("ffmpeg", "ffprobe"))
+    return sibling if sibling != ffmpeg_binary and os.path.exists(sibling) else None
+
+def _popen_platform_kwargs() -> dict:
+    """Hides the console window ffmpeg would otherwise open on Windows (same flag MoviePy uses)."""
+    return {"creationflags": 0x08000000} if os.name == "nt" else {}
+
+
+def video_encoder_args(options: dict) -> list[str]:
+    """Output arguments for the video stream from a (merged) encoder options dict."""
+    rate_control = ['-b:v', str(options['video_bitrate'])] if options.get('video_bitrate') else ['-crf', str(options['crf'])]
+    return [
+        '-c:v', options['codec'],
+        '-preset', str(options['preset']),
+    ] + rate_control + [
+        '-pix_fmt', options['pix_fmt'],
+        '-threads', str(options['threads']),
+    ]
+
+def audio_encoder_args(options: dict) -> list[str]:
+    """Output arguments for the audio stream ('copy' keeps the input stream as is)."""
+    if options['audio_codec'] == 'copy':
+        return ['-c:a', 'copy']
+    return ['-c:a', options['audio_codec'], '-b:a', str(options['audio_bitrate'])]
+
+def merge_encoder_options(encoder_options: dict = None) -> dict:
+    """DEFAULT_ENCODER_OPTIONS overridden by the non-None values of encoder_options."""
+    options = DEFAULT_ENCODER_OPTIONS.copy()
+    if encoder_options:
+        options.update({k: v for k, v in encoder_options.items() if v is not None})
+    return options
+
+
+class FFmpegPipeEncoder:
+    """
+    Long-lived ffmpeg process that receives raw RGB frames on stdin and encodes them.
+    Audio, if given, is read by ffmpeg itself from audio_path and muxed in the same process.
+    Use as a context manager or call open()/write_frame()/close().
+    """
+
+    def __init__(
+        self,
+        output_path: str,
+        size: tuple,
+        fps: float,
+        audio_path: str = None,
+        encoder_options: dict = None,
+        progress_callback=None,
+        log_prefix: str = "PipeEnc"
+    ):
+        self.output_path = output_path
+        self.width, self.height = int(size[0]), int(size[1])
+        self.fps = float(fps)
+        self.audio_path = audio_path
+        self.options = merge_encoder_options(encoder_options)
+        self.progress_callback = progress_callback # Called as progress_callback(frames_written, current_fps)
+        self.log_prefix = log_prefix
+        self.proc = None
+        self.frames_written = 0
+        self._stderr_tail = deque(maxlen=40)
+        self._stderr_thread = None
+        self._start_time = None
+        self._last_report_time = None
+
+    def _build_command(self) -> list[str]:
+        cmd = [
+            get_ffmpeg_binary(), '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-vcodec', 'rawvideo',
+            '-s', f"{self.width}x{self.height}", '-pix_fmt', 'rgb24',
+            '-r', f"{self.fps:.6f}", '-i', '-',
+        ]
+        if self.audio_path:
+            cmd += ['-i', self.audio_path, '-map', '0:v:0', '-map', '1:a:0?']
+        cmd += video_encoder_args(self.options)
+        if self.audio_path:
+            cmd += audio_encoder_args(self.options) + ['-shortest']
+        cmd += ['-movflags', '+faststart', self.output_path]
+        return cmd
+
+    def _drain_stderr(self):
+        for raw_line in iter(self.proc.stderr.readline, b''):
+            self._stderr_tail.append(raw_line.decode("utf-8", errors="replace").rstrip())
+
+    def open(self):
+        cmd = self._build_command()
+        # print(f"{self.log_prefix} - Starting: {' '.join(cmd)}") # Optional debug
+        self.proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            bufsize=self.width * self.height * 3 * 4, **_popen_platform_kwargs()
+        )
+        # stderr must be drained continuously, a full pipe would block ffmpeg and therefore us
+        self._stderr_thread = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_thread.start()
+        self._start_time = self._last_report_time = time.perf_counter()
+        return self
+
+    @property
+    def current_fps(self) -> float:
+        if not self._start_time: return 0.0
+        elapsed = time.perf_counter() - self._start_time
+        return self.frames_written / elapsed if elapsed > 0 else 0.0
+
+    def write_frame(self, frame: np.ndarray):
+        if frame.dtype != np.uint8:
+            frame = np.clip(frame, 0, 255).astype(np.uint8)
+        if frame.shape[:2] != (self.height, self.width):
+            raise ValueError(f"{self.log_prefix} - Frame size {frame.shape[1]}x{frame.shape[0]} does not match encoder size {self.width}x{self.height}")
+        try:
+            self.proc.stdin.write(np.ascontiguousarray(frame[:, :, :3]).data)
+        except (BrokenPipeError, OSError) as e:
+            details = "\n".join(self._stderr_tail)
+            raise IOError(f"{self.log_prefix} - ffmpeg stopped accepting frames: {e}\n{details}") from e
+        self.frames_written += 1
+
+        now = time.perf_counter()
+        if now - self._last_report_time >= PROGRESS_REPORT_INTERVAL_S:
+            self._last_report_time = now
+            if self.progress_callback:
+                self.progress_callback(self.frames_written, self.current_fps)
+            else:
+                print(f"{self.log_prefix} - {self.frames_written} frames encoded ({self.current_fps:.1f} fps)")
+
+    def close(self) -> bool:
+        """Flushes and waits for ffmpeg. Returns True if the output was written successfully."""
+        if self.proc is None:
+            return False
+        try:
+            if self.proc.stdin and not self.proc.stdin.closed:
+                self.proc.stdin.close()
+        except OSError:
+            pass
+        return_code = self.proc.wait()
+        if self._stderr_thread:
+            self._stderr_thread.join(timeout=5)
+        self.proc = None
+        elapsed = time.perf_counter() - self._start_time if self._start_time else 0.0
+        if return_code != 0:
+            print(f"{self.log_prefix} - ffmpeg exited with code {return_code}:\n" + "\n".join(self._stderr_tail))
+            return False
+        print(f"{self.log_prefix} - Encoded {self.frames_written} frames in {elapsed:.1f}s ({self.current_fps:.1f} fps)")
+        return True
+
+    def abort(self):
+        """Kills ffmpeg without finalizing the output (used on errors)."""
+        if self.proc is not None:
+            try: self.proc.kill()
+            except OSError: pass
+            try: self.proc.wait(timeout=5)
+            except Exception: pass
+            self.proc = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        if exc_type is not None:
+            self.abort()
+        else:
+            self.close()
+        return False
+
+
+def run_ffmpeg(args: list[str], log_prefix: str = "FFmpeg") -> bool:
+    """Runs ffmpeg with the given arguments (binary and -y/-loglevel are added). Returns True on success."""
+    cmd = [get_ffmpeg_binary(), '-y', '-loglevel', 'error'] + args
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, **_popen_platform_kwargs())
+    except FileNotFoundError:
+        print(f"{log_prefix} - ffmpeg not found. Ensure ffmpeg is installed and in your system's PATH.")
+        return False
+    if result.returncode != 0:
+        print(f"{log_prefix} - ffmpeg failed ({result.returncode}): {result.stderr.decode('utf-8', errors='replace').strip()[-2000:]}")
+        return False
+    return True
+
+def _parse_frame_rate(rate: str) -> float:
+    """Parses ffprobe rates like '30000/1001' or '25'."""
+    try:
+        if '/' in rate:
+            num, den = rate.split('/', 1)
+            return float(num) / float(den) if float(den) else 0.0
+        return float(rate)
+    except (TypeError, ValueError):
+        return 0.0
+
+def probe_video_info(video_path: str) -> dict | None:
+    """
+    Reads container/stream headers (no decoding) and returns
+    {'duration', 'fps', 'width', 'height', 'codec', 'has_audio'} for the first video stream, or None.
+    Uses ffprobe when available, otherwise parses the header dump of `ffmpeg -i`.
+    """
+    ffprobe_binary = get_ffprobe_binary()
+    try:
+        if ffprobe_binary:
+            result = subprocess.run(
+                [ffprobe_binary, '-v', 'error', '-show_entries',
+                 'format=duration:stream=codec_type,codec_name,width,height,avg_frame_rate,r_frame_rate,duration',
+                 '-of', 'json', video_path],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, **_popen_platform_kwargs()
+            )
+            probe = json.loads(result.stdout.decode("utf-8", errors="replace") or "{}")
+            streams = probe.get('streams', [])
+            video_stream = next((st for st in streams if st.get('codec_type') == 'video'), None)
+            if video_stream is None:
+                return None
+            duration = probe.get('format', {}).get('duration') or video_stream.get('duration') or 0
+            fps = _parse_frame_rate(video_stream.get('avg_frame_rate')) or _parse_frame_rate(video_stream.get('r_frame_rate'))
+            return {
+                'duration': float(duration), 'fps': fps,
+                'width': int(video_stream.get('width', 0)), 'height': int(video_stream.get('height', 0)),
+                'codec': video_stream.get('codec_name', ''),
+                'has_audio': any(st.get('codec_type') == 'audio' for st in streams),
+            }
+
+        result = subprocess.run(
+            [get_ffmpeg_binary(), '-hide_banner', '-i', video_path],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, **_popen_platform_kwargs()
+        ) # Exits with an error because no output is given, the header dump is all we need
+        header = result.stderr.decode("utf-8", errors="replace")
+        video_match = re.search(r"Stream #\S+.*?: Video: (\w+).*?, (\d{2,5})x(\d{2,5})", header)
+        if not video_match:
+            return None
+        duration_match = re.search(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)", header)
+        video_line = header[video_match.start():].splitlines()[0]
+        fps_match = re.search(r"([\d.]+) fps", video_line) or re.search(r"([\d.]+) tbr", video_line)
+        duration = 0.0
+        if duration_match:
+            hours, minutes, seconds = duration_match.groups()
+            duration = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+        return {
+            'duration': duration, 'fps': float(fps_match.group(1)) if fps_match else 0.0,
+            'width': int(video_match.group(2)), 'height': int(video_match.group(3)),
+            'codec': video_match.group(1),
+            'has_audio': bool(re.search(r"Stream #\S+.*?: Audio:", header)),
+        }
+    except Exception as e:
+        print(f"FFmpeg - Could not probe {video_path}: {e}")
+        return None
+
+def probe_keyframe_times(video_path: str) -> list[float]:
+    """
+    Returns the sorted presentation times (seconds) of the keyframes of the first video stream.
+    Uses ffprobe's packet flags (no decoding). Without ffprobe, falls back to decoding keyframes only with ffmpeg.
+    """
+    ffprobe_binary = get_ffprobe_binary()
+    try:
+        if ffprobe_binary:
+            result = subprocess.run(
+                [ffprobe_binary, '-v', 'error', '-select_streams', 'v:0',
+                 '-show_entries', 'packet=pts_time,flags', '-of', 'csv=p=0', video_path],
+                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, **_popen_platform_kwargs()
+            )
+            keyframe_times = []
+            for line in result.stdout.decode("utf-8", errors="replace").splitlines():
+                fields = line.strip().split(",")
+                if len(fields) >= 2 and "K" in fields[1] and fields[0] not in ("", "N/A"):
+                    keyframe_times.append(float(fields[0]))
+            return sorted(keyframe_times)
+
+        result = subprocess.run(
+            [get_ffmpeg_binary(), '-hide_banner', '-skip_frame', 'nokey', '-i', video_path,
+             '-map', '0:v:0', '-vf', 'showinfo', '-f', 'null', '-'],
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, **_popen_platform_kwargs()
+        )
+        showinfo_output = result.stderr.decode("utf-8", errors="replace")
+        return sorted(float(t) for t in re.findall(r"Parsed_showinfo.*?pts_time:\s*(-?[\d.]+)", showinfo_output))
+    except Exception as e:
+        print(f"FFmpeg - Could not probe keyframes of {video_path}: {e}")
+        return []
+
+def _concat_list_line(path: str) -> str:
+    """Formats one entry of an ffmpeg concat demuxer list, escaping single quotes."""
+    return "file '" + os.path.abspath(path).replace("\\", "/").replace("'", "'\\''") + "'\n"
+
+def build_stream_copy_loop(
+    video_path: str,
+    target_duration: float,
+    output_path: str,
+    template_duration: float,
+    keyframe_times: list[float] = None
+) -> bool:
+    """
+    Extends a short template to at least target_duration by repeating it with the concat demuxer
+    and stream copy, so no frame is decoded or re-encoded. The last repetition is cut at the first
+    keyframe at or after the remaining time, so the result ends on a GOP boundary just past the target.
+    The template audio is dropped. output_path should use a permissive container such as .mkv.
+    """
+    if template_duration <= 0 or target_duration <= 0:
+        return False
+    if keyframe_times is None:
+        keyframe_times = probe_keyframe_times(video_path)
+
+    full_copies = int(math.floor(target_duration / template_duration))
+    remainder = target_duration - full_copies * template_duration
+    if remainder <= 1e-3:
+        copies, trim_duration = max(full_copies, 1), max(full_copies, 1) * template_duration
+    else:
+        cut_in_last_copy = next((kf for kf in keyframe_times if kf >= remainder - 1e-3 and kf > 0), template_duration)
+        copies = full_copies + 1
+        trim_duration = full_copies * template_duration + cut_in_last_copy
+
+    list_path = f"{output_path}.concat.txt"
+    try:
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.write("ffconcat version 1.0\n")
+            for _ in range(copies):
+                f.write(_concat_list_line(video_path))
+        # print(f"FFmpeg - Looping {video_path} x{copies}, trimmed at {trim_duration:.3f}s for target {target_duration:.3f}s") # Optional debug
+        return run_ffmpeg(
+            ['-f', 'concat', '-safe', '0', '-i', list_path,
+             '-map', '0:v:0', '-c', 'copy', '-an', '-t', f"{trim_duration:.6f}", output_path],
+            log_prefix="FFmpeg Loop"
+        )
+    finally:
+        if os.path.exists(list_path):
+            try: os.remove(list_path)
+            except OSError: pass
+
+def seek_timestamp(time_sec: float) -> str:
+    """Formats an input seek time floored to the millisecond, so rounding never moves it past the frame at time_sec."""
+    return f"{math.floor(max(0.0, time_sec) * 1000) / 1000:.3f}"
+
+def extract_keyframe_image(video_path: str, time_sec: float = 0.0) -> Image.Image | None:
+    """
+    Returns the first keyframe at or after time_sec as an RGB PIL image (pass a keyframe time to get exactly
+    that frame). Only keyframes are decoded (input seek plus -skip_frame nokey), so it is cheap even for long
+    or high-resolution files.
+    """
+    cmd = [
+        get_ffmpeg_binary(), '-loglevel', 'error', '-ss', seek_timestamp(time_sec),
+        '-skip_frame', 'nokey', '-i', video_path,
+        '-map', '0:v:0', '-frames:v', '1', '-f', 'image2pipe', '-vcodec', 'png', '-',
+    ]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, **_popen_platform_kwargs())
+        if result.returncode != 0 or not result.stdout:
+            print(f"FFmpeg - Could not extract a keyframe from {video_path}: {result.stderr.decode('utf-8', errors='replace').strip()[-500:]}")
+            return None
+        return Image.open(io.BytesIO(result.stdout)).convert("RGB")
+    except Exception as e:
+        print(f"FFmpeg - Could not extract a keyframe from {video_path}: {e}")
+        return None
+
+def concat_video_chunks(
+    chunk_paths: list[str],
+    output_path: str,
+    audio_path: str = None,
+    duration: float = None,
+    encoder_options: dict = None
+) -> bool:
+    """
+    Joins separately encoded, identically configured video chunks with the concat demuxer and stream copy.
+    The audio track is muxed once here from audio_path (encoded per encoder_options), trimmed to duration.
+    """
+    options = merge_encoder_options(encoder_options)
+    list_path = f"{output_path}.chunks.txt"
+    try:
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.write("ffconcat version 1.0\n")
+            for chunk_path in chunk_paths:
+                f.write(_concat_list_line(chunk_path))
+        args = ['-f', 'concat', '-safe', '0', '-i', list_path]
+        if audio_path:
+            args += ['-i', audio_path, '-map', '0:v:0', '-map', '1:a:0', '-c:v', 'copy'] + audio_encoder_args(options)
+        else:
+            args += ['-map', '0:v:0', '-c:v', 'copy']
+        if duration:
+            args += ['-t', f"{duration:.3f}"]
+        args += ['-movflags', '+faststart', output_path]
+        return run_ffmpeg(args, log_prefix="FFmpeg Concat")
+    finally:
+        if os.path.exists(list_path):
+            try: os.remove(list_path)
+            except OSError: pass
+
+def write_audio_track(source_path: str, output_path: str, encoder_options: dict = None) -> bool:
+    """
+    Writes the first audio stream of source_path to an audio-only file (e.g. .m4a), encoded per encoder_options.
+    With 'audio_codec': 'copy' the stream is copied out of an already encoded file instead.
+    Render stages mux the result with stream copy, so the narration is encoded only once.
+    """
+    options = merge_encoder_options(encoder_options)
+    args = ['-i', source_path, '-map', '0:a:0', '-vn', '-sn', '-dn'] + audio_encoder_args(options) + [output_path]
+    return run_ffmpeg(args, log_prefix="FFmpeg Audio")
+
+def escape_filter_path(path: str) -> str:
+    """Quotes a file path for use as a filter option value (e.g. 'C\\:/fonts' on Windows)."""
+    return "'" + os.path.abspath(path).replace("\\", "/").replace(":", "\\:") + "'"
+
+def ass_filter(ass_path: str, fonts_dir: str = None) -> str:
+    """The libass `ass` filter for ass_path, with fonts_dir as an extra font directory if it exists."""
+    filter_str = f"ass={escape_filter_path(ass_path)}"
+    if fonts_dir and os.path.isdir(fonts_dir):
+        filter_str += f":fontsdir={escape_filter_path(fonts_dir)}"
+    return filter_str
+
+def burn_ass_subtitles(
+    video_path: str,
+    ass_path: str,
+    output_path: str,
+    audio_path: str = None,
+    duration: float = None,
+    loop_video: bool = False,
+    fonts_dir: str = None,
+    encoder_options: dict = None,
+    pre_filter: str = None
+) -> bool:
+    """
+    Encodes video_path with an ASS script rendered by ffmpeg's libass `ass` filter, in a single ffmpeg run.
+    Audio comes from audio_path if given, otherwise from the video's own first audio stream (if any).
+    With loop_video the input is repeated (-stream_loop) until duration is reached.
+    pre_filter (e.g. a crop/scale chain) runs before the ass filter, in the same filter graph.
+    """
+    options = merge_encoder_options(encoder_options)
+    video_filter = ass_filter(ass_path, fonts_dir)
+    if pre_filter:
+        video_filter = f"{pre_filter},{video_filter}"
+    args = (['-stream_loop', '-1'] if loop_video else []) + ['-i', video_path]
+    if audio_path:
+        args += ['-i', audio_path, '-map', '0:v:0', '-map', '1:a:0']
+    else:
+        args += ['-map', '0:v:0', '-map', '0:a:0?']
+    args += ['-vf', video_filter] + video_encoder_args(options) + audio_encoder_args(options)
+    if duration:
+        args += ['-t', f"{duration:.3f}"]
+    args += ['-movflags', '+faststart', output_path]
+    start_time = time.perf_counter()
+    if not run_ffmpeg(args, log_prefix="ASSBurn"):
+        return False
+    print(f"ASSBurn - libass encode of {os.path.basename(output_path)} finished in {time.perf_counter() - start_time:.1f}s")
+    return True
+
+def encode_split_outputs(
+    video_path: str,
+    outputs: list[dict],
+    audio_path: str = None,
+    duration: float = None,
+    loop_video: bool = False
+) -> bool:
+    """
+    Decodes video_path once and encodes several outputs from it in a single ffmpeg run: the decoded frames are
+    fanned out with a split filter and each output dict supplies its own 'filter' chain (e.g. crop/scale/ass),
+    'path' and 'encoder_options'. Audio comes from audio_path (or the video's own audio) in every output.
+    """
+    branch_labels = "".join(f"[split{i}]" for i in range(len(outputs)))
+    filter_graph = [f"[0:v]split={len(outputs)}{branch_labels}"]
+    filter_graph += [f"[split{i}]{output['filter']}[out{i}]" for i, output in enumerate(outputs)]
+    args = (['-stream_loop', '-1'] if loop_video else []) + ['-i', video_path]
+    if audio_path:
+        args += ['-i', audio_path]
+    args += ['-filter_complex', ";".join(filter_graph)]
+    for i, output in enumerate(outputs):
+        options = merge_encoder_options(output.get('encoder_options'))
+        args += ['-map', f"[out{i}]", '-map', '1:a:0' if audio_path else '0:a:0?']
+        args += video_encoder_args(options) + audio_encoder_args(options)
+        if duration:
+            args += ['-t', f"{duration:.3f}"]
+        args += ['-movflags', '+faststart', output['path']]
+    start_time = time.perf_counter()
+    if not run_ffmpeg(args, log_prefix="SplitEnc"):
+        return False
+    print(f"SplitEnc - {len(outputs)} outputs from one decode of {os.path.basename(video_path)} in {time.perf_counter() - start_time:.1f}s")
+    return True
+
+def encode_clip_with_pipe(clip, output_path: str, fps: float, audio_path: str = None, encoder_options: dict = None, progress_callback=None) -> bool:
+    """Streams every frame of a MoviePy clip into an FFmpegPipeEncoder. Audio is muxed from audio_path by ffmpeg."""
+    encoder = FFmpegPipeEncoder(output_path, clip.size, fps, audio_path=audio_path, encoder_options=encoder_options, progress_callback=progress_callback)
+    encoder.open()
+    try:
+        for frame in clip.iter_frames(fps=fps, dtype="uint8"):
+            encoder.write_frame(frame)
+    except Exception:
+        encoder.abort()
+        raise
+    return encoder.close()
+
+
+if __name__ == '__main__':
+    print("--- Testing FFmpeg Pipe Encoder ---")
+    test_output = "_pipe_encoder_test.mp4"
+    test_size, test_fps = (640, 360), 30
+    try:
+        with FFmpegPipeEncoder(test_output, test_size, test_fps, encoder_options={'preset': 'veryfast'}) as test_encoder:
+            for frame_index in range(test_fps * 3):
+                test_frame = np.zeros((test_size[1], test_size[0], 3), dtype=np.uint8)
+                test_frame[:, :, 0] = (frame_index * 4) % 256
+                test_encoder.write_frame(test_frame)
+        print(f"Encoded test video: {test_output} ({os.path.getsize(test_output)} bytes)")
+    except Exception as e:
+        print(f"Pipe encoder test failed: {e}")
+        traceback.print_exc()
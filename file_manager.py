@@ -1,6 +1,7 @@
 # file_manager.py
 import os
 import re # For regular expressions when finding IDs
+import time
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 BASE_OUTPUT_DIR = os.path.join(SCRIPT_DIR, "output")
@@ -10,14 +11,16 @@ AUDIO_DIR_NAME = "audio"
 NARRATED_VIDEO_DIR_NAME = "videowvoice" # Videos with narration but without burned-in subtitles
 SRT_DIR_NAME = "srt"
 FINAL_VIDEO_DIR_NAME = "finalvideo" # Final videos with burned-in subtitles
+DRAFT_DIR_NAME = "drafts" # Low-resolution QA renders with their narration and SRT
 
 # Full paths
 AUDIO_DIR = os.path.join(BASE_OUTPUT_DIR, AUDIO_DIR_NAME)
 NARRATED_VIDEO_DIR = os.path.join(BASE_OUTPUT_DIR, NARRATED_VIDEO_DIR_NAME) # This seems unused, videowvoice is used in main.py for temp path
 SRT_DIR = os.path.join(BASE_OUTPUT_DIR, SRT_DIR_NAME)
 FINAL_VIDEO_DIR = os.path.join(BASE_OUTPUT_DIR, FINAL_VIDEO_DIR_NAME)
+DRAFT_DIR = os.path.join(BASE_OUTPUT_DIR, DRAFT_DIR_NAME)
 
-ALL_DIRS = [BASE_OUTPUT_DIR, AUDIO_DIR, NARRATED_VIDEO_DIR, SRT_DIR, FINAL_VIDEO_DIR]
+ALL_DIRS = [BASE_OUTPUT_DIR, AUDIO_DIR, NARRATED_VIDEO_DIR, SRT_DIR, FINAL_VIDEO_DIR, DRAFT_DIR]
 
 def ensure_directories_exist():
     """Ensures all necessary output directories exist. Creates them if not."""
@@ -41,8 +44,8 @@ def get_next_id_str() -> str:
     last_id = 0
     try:
         if os.path.exists(FINAL_VIDEO_DIR):
-            # Search for files matching the pattern NNNN.<ext> (e.g., 0001.mp4)
-            id_pattern = re.compile(r"^(\d{4,})\..*$") # 4 or more digits at the start of the filename
+            # Search for files matching the pattern NNNN.<ext> or NNNN_<suffix> (e.g., 0001.mp4, 0001_v02.mp4 for variants)
+            id_pattern = re.compile(r"^(\d{4,})[._].*$") # 4 or more digits at the start of the filename
             
             for filename in os.listdir(FINAL_VIDEO_DIR):
                 match = id_pattern.match(filename)
@@ -61,6 +64,16 @@ def get_next_id_str() -> str:
     next_id = last_id + 1
     return f"{next_id:04d}" # Format to 4 digits with leading zeros
 
+def get_draft_id_str() -> str:
+    """Returns a timestamped ID for a draft (e.g. "draft_20250101_120000"). Drafts never consume a final video ID."""
+    ensure_directories_exist()
+    base_id = time.strftime("draft_%Y%m%d_%H%M%S")
+    draft_id, suffix = base_id, 1
+    while any(name.startswith(f"{draft_id}.") for name in os.listdir(DRAFT_DIR)):
+        suffix += 1
+        draft_id = f"{base_id}_{suffix}"
+    return draft_id
+
 if __name__ == '__main__':
     print("Testing File Manager...")
     ensure_directories_exist()
@@ -0,0 +1,138 @@
+# frame_readahead.py
+import math
+import time
+import threading
+import numpy as np
+from moviepy.editor import VideoClip
+
+# Decoding runs ahead of compositing/encoding in its own thread and fills a ring of reusable frame arrays.
+# ffmpeg's pipe reads release the GIL, so decode overlaps with the blend and the encoder's pipe writes.
+DEFAULT_READ_AHEAD_FRAMES = 8 # Ring depth; each slot holds one decoded frame (about 6 MB at 1080x1920)
+MIN_READ_AHEAD_FRAMES = 2 # One slot in use by the consumer, at least one being filled
+
+
+class FrameReadAhead:
+    """
+    Decodes get_frame(i / fps) for consecutive frame indices on a background thread into a bounded ring of
+    depth preallocated arrays. get(i) returns frame i; the array stays valid until the next get() call.
+    Requests that are not sequential (a seek) restart the decoder thread at the requested frame.
+    """
+
+    def __init__(self, get_frame, fps: float, frame_count: int, depth: int = DEFAULT_READ_AHEAD_FRAMES):
+        self.get_frame = get_frame
+        self.fps = fps
+        self.frame_count = frame_count
+        self.depth = max(MIN_READ_AHEAD_FRAMES, int(depth))
+        self._slots = [None] * self.depth
+        self._cond = threading.Condition()
+        self._thread = None
+        self._stop_requested = False
+        self._produced = 0 # Frames before this index have been decoded into their slots
+        self._current = 0 # Frame the consumer holds; frames before it are released
+        self._error = None
+        self.decoder_wait_s = 0.0 # Time the decoder spent waiting for a free slot (consumer is the bottleneck)
+        self.consumer_wait_s = 0.0 # Time get() spent waiting for a decoded frame (decoder is the bottleneck)
+
+    def _decode_loop(self, start_index: int):
+        try:
+            for frame_index in range(start_index, self.frame_count):
+                with self._cond:
+                    wait_start = time.perf_counter()
+                    # Slot frame_index % depth last held frame_index - depth, which must have been released
+                    while not self._stop_requested and frame_index >= self._current + self.depth:
+                        self._cond.wait()
+                    self.decoder_wait_s += time.perf_counter() - wait_start
+                    if self._stop_requested:
+                        return
+                frame = self.get_frame(frame_index / self.fps)
+                slot_index = frame_index % self.depth
+                if self._slots[slot_index] is None or self._slots[slot_index].shape != frame.shape:
+                    self._slots[slot_index] = np.empty(frame.shape, dtype=np.uint8)
+                np.copyto(self._slots[slot_index], frame, casting='unsafe')
+                with self._cond:
+                    self._produced = frame_index + 1
+                    self._cond.notify_all()
+        except Exception as e:
+            with self._cond:
+                self._error = e
+                self._cond.notify_all()
+
+    def _start(self, start_index: int):
+        self.close()
+        self._stop_requested = False
+        self._error = None
+        self._produced = self._current = start_index
+        self._thread = threading.Thread(target=self._decode_loop, args=(start_index,), daemon=True)
+        self._thread.start()
+
+    def get(self, frame_index: int) -> np.ndarray:
+        """Returns frame frame_index from the ring, starting or repositioning the decoder thread if needed."""
+        if self._thread is None or not self._current <= frame_index < self._produced + self.depth:
+            self._start(frame_index)
+        with self._cond:
+            self._current = frame_index
+            self._cond.notify_all() # Frames before frame_index are released, the decoder may refill their slots
+            wait_start = time.perf_counter()
+            while self._produced <= frame_index and self._error is None:
+                self._cond.wait()
+            self.consumer_wait_s += time.perf_counter() - wait_start
+            if self._error is not None:
+                raise self._error
+        return self._slots[frame_index % self.depth]
+
+    def close(self):
+        """Stops the decoder thread (the source clip itself is left open)."""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stop_requested = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._thread = None
+        # print(f"ReadAhead - decoder waited {self.decoder_wait_s:.1f}s, consumer waited {self.consumer_wait_s:.1f}s") # Optional debug
+
+
+class ReadAheadClip(VideoClip):
+    """
+    Wraps a clip so that its frames at multiples of 1 / fps are decoded ahead on a background thread.
+    Frames returned by get_frame are ring slots: valid until the next get_frame call, do not keep them.
+    """
+
+    def __init__(self, clip, fps: float, depth: int = DEFAULT_READ_AHEAD_FRAMES):
+        self.source_clip = clip
+        self.frame_count = int(math.ceil(clip.duration * fps - 1e-6))
+        self.read_ahead = FrameReadAhead(clip.get_frame, fps, self.frame_count, depth)
+        VideoClip.__init__(self, make_frame=self._make_frame, duration=clip.duration)
+        self.fps = fps
+        self.size = clip.size
+
+    def _make_frame(self, t: float) -> np.ndarray:
+        frame_position = t * self.read_ahead.fps
+        frame_index = int(round(frame_position))
+        if abs(frame_position - frame_index) > 1e-3 or frame_index >= self.frame_count:
+            self.read_ahead.close() # Off-grid time (e.g. a preview frame): decode it directly
+            return self.source_clip.get_frame(t)
+        return self.read_ahead.get(frame_index)
+
+    def close(self):
+        self.read_ahead.close()
+
+
+if __name__ == '__main__':
+    print("--- Testing Frame Read-Ahead ---")
+    def slow_test_frame(t):
+        time.sleep(0.004) # Stands in for a pipe read from the decoder
+        return np.full((1920, 1080, 3), int(t * 30) % 256, dtype=np.uint8)
+
+    for test_depth in (MIN_READ_AHEAD_FRAMES, DEFAULT_READ_AHEAD_FRAMES):
+        test_read_ahead = FrameReadAhead(slow_test_frame, 30, 120, depth=test_depth)
+        start_time = time.perf_counter()
+        for test_index in range(120):
+            test_frame = test_read_ahead.get(test_index)
+            assert test_frame[0, 0, 0] == test_index % 256
+            time.sleep(0.004) # Stands in for compositing and encoding
+        test_read_ahead.close()
+        print(f"depth {test_depth}: 120 frames in {time.perf_counter() - start_time:.2f}s (serial would take ~{120 * 0.008:.2f}s)")
+    test_read_ahead = FrameReadAhead(slow_test_frame, 30, 120)
+    print(f"Seek: frame 90 -> {test_read_ahead.get(90)[0, 0, 0]}, frame 10 -> {test_read_ahead.get(10)[0, 0, 0]}")
+    test_read_ahead.close()
@@ -4,11 +4,14 @@ from customtkinter import filedialog, CTkImage
 from PIL import Image, ImageTk
 import os
 import traceback
+import shutil
+import math
 import threading
 import queue
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import colorchooser
-import tempfile
-import shutil
 # import functools # Not actively used
 
 # Import custom modules
@@ -18,6 +21,8 @@ import ai_story_generator
 import video_processor
 import srt_generator
 import file_manager
+import text_renderer
+import template_ingest
 
 customtkinter.set_appearance_mode("dark")
 customtkinter.set_default_color_theme("blue")
@@ -45,9 +50,20 @@ VOICE_AVATAR_GRID_COLUMNS_MAIN = 3
 VOICE_AVATAR_GRID_COLUMNS_POPUP = 4
 
 VIDEO_PREVIEW_THUMBNAIL_SIZE = (360, 640) # Target aspect ratio for preview content
+THUMBNAIL_LOADER_WORKERS = 4 # Background threads creating/loading grid thumbnails
+THUMBNAIL_MEMORY_CACHE_MAX_ITEMS = 256 # Decoded grid thumbnails kept in memory (rows are recreated when scrolled back)
+THUMBNAIL_GRID_ROW_EXTRA_HEIGHT = 40 # Caption + padding below each thumbnail, used to size virtual rows
+THUMBNAIL_GRID_OVERSCAN_ROWS = 2 # Rows kept alive above and below the visible area of the popup grid
+TASK_QUEUE_MAX_CALLBACKS_PER_TICK = 50
 PHONE_SCREEN_PADDING_X_FACTOR = 0.075
 PHONE_SCREEN_PADDING_Y_TOP_FACTOR = 0.05
 PHONE_SCREEN_PADDING_Y_BOTTOM_FACTOR = 0.05
+PHONE_PREVIEW_DISPLAY_WIDTH = 380
+PREVIEW_CACHE_MAX_ITEMS = 32 # Finished phone previews kept per (thumbnail, style), so switching back to a recent style is instant
+PREVIEW_SAMPLE_TEXT = "This is a sample subtitle text."
+WHISPER_MODEL = "base.en"
+DRAFT_WHISPER_MODEL = None # e.g. "tiny.en" for faster drafts; None keeps WHISPER_MODEL so the draft SRT is reused by the final render
+PREVIEW_DEBOUNCE_MS = 120 # Style changes arriving closer together than this are rendered once, with the last value
 
 class App(customtkinter.CTk):
     def __init__(self):
@@ -310,11 +326,29 @@ class App(customtkinter.CTk):
             "Yu Gothic Regular & Yu Gothic UI Semilight": {"styles": {"Regular": "Yu-Gothic-Regular-&-Yu-Gothic-UI-Semilight"}, "source": "moviepy_list"},
             "ZWAdobeF": {"styles": {"Regular": "ZWAdobeF"}, "source": "moviepy_list"}
         }
+        # Fonts shipped in assets/fonts work with both subtitle text engines (ImageMagick receives the file path)
+        for family_name, family_styles in text_renderer.list_bundled_font_families().items():
+            self.font_definitions.setdefault(family_name, {"styles": family_styles, "source": "bundled"})
         self.all_video_templates = []
+        self.video_template_records = {} # path -> metadata record from video_processor.list_video_templates()
+        self.current_video_thumbnail_for_composite_path = None
+        self.current_video_thumbnail_for_composite_pil = None # Selected thumbnail kept in memory for the subtitle preview
         self.combined_preview_ctk_image = None
+        self.phone_screen_rect = None # (x, y, width, height) of the screen inside phone_frame_template_pil, computed once
+        self.phone_preview_display_size = None
+        self.preview_image_cache = OrderedDict() # (thumbnail path, style options) -> CTkImage, LRU
+        self.preview_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview") # Renders subtitle previews off the Tk thread
+        self.preview_request_serial = 0 # Incremented per requested preview; only the newest result is displayed
+        self.preview_debounce_after_id = None
+        self.preview_pending_future = None
+        self.last_draft = None # Narration/SRT of the latest draft, reused by a final render of the same story, voice and max words
         self.phone_frame_ctk_image = None # This seems unused for image display, template_pil is used
 
         self.task_queue = queue.Queue()
+        self.thumbnail_executor = ThreadPoolExecutor(max_workers=THUMBNAIL_LOADER_WORKERS, thread_name_prefix="thumbnails")
+        self.thumbnail_image_cache = OrderedDict() # (video_path, size) -> PIL image, LRU
+        self.thumbnail_batch_done = threading.Event() # Set once the startup batch has filled the thumbnail cache
+        self.virtual_thumbnail_grids = {} # Scrolling canvas name -> state of the virtual thumbnail grid shown in it
         self.after(100, lambda: self.check_queue_for_updates())
         
         # Periodic check for icon reference (useful for debugging icon issues)
@@ -352,9 +386,8 @@ class App(customtkinter.CTk):
                 phone_pil_image_original = phone_pil_image_original.convert('RGBA')
             transparent_background_for_phone = Image.new('RGBA', phone_pil_image_original.size, (0, 0, 0, 0))
             self.phone_frame_template_pil = Image.alpha_composite(transparent_background_for_phone, phone_pil_image_original)
-            display_phone_width = 380 
-            aspect_ratio = self.phone_frame_template_pil.height / self.phone_frame_template_pil.width
-            display_phone_height = int(display_phone_width * aspect_ratio)
+            self._compute_phone_preview_geometry()
+            display_phone_width, display_phone_height = self.phone_preview_display_size
             self.phone_frame_container.configure(width=display_phone_width, height=display_phone_height)
             self.combined_preview_display_label = customtkinter.CTkLabel(
                 self.phone_frame_container, text="", fg_color="transparent"
@@ -392,6 +425,14 @@ class App(customtkinter.CTk):
         self.generate_video_button.bind("<ButtonPress-1>", self._on_generate_button_press)
         self.generate_video_button.bind("<ButtonRelease-1>", self._on_generate_button_release)
 
+        self.draft_mode_var = customtkinter.BooleanVar(value=False)
+        self.draft_mode_checkbox = customtkinter.CTkCheckBox(
+            self.right_pane, text="Draft (fast, low resolution)", variable=self.draft_mode_var,
+            font=("Arial", 12), text_color=COLOR_TEXT_SECONDARY, fg_color=COLOR_PRIMARY_ACTION, hover_color=COLOR_PRIMARY_ACTION_HOVER,
+            corner_radius=CORNER_RADIUS_INPUT
+        )
+        self.draft_mode_checkbox.place(relx=0.5, rely=0.93, anchor="center")
+
         # --- UI Elements for Left Panel ---
         current_row_in_left_panel = 0
         # Input method: Reddit URL or AI generation
@@ -656,75 +697,104 @@ class App(customtkinter.CTk):
         self._disable_main_action_button(); threading.Thread(target=self._ai_story_worker, args=(subject, style, max_tokens), daemon=True).start()
 
 
+    def _compute_phone_preview_geometry(self):
+        """Computes the phone screen rectangle and the on-screen preview size once, from phone_frame_template_pil."""
+        pt_width, pt_height = self.phone_frame_template_pil.size
+        self.phone_screen_rect = (
+            int(pt_width * PHONE_SCREEN_PADDING_X_FACTOR),
+            int(pt_height * PHONE_SCREEN_PADDING_Y_TOP_FACTOR),
+            int(pt_width * (1 - 2 * PHONE_SCREEN_PADDING_X_FACTOR)),
+            int(pt_height * (1 - PHONE_SCREEN_PADDING_Y_TOP_FACTOR - PHONE_SCREEN_PADDING_Y_BOTTOM_FACTOR)),
+        )
+        self.phone_preview_display_size = (PHONE_PREVIEW_DISPLAY_WIDTH, int(PHONE_PREVIEW_DISPLAY_WIDTH * pt_height / pt_width))
+
+    def _compose_phone_preview(self, screen_content_pil: Image.Image | None) -> Image.Image:
+        """Places the screen content inside the precomputed screen rectangle, under the phone frame."""
+        screen_x, screen_y, screen_w, screen_h = self.phone_screen_rect
+        composite_base_pil = Image.new('RGBA', self.phone_frame_template_pil.size, (0, 0, 0, 0))
+        if screen_content_pil is not None:
+            if screen_content_pil.size != (screen_w, screen_h):
+                screen_content_pil = screen_content_pil.resize((screen_w, screen_h), Image.Resampling.LANCZOS)
+            composite_base_pil.paste(screen_content_pil, (screen_x, screen_y))
+        return Image.alpha_composite(composite_base_pil, self.phone_frame_template_pil)
+
+    def _preview_cache_key(self, style_opts: dict) -> tuple:
+        return (self.current_video_thumbnail_for_composite_path, tuple(sorted(style_opts.items())))
+
     def update_subtitle_preview_display(self, _=None):
+        """
+        Shows the preview for the current style. Cached previews are shown immediately; otherwise the render is
+        debounced and handed to preview_executor, and only the result of the newest request is displayed.
+        """
         if not hasattr(self, 'combined_preview_display_label'):
             # print("DEBUG: combined_preview_display_label not found in update_subtitle_preview_display") # Optional debug
             return
-        if not hasattr(self, 'phone_frame_template_pil') or self.phone_frame_template_pil is None:
+        if not hasattr(self, 'phone_frame_template_pil') or self.phone_frame_template_pil is None or self.phone_screen_rect is None:
             self.combined_preview_display_label.configure(image=None, text="[Phone GFX Missing]")
             # print("DEBUG: phone_frame_template_pil not found or is None") # Optional debug
             return
 
-        try:
-            phone_template_pil = self.phone_frame_template_pil.copy()
-            pt_width, pt_height = phone_template_pil.size
+        style_opts = self._get_current_subtitle_style_options()
+        if not style_opts:
+            self.combined_preview_display_label.configure(image=None, text="[Style Error]")
+            return
 
-            style_opts = self._get_current_subtitle_style_options()
-            if not style_opts:
-                self.combined_preview_display_label.configure(image=None, text="[Style Error]")
-                return
-            preview_text = "This is a sample subtitle text."
+        self.preview_request_serial += 1 # Invalidates every render requested before this one
+        if self.preview_debounce_after_id is not None:
+            self.after_cancel(self.preview_debounce_after_id); self.preview_debounce_after_id = None
 
+        cache_key = self._preview_cache_key(style_opts)
+        cached_ctk_image = self.preview_image_cache.get(cache_key)
+        if cached_ctk_image is not None:
+            self.preview_image_cache.move_to_end(cache_key)
+            self._show_preview_image(cached_ctk_image)
+            return
+
+        request_serial = self.preview_request_serial
+        self.preview_debounce_after_id = self.after(PREVIEW_DEBOUNCE_MS, lambda: self._start_preview_render(request_serial, cache_key, style_opts))
+
+    def _start_preview_render(self, request_serial, cache_key, style_opts):
+        self.preview_debounce_after_id = None
+        if request_serial != self.preview_request_serial: return
+        if self.preview_pending_future is not None:
+            self.preview_pending_future.cancel() # Drops a queued render that has not started; a running one is discarded on arrival
+        thumbnail_pil = self.current_video_thumbnail_for_composite_pil
+        self.preview_pending_future = self.preview_executor.submit(self._preview_render_worker, request_serial, cache_key, style_opts, thumbnail_pil)
+
+    def _preview_render_worker(self, request_serial, cache_key, style_opts, thumbnail_pil):
+        """Runs on preview_executor: rasterizes the subtitle and composites the phone preview (PIL only, no Tk calls)."""
+        if request_serial != self.preview_request_serial: return # Superseded while queued
+        final_composite_pil, screen_content_failed = None, False
+        try:
             screen_content_pil = None
-            if self.current_video_thumbnail_for_composite_path and os.path.exists(self.current_video_thumbnail_for_composite_path):
-                generated_screen_content_path = video_processor.create_composite_preview_image(
-                    self.current_video_thumbnail_for_composite_path,
-                    preview_text,
-                    style_opts
-                )
-                if generated_screen_content_path and os.path.exists(generated_screen_content_path):
-                    screen_content_pil = Image.open(generated_screen_content_path).convert("RGBA")
-                else:
-                    print(f"WARN: Screen content generation failed or path not found: {generated_screen_content_path}")
+            if thumbnail_pil is not None:
+                screen_content_pil = video_processor.create_composite_preview_image(thumbnail_pil, PREVIEW_SAMPLE_TEXT, style_opts)
+                if screen_content_pil is None:
+                    print("WARN: Screen content generation failed."); screen_content_failed = True
             # else: # Optional info
                 # print("INFO: No video selected for preview content.")
-
-            screen_area_x = pt_width * PHONE_SCREEN_PADDING_X_FACTOR
-            screen_area_y = pt_height * PHONE_SCREEN_PADDING_Y_TOP_FACTOR
-            screen_area_width = pt_width * (1 - 2 * PHONE_SCREEN_PADDING_X_FACTOR)
-            screen_area_height = pt_height * (1 - PHONE_SCREEN_PADDING_Y_TOP_FACTOR - PHONE_SCREEN_PADDING_Y_BOTTOM_FACTOR)
-
-            screen_area_x_int = int(screen_area_x)
-            screen_area_y_int = int(screen_area_y)
-            screen_area_width_int = int(screen_area_width)
-            screen_area_height_int = int(screen_area_height)
-
-            composite_base_pil = Image.new('RGBA', phone_template_pil.size, (0, 0, 0, 0))
-
-            if screen_content_pil:
-                resized_screen_content_pil = screen_content_pil.resize(
-                    (screen_area_width_int, screen_area_height_int), 
-                    Image.Resampling.LANCZOS
-                )
-                composite_base_pil.paste(resized_screen_content_pil, (screen_area_x_int, screen_area_y_int))
-
-            final_composite_pil = Image.alpha_composite(composite_base_pil, phone_template_pil)
-
-            display_phone_width = 380 
-            final_aspect_ratio = final_composite_pil.height / final_composite_pil.width
-            display_composite_height = int(display_phone_width * final_aspect_ratio)
-
-            self.combined_preview_ctk_image = CTkImage(
-                light_image=final_composite_pil,
-                dark_image=final_composite_pil,
-                size=(display_phone_width, display_composite_height)
-            )
-            self.combined_preview_display_label.configure(image=self.combined_preview_ctk_image, text="")
-
+            final_composite_pil = self._compose_phone_preview(screen_content_pil)
         except Exception as e:
-            print(f"ERROR in update_subtitle_preview_display: {e}")
+            print(f"ERROR in preview render: {e}")
             traceback.print_exc()
+        self.task_queue.put(lambda: self._apply_preview_result(request_serial, cache_key, final_composite_pil, screen_content_failed))
+
+    def _apply_preview_result(self, request_serial, cache_key, final_composite_pil, screen_content_failed):
+        if request_serial != self.preview_request_serial: return # A newer style was requested meanwhile
+        if final_composite_pil is None:
             self.combined_preview_display_label.configure(image=None, text="[Preview Gen Error]")
+            return
+        ctk_image = CTkImage(light_image=final_composite_pil, dark_image=final_composite_pil, size=self.phone_preview_display_size)
+        if not screen_content_failed: # Failed renders are retried next time
+            self.preview_image_cache[cache_key] = ctk_image
+            while len(self.preview_image_cache) > PREVIEW_CACHE_MAX_ITEMS:
+                self.preview_image_cache.popitem(last=False)
+        self._show_preview_image(ctk_image)
+
+    def _show_preview_image(self, ctk_image):
+        self.combined_preview_ctk_image = ctk_image
+        try: self.combined_preview_display_label.configure(image=ctk_image, text="")
+        except Exception as e: print(f"ERROR displaying subtitle preview: {e}")
 
     def _on_font_family_change(self, selected_font_family: str):
         """Updates font style options when font family changes."""
@@ -795,9 +865,11 @@ class App(customtkinter.CTk):
     
     def check_queue_for_updates(self):
         try:
-            callback = self.task_queue.get(block=False)
-            if callable(callback): callback()
-            self.task_queue.task_done()
+            # Several callbacks per tick, so a burst of loaded thumbnails does not trickle in at 10 per second
+            for _ in range(TASK_QUEUE_MAX_CALLBACKS_PER_TICK):
+                callback = self.task_queue.get(block=False)
+                if callable(callback): callback()
+                self.task_queue.task_done()
         except queue.Empty: pass
         finally:
             self.after(100, lambda: self.check_queue_for_updates())
@@ -842,11 +914,33 @@ class App(customtkinter.CTk):
             self.status_label.configure(text=f"Subtitle {color_target} color updated."); self.update_subtitle_preview_display()
 
     def _load_video_templates_list(self):
-        self.all_video_templates = video_processor.list_video_templates()
+        # Indexing hashes and probes new templates, so it runs off the Tk thread; the grid fills in from the queue
+        if hasattr(self, 'active_video_display_label'): self.active_video_display_label.configure(text="Loading video templates...")
+        threading.Thread(target=self._index_video_templates_worker, daemon=True).start()
+
+    def _index_video_templates_worker(self):
+        try:
+            records = video_processor.list_video_templates()
+            self.task_queue.put(lambda: self._apply_video_template_records(records))
+            video_paths = [record['path'] for record in records]
+            if video_paths and video_processor.TEMPLATE_MEZZANINE_ENABLED:
+                # Normalize new or changed templates in the background so renders start from a cheap-to-decode mezzanine
+                threading.Thread(target=template_ingest.ingest_all_templates, args=(video_paths,), daemon=True).start()
+            # Fill the thumbnail cache for all templates and sizes in worker processes while the GUI starts
+            if video_paths: video_processor.create_thumbnails_for_templates()
+        except Exception as e: print(f"Error indexing video templates: {e}"); traceback.print_exc()
+        finally:
+            self.thumbnail_batch_done.set() # Thumbnail loaders wait for the batch, so no keyframe is decoded twice
+
+    def _apply_video_template_records(self, records: list):
+        self.video_template_records = {record['path']: record for record in records}
+        self.all_video_templates = list(self.video_template_records)
         if not self.all_video_templates:
             if hasattr(self, 'active_video_display_label'): self.active_video_display_label.configure(text="Video templates folder empty.")
             self.current_video_thumbnail_for_composite_path = None # Ensure this is reset
+            self.current_video_thumbnail_for_composite_pil = None
         elif not self.background_video_path : self._select_video_from_thumbnail_internal(self.all_video_templates[0]) # Select first one if none selected
+        self.refresh_main_thumbnail_grid()
         self.update_subtitle_preview_display() # Update preview regardless
 
     def refresh_main_thumbnail_grid(self, newly_selected_path: str = None):
@@ -982,61 +1076,59 @@ class App(customtkinter.CTk):
         if hasattr(self, 'test_voice_button'): self.test_voice_button.configure(state="disabled", fg_color="grey50")
         threading.Thread(target=self._play_audio_worker, args=(sample_path, friendly), daemon=True).start()
 
-    def _process_all_worker(self, story, voice_tech, bg_video, srt_words, sub_style, id_str):
+    def _process_all_worker(self, story, voice_tech, bg_video, srt_words, sub_style, id_str, draft=False):
         step = ""
         language_for_srt = "en" # Assuming English for now
-        temp_dir_for_narrated_video = None
+        whisper_model = (DRAFT_WHISPER_MODEL or WHISPER_MODEL) if draft else WHISPER_MODEL
+        reuse_key = (story, voice_tech, srt_words)
+        # Drafts keep their narration and SRT next to the draft video; finals use the regular output folders
+        audio_path = os.path.join(file_manager.DRAFT_DIR if draft else file_manager.AUDIO_DIR, f"{id_str}.wav")
+        srt_path = os.path.join(file_manager.DRAFT_DIR if draft else file_manager.SRT_DIR, f"{id_str}.srt")
+        last_draft = self.last_draft
+        if draft or not last_draft or last_draft['key'] != reuse_key or not os.path.exists(last_draft['audio_path']):
+            last_draft = None
         try:
             self.task_queue.put(self.show_generating_video_popup)
             step = "Generating Speech (TTS)"
-            self.task_queue.put(lambda: self.update_generating_log(f"1/3: {step}..."))
-            audio_path = os.path.join(file_manager.AUDIO_DIR, f"{id_str}.wav")
-            if not tts_kokoro_module.generate_speech_with_voice_name(story, voice_tech, audio_path):
-                raise Exception("TTS (Speech Generation) failed.")
+            if last_draft:
+                self.task_queue.put(lambda: self.update_generating_log(f"1/3: Reusing narration of draft {last_draft['id']}..."))
+                shutil.copy2(last_draft['audio_path'], audio_path)
+            else:
+                self.task_queue.put(lambda: self.update_generating_log(f"1/3: {step}..."))
+                if not tts_kokoro_module.generate_speech_with_voice_name(story, voice_tech, audio_path):
+                    raise Exception("TTS (Speech Generation) failed.")
 
             step = "Generating Subtitles (SRT)"
-            self.task_queue.put(lambda: self.update_generating_log(f"2/3: {step}..."))
-            srt_path = os.path.join(file_manager.SRT_DIR, f"{id_str}.srt")
-            if not srt_generator.create_srt_file(audio_path, srt_path, language=language_for_srt, max_words_per_segment=srt_words):
-                raise Exception("SRT (Subtitle Generation) failed.")
+            if last_draft and last_draft['whisper_model'] == whisper_model and os.path.exists(last_draft['srt_path']):
+                self.task_queue.put(lambda: self.update_generating_log(f"2/3: Reusing subtitles of draft {last_draft['id']}..."))
+                shutil.copy2(last_draft['srt_path'], srt_path)
+            else:
+                self.task_queue.put(lambda: self.update_generating_log(f"2/3: {step}..."))
+                if not srt_generator.create_srt_file(audio_path, srt_path, model_size=whisper_model, language=language_for_srt, max_words_per_segment=srt_words):
+                    raise Exception("SRT (Subtitle Generation) failed.")
 
-            step = "Assembling Final Video"
+            step = "Assembling Draft Video" if draft else "Assembling Final Video"
             self.task_queue.put(lambda: self.update_generating_log(f"3/3: {step}..."))
-            self.task_queue.put(lambda: self.update_generating_log(f"3/3: {step} - Adding narration to video..."))
-            temp_dir_for_narrated_video = tempfile.mkdtemp(prefix=f"narr_vid_temp_{id_str}_", dir=file_manager.BASE_OUTPUT_DIR)
-            temp_narrated_video_path = os.path.join(temp_dir_for_narrated_video, f"{id_str}_temp_narrated.mp4")
+            self.task_queue.put(lambda: self.update_generating_log(f"3/3: {step} - Adding narration and burning subtitles..."))
+            final_video_path = os.path.join(file_manager.DRAFT_DIR if draft else file_manager.FINAL_VIDEO_DIR, f"{id_str}.mp4")
             
-            # print(f"DEBUG: Creating temporary narrated video at: {temp_narrated_video_path}") # Useful debug
+            # print(f"DEBUG: Rendering final video from {bg_video} to: {final_video_path}") # Useful debug
 
-            if not video_processor.create_narrated_video(bg_video, audio_path, temp_narrated_video_path):
-                raise Exception("Temporary narrated video creation failed.")
+            if draft:
+                if not video_processor.render_draft_video(bg_video, audio_path, srt_path, final_video_path, style_options=sub_style):
+                    raise Exception("Rendering the draft video failed.")
+                self.last_draft = {'key': reuse_key, 'id': id_str, 'audio_path': audio_path, 'srt_path': srt_path, 'whisper_model': whisper_model}
+            elif not video_processor.render_final_video(bg_video, audio_path, srt_path, final_video_path, style_options=sub_style):
+                raise Exception("Rendering the final video failed.")
 
-            self.task_queue.put(lambda: self.update_generating_log(f"3/3: {step} - Burning subtitles..."))
-            final_video_path = os.path.join(file_manager.FINAL_VIDEO_DIR, f"{id_str}.mp4")
-            
-            # print(f"DEBUG: Burning subtitles from {temp_narrated_video_path} to final video at: {final_video_path}") # Useful debug
-
-            if not video_processor.burn_subtitles_on_video(temp_narrated_video_path, srt_path, final_video_path, style_options=sub_style):
-                raise Exception("Burning subtitles to create final video failed.")
-
-            self.task_queue.put(lambda: self._update_gui_after_all_processing(True, f"Video '{id_str}' created! Path: {os.path.abspath(final_video_path)}"))
+            kind = "Draft" if draft else "Video"
+            self.task_queue.put(lambda: self._update_gui_after_all_processing(True, f"{kind} '{id_str}' created! Path: {os.path.abspath(final_video_path)}"))
 
         except Exception as e:
             err_msg = f"Error during '{step}': {e}"
             print(err_msg); traceback.print_exc()
             self.task_queue.put(lambda: self._update_gui_after_all_processing(False, err_msg))
         finally:
-            # print(f"DEBUG: Cleanup started for temp dir: {temp_dir_for_narrated_video}") # Useful debug
-            if temp_dir_for_narrated_video and os.path.exists(temp_dir_for_narrated_video):
-                try:
-                    shutil.rmtree(temp_dir_for_narrated_video)
-                    # print(f"DEBUG: Successfully deleted temporary directory: {temp_dir_for_narrated_video}") # Useful debug
-                except Exception as e_clean_dir:
-                    print(f"Warning: Failed to delete temporary directory {temp_dir_for_narrated_video}: {e_clean_dir}")
-                    self.task_queue.put(lambda: self.update_generating_log(f"Warning: Failed to delete temp dir {temp_dir_for_narrated_video}: {e_clean_dir}"))
-            # else: # Optional debug
-                 # print(f"DEBUG: No temporary directory to clean up or path is invalid: {temp_dir_for_narrated_video}")
-
             self.task_queue.put(self.hide_generating_video_popup)
 
     def _update_gui_after_all_processing(self, success: bool, message: str):
@@ -1054,10 +1146,11 @@ class App(customtkinter.CTk):
         if max_words_str != "Whisper (Default)" and srt_words is None: self.status_label.configure(text="Error SRT: Invalid Max words value."); return # Check specific case
         sub_style = self._get_current_subtitle_style_options()
         if not sub_style: self.status_label.configure(text="Error: Subtitle style options are invalid."); return
-        id_str = file_manager.get_next_id_str()
-        self.status_label.configure(text=f"Starting video generation (ID: {id_str})..."); self.update_idletasks()
+        draft = self.draft_mode_var.get()
+        id_str = file_manager.get_draft_id_str() if draft else file_manager.get_next_id_str()
+        self.status_label.configure(text=f"Starting {'draft' if draft else 'video'} generation (ID: {id_str})..."); self.update_idletasks()
         self._disable_main_action_button()
-        threading.Thread(target=self._process_all_worker, args=(story, self.selected_voice_technical_name, self.background_video_path, srt_words, sub_style, id_str), daemon=True).start()
+        threading.Thread(target=self._process_all_worker, args=(story, self.selected_voice_technical_name, self.background_video_path, srt_words, sub_style, id_str, draft), daemon=True).start()
 
     def open_view_all_voices_popup(self):
         # print("open_view_all_voices_popup called") # Optional debug
@@ -1164,23 +1257,122 @@ class App(customtkinter.CTk):
         # print(f"_display_thumbnails_in_grid called for {'popup' if from_popup else 'main'}") # Optional debug
         for widget in parent_frame.winfo_children(): widget.destroy()
         videos_to_render = video_paths_to_display[:max_items_to_show] if max_items_to_show is not None else video_paths_to_display
-        grid_cols = VIDEO_THUMBNAIL_GRID_COLUMNS; thumb_size_w, thumb_size_h = (160, 284) if from_popup else (128,227)
-        row, col = 0, 0
-        for video_path in videos_to_render:
-            is_selected_video = (self.background_video_path == video_path)
-            thumb_path = video_processor.get_or_create_thumbnail(video_path, size=(thumb_size_w, thumb_size_h))
-            if thumb_path:
-                try:
-                    pil_image = Image.open(thumb_path); ctk_image = CTkImage(light_image=pil_image, dark_image=pil_image, size=(pil_image.width, pil_image.height))
-                    item_frame = customtkinter.CTkFrame(parent_frame, fg_color="transparent")
-                    item_frame.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
-                    thumb_button = customtkinter.CTkButton(item_frame, image=ctk_image, text="", width=pil_image.width, height=pil_image.height, fg_color=COLOR_BACKGROUND_CARD, hover_color=COLOR_BUTTON_SECONDARY_HOVER, corner_radius=CORNER_RADIUS_BUTTON, border_width=2 if is_selected_video else 0, border_color=COLOR_BORDER_SELECTED if is_selected_video else COLOR_BACKGROUND_CARD, command=lambda vp=video_path, pop_ref=popup_window_ref: self._select_video_from_thumbnail_internal(vp, from_popup, pop_ref))
-                    thumb_button.pack(pady=(0,3))
-                    customtkinter.CTkLabel(item_frame, text=os.path.basename(video_path), font=("Arial", 10), wraplength=pil_image.width - 5, text_color=COLOR_TEXT_SECONDARY).pack(fill="x")
-                except Exception as e: print(f"Error displaying thumbnail {thumb_path}: {e}")
-            col += 1
-            if col >= grid_cols: col = 0; row += 1
+        grid_cols = VIDEO_THUMBNAIL_GRID_COLUMNS; thumb_size = (160, 284) if from_popup else (128,227)
         for i in range(grid_cols): parent_frame.grid_columnconfigure(i, weight=1)
+        grid_state = {
+            'parent': parent_frame, 'videos': videos_to_render, 'thumb_size': thumb_size, 'from_popup': from_popup,
+            'popup_window_ref': popup_window_ref, 'total_rows': math.ceil(len(videos_to_render) / grid_cols), 'rows': {},
+            'canvas': getattr(parent_frame, '_parent_canvas', None), # CTkScrollableFrame's scrolling canvas
+        }
+        if not from_popup or grid_state['canvas'] is None:
+            for row in range(grid_state['total_rows']): self._create_thumbnail_grid_row(grid_state, row)
+            return
+        # Popup: every row gets its final height up front so the scrollbar is right, but widgets only exist near the viewport
+        for row in range(grid_state['total_rows']): parent_frame.grid_rowconfigure(row, minsize=thumb_size[1] + THUMBNAIL_GRID_ROW_EXTRA_HEIGHT)
+        self._attach_virtual_thumbnail_grid(grid_state)
+
+    def _attach_virtual_thumbnail_grid(self, grid_state):
+        """Makes grid_state the grid of its canvas; rows are rebuilt when the canvas scrolls or resizes, not on a timer."""
+        canvas = grid_state['canvas']; canvas_key = str(canvas)
+        previous_state = self.virtual_thumbnail_grids.get(canvas_key)
+        if previous_state is None:
+            # First grid on this canvas: chain the scrollbar update and hook resizes once
+            original_yscroll = canvas.tk.splitlist(canvas.cget('yscrollcommand'))
+            def on_yscroll(*args):
+                if original_yscroll: canvas.tk.call(*original_yscroll, *args)
+                self._schedule_virtual_thumbnail_update(canvas_key)
+            canvas.configure(yscrollcommand=on_yscroll)
+            canvas.bind("<Configure>", lambda e: self._schedule_virtual_thumbnail_update(canvas_key), add="+")
+            canvas.bind("<Destroy>", lambda e: self._detach_virtual_thumbnail_grid(canvas_key), add="+")
+        elif previous_state['update_after_id'] is not None:
+            self.after_cancel(previous_state['update_after_id']) # Re-rendered: the old rows are gone
+        grid_state['update_after_id'] = None
+        self.virtual_thumbnail_grids[canvas_key] = grid_state
+        self._update_virtual_thumbnail_rows(grid_state)
+
+    def _detach_virtual_thumbnail_grid(self, canvas_key):
+        grid_state = self.virtual_thumbnail_grids.pop(canvas_key, None)
+        if grid_state and grid_state['update_after_id'] is not None: self.after_cancel(grid_state['update_after_id'])
+
+    def _schedule_virtual_thumbnail_update(self, canvas_key):
+        """Coalesces the scroll/resize events of one redraw into a single row update."""
+        grid_state = self.virtual_thumbnail_grids.get(canvas_key)
+        if grid_state is None or grid_state['update_after_id'] is not None: return
+        grid_state['update_after_id'] = self.after_idle(lambda: self._update_virtual_thumbnail_rows(grid_state))
+
+    def _update_virtual_thumbnail_rows(self, grid_state):
+        parent_frame, canvas = grid_state['parent'], grid_state['canvas']
+        grid_state['update_after_id'] = None
+        if not parent_frame.winfo_exists(): return
+        row_height = grid_state['thumb_size'][1] + THUMBNAIL_GRID_ROW_EXTRA_HEIGHT
+        top_fraction = canvas.yview()[0]
+        first_visible = int(top_fraction * grid_state['total_rows'])
+        visible_count = math.ceil(max(canvas.winfo_height(), row_height) / row_height)
+        keep_from = max(0, first_visible - THUMBNAIL_GRID_OVERSCAN_ROWS)
+        keep_to = min(grid_state['total_rows'] - 1, first_visible + visible_count + THUMBNAIL_GRID_OVERSCAN_ROWS)
+        for row in [r for r in grid_state['rows'] if r < keep_from or r > keep_to]:
+            for item_frame in grid_state['rows'].pop(row): item_frame.destroy()
+        for row in range(keep_from, keep_to + 1):
+            if row not in grid_state['rows']: self._create_thumbnail_grid_row(grid_state, row)
+
+    def _create_thumbnail_grid_row(self, grid_state, row):
+        grid_cols = VIDEO_THUMBNAIL_GRID_COLUMNS; row_items = []
+        for col, video_path in enumerate(grid_state['videos'][row * grid_cols:(row + 1) * grid_cols]):
+            row_items.append(self._create_thumbnail_grid_item(grid_state['parent'], video_path, row, col, grid_state['thumb_size'], grid_state['from_popup'], grid_state['popup_window_ref']))
+        grid_state['rows'][row] = row_items
+
+    def _create_thumbnail_grid_item(self, parent_frame, video_path, row, col, thumb_size, from_popup, popup_window_ref):
+        """Creates one grid cell right away; the thumbnail image is filled in when the background loader delivers it."""
+        is_selected_video = (self.background_video_path == video_path)
+        thumb_w, thumb_h = thumb_size
+        cached_image = self.thumbnail_image_cache.get((video_path, thumb_size))
+        ctk_image = CTkImage(light_image=cached_image, dark_image=cached_image, size=(cached_image.width, cached_image.height)) if cached_image else None
+        item_frame = customtkinter.CTkFrame(parent_frame, fg_color="transparent")
+        item_frame.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
+        thumb_button = customtkinter.CTkButton(item_frame, image=ctk_image, text="" if ctk_image else "Loading...", width=thumb_w, height=thumb_h, fg_color=COLOR_BACKGROUND_CARD, hover_color=COLOR_BUTTON_SECONDARY_HOVER, text_color=COLOR_TEXT_SECONDARY, corner_radius=CORNER_RADIUS_BUTTON, border_width=2 if is_selected_video else 0, border_color=COLOR_BORDER_SELECTED if is_selected_video else COLOR_BACKGROUND_CARD, command=lambda vp=video_path, pop_ref=popup_window_ref: self._select_video_from_thumbnail_internal(vp, from_popup, pop_ref))
+        thumb_button.pack(pady=(0,3))
+        customtkinter.CTkLabel(item_frame, text=os.path.basename(video_path), font=("Arial", 10), wraplength=thumb_w - 5, text_color=COLOR_TEXT_SECONDARY).pack(fill="x")
+        if not cached_image: self._load_thumbnail_async(video_path, thumb_size, thumb_button)
+        return item_frame
+
+    def _load_preview_thumbnail_async(self, video_path):
+        """Loads the selected template's preview-size thumbnail on thumbnail_executor; the preview updates when it arrives."""
+        def load_worker():
+            self.thumbnail_batch_done.wait()
+            thumb_path, pil_image = None, None
+            try:
+                thumb_path = video_processor.get_or_create_thumbnail(video_path, size=VIDEO_PREVIEW_THUMBNAIL_SIZE)
+                # Loaded once per selection; every style tweak composites on this in-memory copy
+                if thumb_path: pil_image = Image.open(thumb_path).convert("RGBA")
+            except Exception as e: print(f"Error loading preview thumbnail {thumb_path}: {e}")
+            self.task_queue.put(lambda: self._apply_preview_thumbnail(video_path, thumb_path, pil_image))
+        self.thumbnail_executor.submit(load_worker)
+
+    def _apply_preview_thumbnail(self, video_path, thumb_path, pil_image):
+        if video_path != self.background_video_path: return # Another template was selected meanwhile
+        self.current_video_thumbnail_for_composite_path = thumb_path
+        self.current_video_thumbnail_for_composite_pil = pil_image
+        self.update_subtitle_preview_display()
+
+    def _load_thumbnail_async(self, video_path, thumb_size, thumb_button):
+        def load_worker():
+            self.thumbnail_batch_done.wait()
+            pil_image = None
+            try:
+                thumb_path = video_processor.get_or_create_thumbnail(video_path, size=thumb_size)
+                if thumb_path: pil_image = Image.open(thumb_path); pil_image.load() # Decode the PNG here, not on the Tk thread
+            except Exception as e: print(f"Error loading thumbnail for {video_path}: {e}")
+            self.task_queue.put(lambda: self._apply_loaded_thumbnail(video_path, thumb_size, thumb_button, pil_image))
+        self.thumbnail_executor.submit(load_worker)
+
+    def _apply_loaded_thumbnail(self, video_path, thumb_size, thumb_button, pil_image):
+        if pil_image is not None:
+            self.thumbnail_image_cache[(video_path, thumb_size)] = pil_image; self.thumbnail_image_cache.move_to_end((video_path, thumb_size))
+            while len(self.thumbnail_image_cache) > THUMBNAIL_MEMORY_CACHE_MAX_ITEMS: self.thumbnail_image_cache.popitem(last=False)
+        if not thumb_button.winfo_exists(): return # Row was scrolled away or the popup closed
+        if pil_image is None: thumb_button.configure(text="No preview"); return
+        try: thumb_button.configure(image=CTkImage(light_image=pil_image, dark_image=pil_image, size=(pil_image.width, pil_image.height)), text="")
+        except Exception as e: print(f"Error displaying thumbnail for {video_path}: {e}")
 
     def select_voice_from_avatar(self, friendly_short_name: str, technical_name: str, button_widget_ref):
         """Called when a voice avatar in the main UI is clicked."""
@@ -1193,9 +1385,10 @@ class App(customtkinter.CTk):
         # print(f"_select_video_from_thumbnail_internal: {video_path}") # Optional debug
         self.background_video_path = video_path; filename = os.path.basename(video_path)
         if hasattr(self, 'active_video_display_label'): self.active_video_display_label.configure(text=f"Selected: {filename}")
-        self.status_label.configure(text=f"Background video: {filename}")
-        thumb_path = video_processor.get_or_create_thumbnail(video_path, size=VIDEO_PREVIEW_THUMBNAIL_SIZE)
-        self.current_video_thumbnail_for_composite_path = thumb_path; self.update_subtitle_preview_display()
+        record = self.video_template_records.get(video_path)
+        details = f" ({record['width']}x{record['height']}, {record['duration']:.1f}s)" if record else ""
+        self.status_label.configure(text=f"Background video: {filename}{details}")
+        self._load_preview_thumbnail_async(video_path)
         if from_popup and popup_window_ref and popup_window_ref.winfo_exists():
             popup_window_ref.grab_release(); popup_window_ref.destroy()
             if popup_window_ref == getattr(self, 'all_videos_main_popup', None): delattr(self, 'all_videos_main_popup')
@@ -1306,5 +1499,6 @@ class App(customtkinter.CTk):
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support() # Thumbnail and render worker processes in frozen builds
     app = App()
     app.mainloop()
\ No newline at end of file
@@ -0,0 +1,137 @@
+# output_profiles.py
+import os
+import subprocess
+from moviepy.editor import VideoClip
+from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader
+from moviepy.config import get_setting
+import template_ingest
+
+# Named output formats. Templates are cropped, scaled and resampled to the profile inside the decoder's
+# ffmpeg process, so compositing, subtitle blending and encoding only ever touch the output's pixels.
+OUTPUT_PROFILES = {
+    "vertical_1080p": {'width': 1080, 'height': 1920, 'fps': 30, 'crf': 23, 'video_bitrate': None}, # Shorts / Reels / TikTok
+    "vertical_720p": {'width': 720, 'height': 1280, 'fps': 30, 'crf': 23, 'video_bitrate': None},
+    "square_1080p": {'width': 1080, 'height': 1080, 'fps': 30, 'crf': 23, 'video_bitrate': None},
+    "landscape_1080p": {'width': 1920, 'height': 1080, 'fps': 30, 'crf': 23, 'video_bitrate': None},
+    "draft_540p": {'width': 540, 'height': 960, 'fps': 15, 'crf': 30, 'video_bitrate': None}, # Quick QA of pacing and subtitle timing
+}
+DEFAULT_OUTPUT_PROFILE = "vertical_1080p"
+# Subtitle font sizes and stroke widths in the style options are meant for a frame whose short side is this long
+SUBTITLE_REFERENCE_SHORT_SIDE = 1080
+# Share of the frame width a subtitle line may span; landscape frames get shorter lines so they stay readable
+SUBTITLE_BOX_WIDTH_RATIO = 0.90
+SUBTITLE_BOX_WIDTH_RATIO_LANDSCAPE = 0.70
+
+
+def get_output_profile(profile=None) -> dict:
+    """Returns a profile dict (with its 'name') for a profile name, a profile dict, or None (the default profile)."""
+    if isinstance(profile, dict):
+        return dict(profile, name=profile.get('name', 'custom'))
+    name = profile or DEFAULT_OUTPUT_PROFILE
+    if name not in OUTPUT_PROFILES:
+        print(f"Profiles - Unknown output profile '{name}', using '{DEFAULT_OUTPUT_PROFILE}'.")
+        name = DEFAULT_OUTPUT_PROFILE
+    return dict(OUTPUT_PROFILES[name], name=name)
+
+def profile_size(profile: dict) -> tuple[int, int]:
+    return profile['width'], profile['height']
+
+def decode_filter(profile: dict) -> str:
+    """ffmpeg filter chain that scales a source to cover the profile frame, center-crops it and resamples the frame rate."""
+    width, height = profile_size(profile)
+    return (
+        f"scale={width}:{height}:force_original_aspect_ratio=increase:flags=bicubic,"
+        f"crop={width}:{height},setsar=1,fps={profile['fps']}"
+    )
+
+def profile_encoder_options(profile: dict, encoder_options: dict = None) -> dict:
+    """The profile's rate control, overridden by any non-None value of encoder_options."""
+    options = {'crf': profile.get('crf'), 'video_bitrate': profile.get('video_bitrate')}
+    if encoder_options:
+        options.update({k: v for k, v in encoder_options.items() if v is not None})
+    return options
+
+def subtitle_scale(profile: dict) -> float:
+    return min(profile_size(profile)) / SUBTITLE_REFERENCE_SHORT_SIDE
+
+def subtitle_box_width_ratio(profile: dict) -> float:
+    width, height = profile_size(profile)
+    return SUBTITLE_BOX_WIDTH_RATIO_LANDSCAPE if width > height else SUBTITLE_BOX_WIDTH_RATIO
+
+def subtitle_box_width(profile: dict) -> int:
+    """Width in pixels that subtitle lines wrap at, the same for every burn backend."""
+    return int(profile_size(profile)[0] * subtitle_box_width_ratio(profile))
+
+def scale_subtitle_style(current_style: dict, profile: dict) -> dict:
+    """Returns current_style with font size and stroke width scaled to the profile's frame."""
+    scale = subtitle_scale(profile)
+    if abs(scale - 1.0) < 1e-6:
+        return current_style
+    scaled_style = dict(current_style)
+    scaled_style['fontsize'] = max(1, int(round(float(current_style.get('fontsize', 24)) * scale)))
+    scaled_style['stroke_width'] = round(float(current_style.get('stroke_width', 0) or 0) * scale, 2)
+    return scaled_style
+
+def resolve_profile_source(video_path: str, profile: dict, use_mezzanine: bool) -> str:
+    """
+    Returns the file to decode for a profile. The mezzanine is only used when the profile can be cut from it
+    without losing picture: same aspect ratio and no larger than the mezzanine. Otherwise the original is decoded.
+    """
+    if not use_mezzanine:
+        return video_path
+    mezz_w, mezz_h = template_ingest.MEZZANINE_SIZE
+    width, height = profile_size(profile)
+    if width * mezz_h == height * mezz_w and width <= mezz_w:
+        return template_ingest.resolve_render_source(video_path)
+    return video_path
+
+
+class ProfileVideoReader(FFMPEG_VideoReader):
+    """FFMPEG_VideoReader that crops, scales and resamples to a profile inside the decoding ffmpeg process."""
+
+    def __init__(self, filename: str, profile: dict):
+        self.decode_filter = decode_filter(profile)
+        super().__init__(filename, target_resolution=(profile['height'], profile['width']))
+        self.fps = profile['fps'] # Frame positions are computed on the resampled stream
+        self.nframes = int(self.duration * self.fps)
+
+    def initialize(self, starttime=0):
+        """Same as FFMPEG_VideoReader.initialize, with the profile filter chain instead of a plain scale."""
+        self.close()
+        if starttime != 0:
+            offset = min(1, starttime)
+            i_arg = ['-ss', "%.06f" % (starttime - offset), '-i', self.filename, '-ss', "%.06f" % offset]
+        else:
+            i_arg = ['-i', self.filename]
+        cmd = ([get_setting("FFMPEG_BINARY")] + i_arg +
+               ['-loglevel', 'error', '-f', 'image2pipe', '-vf', self.decode_filter,
+                '-pix_fmt', self.pix_fmt, '-vcodec', 'rawvideo', '-'])
+        popen_params = {"bufsize": self.bufsize, "stdout": subprocess.PIPE, "stderr": subprocess.PIPE, "stdin": subprocess.DEVNULL}
+        if os.name == "nt":
+            popen_params["creationflags"] = 0x08000000
+        self.proc = subprocess.Popen(cmd, **popen_params)
+
+
+class ProfileVideoClip(VideoClip):
+    """Video-only clip of a file decoded at a profile's size and frame rate (drop-in for VideoFileClip(path, audio=False))."""
+
+    def __init__(self, filename: str, profile: dict):
+        self.reader = ProfileVideoReader(filename, profile)
+        self.filename = filename
+        VideoClip.__init__(self, make_frame=lambda t: self.reader.get_frame(t), duration=self.reader.duration)
+        self.fps = self.reader.fps
+        self.size = self.reader.size
+
+    def close(self):
+        if self.reader:
+            self.reader.close()
+            self.reader = None
+
+
+if __name__ == '__main__':
+    print("--- Testing Output Profiles ---")
+    test_style = {'fontsize': 64, 'stroke_width': 3}
+    for test_name in OUTPUT_PROFILES:
+        test_profile = get_output_profile(test_name)
+        print(f"{test_name}: {decode_filter(test_profile)} | subtitles x{subtitle_scale(test_profile):.2f} -> {scale_subtitle_style(test_style, test_profile)}, "
+              f"lines up to {subtitle_box_width_ratio(test_profile):.0%} of the width")
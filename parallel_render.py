@@ -0,0 +1,205 @@
+# parallel_render.py
+import os
+import math
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from moviepy.editor import AudioFileClip
+import pysrt
+import video_processor
+import template_index
+import output_profiles
+import ffmpeg_tools
+import frame_readahead
+
+# Segmented rendering: the timeline is split into chunks that start on a background keyframe, each chunk
+# is composited and encoded by its own worker process, and the chunks are joined with stream copy.
+DEFAULT_CHUNK_COUNT = 0 # 0 = one chunk per CPU core
+MIN_CHUNK_SECONDS = 2.0 # Shorter chunks spend more time starting a worker than they save
+
+
+def _background_keyframes(video_info: dict, target_duration: float) -> list[float]:
+    """Keyframe times of the background once it has been looped to target_duration."""
+    keyframes = video_info.get('keyframes') or [0.0]
+    template_duration = video_info.get('duration') or 0.0
+    if template_duration <= 0:
+        return keyframes
+    repeated = []
+    for copy_index in range(int(math.ceil(target_duration / template_duration)) + 1):
+        repeated += [copy_index * template_duration + kf for kf in keyframes]
+    return [t for t in repeated if t < target_duration]
+
+def plan_chunk_boundaries(total_frames: int, fps: float, chunk_count: int, keyframe_times: list[float]) -> list[int]:
+    """
+    Returns frame indices [0, b1, ..., total_frames] splitting the render into at most chunk_count pieces.
+    Each inner boundary is moved to the background keyframe nearest to the even split, so a worker's first
+    decode is a cheap seek to a keyframe. Boundaries that collapse onto each other are merged.
+    """
+    keyframe_frames = sorted({int(round(t * fps)) for t in keyframe_times if 0 < t * fps < total_frames})
+    boundaries = [0]
+    for chunk_index in range(1, chunk_count):
+        ideal_frame = total_frames * chunk_index / chunk_count
+        boundary = min(keyframe_frames, key=lambda f: abs(f - ideal_frame)) if keyframe_frames else int(round(ideal_frame))
+        if boundaries[-1] < boundary < total_frames:
+            boundaries.append(boundary)
+    boundaries.append(total_frames)
+    return boundaries
+
+def _render_chunk(job: dict) -> dict:
+    """Worker process: composites and encodes frames [start_frame, end_frame) of the render into job['output_path']."""
+    chunk_start_time = time.perf_counter()
+    video_processor.SUBTITLE_TEXT_ENGINE = job['subtitle_text_engine'] # Module settings are not inherited by spawned workers
+    fps = job['fps']
+    start_s, end_s = job['start_frame'] / fps, job['end_frame'] / fps
+    video_clip = None
+    read_ahead = None
+    try:
+        current_style, actual_pos_tuple = video_processor._resolve_subtitle_style(job['style_options'])
+        current_style = output_profiles.scale_subtitle_style(current_style, job['profile'])
+        video_clip = output_profiles.ProfileVideoClip(job['background_path'], job['profile'])
+        background_clip = video_processor._fit_clip_to_duration(video_clip, job['total_duration'])
+
+        # Only the cues that overlap this chunk are rasterized (or fetched from the shared cue cache)
+        chunk_subs = [
+            sub_item for sub_item in pysrt.open(job['srt_path'], encoding='utf-8')
+            if video_processor.srt_time_to_seconds(sub_item.end) > start_s and video_processor.srt_time_to_seconds(sub_item.start) < end_s
+        ]
+        compositor = video_processor._build_subtitle_compositor(chunk_subs, tuple(video_clip.size), current_style, actual_pos_tuple,
+                                                                output_profiles.subtitle_box_width_ratio(job['profile']))
+
+        encoder = ffmpeg_tools.FFmpegPipeEncoder(
+            job['output_path'], video_clip.size, fps, encoder_options=job['encoder_options'], log_prefix=f"Chunk {job['index']}"
+        )
+        get_background_frame = lambda frame_index: background_clip.get_frame(frame_index / fps)
+        if job['read_ahead_frames']:
+            read_ahead = frame_readahead.FrameReadAhead(background_clip.get_frame, fps, job['end_frame'], depth=job['read_ahead_frames'])
+            get_background_frame = read_ahead.get
+        encoder.open()
+        try:
+            for frame_index in range(job['start_frame'], job['end_frame']):
+                encoder.write_frame(compositor.composite_frame(get_background_frame(frame_index), frame_index / fps))
+        except Exception:
+            encoder.abort()
+            raise
+        success = encoder.close()
+    except Exception as e:
+        print(f"Chunk {job['index']} - Error: {e}")
+        traceback.print_exc()
+        success = False
+    finally:
+        if read_ahead is not None: read_ahead.close()
+        if video_clip is not None: video_clip.close()
+    return {
+        'index': job['index'], 'success': success,
+        'frames': job['end_frame'] - job['start_frame'],
+        'elapsed': time.perf_counter() - chunk_start_time,
+    }
+
+def render_final_video_parallel(
+    video_path: str,
+    audio_path: str,
+    srt_path: str,
+    output_path: str,
+    style_options: dict = None,
+    chunk_count: int = None,
+    encoder_options: dict = None,
+    compare_serial: bool = False,
+    output_profile=None
+) -> bool:
+    """
+    Same result as video_processor.render_final_video (compositor backend), rendered as chunk_count
+    keyframe-aligned chunks in a process pool. The narration is muxed once when the chunks are joined.
+    Every worker decodes straight to output_profile (default video_processor.OUTPUT_PROFILE).
+    Prints the speedup: chunk work time vs wall time, and with compare_serial also a timed serial render.
+    """
+    for label, path in (("Background video", video_path), ("Audio", audio_path), ("SRT file", srt_path)):
+        if not os.path.exists(path):
+            print(f"Error Parallel: {label} not found at '{path}'")
+            return False
+
+    cpu_count = os.cpu_count() or 1
+    chunk_count = chunk_count or DEFAULT_CHUNK_COUNT or cpu_count
+    profile = video_processor._resolve_output_profile(output_profile)
+    encoder_options = output_profiles.profile_encoder_options(profile, encoder_options)
+    scratch_dir = video_processor._create_scratch_dir(output_path)
+    render_start_time = time.perf_counter()
+    try:
+        with AudioFileClip(audio_path) as audio_clip:
+            narration_duration = audio_clip.duration
+
+        source_path = output_profiles.resolve_profile_source(video_path, profile, video_processor.TEMPLATE_MEZZANINE_ENABLED)
+        video_info = template_index.get_video_info(source_path)
+        if not video_info:
+            print(f"Error Parallel: Could not read video metadata of '{source_path}'.")
+            return False
+        fps = profile['fps']
+        total_frames = int(math.ceil(narration_duration * fps - 1e-6))
+
+        # Loop short templates once here (stream copy) so every worker opens the same ready-made background
+        background_path = source_path
+        if video_processor.STREAM_COPY_LOOP_ENABLED and narration_duration > video_info['duration'] + 0.05:
+            looped_path = os.path.join(scratch_dir, "looped_background.mkv")
+            if ffmpeg_tools.build_stream_copy_loop(source_path, narration_duration, looped_path, video_info['duration'], keyframe_times=video_info['keyframes'] or None):
+                background_path = looped_path
+
+        chunk_count = max(1, min(chunk_count, int(narration_duration // MIN_CHUNK_SECONDS) or 1))
+        boundaries = plan_chunk_boundaries(total_frames, fps, chunk_count, _background_keyframes(video_info, narration_duration))
+        worker_count = len(boundaries) - 1
+        chunk_encoder_options = dict(encoder_options or {})
+        chunk_encoder_options['threads'] = max(1, cpu_count // worker_count) # Workers share the cores instead of oversubscribing them
+
+        jobs = [{
+            'index': i, 'background_path': background_path, 'srt_path': srt_path, 'style_options': style_options,
+            'subtitle_text_engine': video_processor.SUBTITLE_TEXT_ENGINE,
+            'read_ahead_frames': video_processor.DECODE_READ_AHEAD_FRAMES,
+            'profile': profile, 'fps': fps, 'total_duration': narration_duration,
+            'start_frame': boundaries[i], 'end_frame': boundaries[i + 1],
+            'output_path': os.path.join(scratch_dir, f"chunk_{i:03d}.mp4"),
+            'encoder_options': chunk_encoder_options,
+        } for i in range(worker_count)]
+        print(f"Parallel - Rendering {total_frames} frames as {worker_count} chunks (boundaries at frames {boundaries[1:-1]}).")
+
+        results = []
+        with ProcessPoolExecutor(max_workers=worker_count) as executor:
+            futures = [executor.submit(_render_chunk, job) for job in jobs]
+            for future in as_completed(futures):
+                results.append(future.result())
+        failed = [r['index'] for r in results if not r['success']]
+        if failed:
+            print(f"Error Parallel: Chunks {sorted(failed)} failed.")
+            return False
+
+        if not ffmpeg_tools.concat_video_chunks([job['output_path'] for job in jobs], output_path, audio_path=audio_path,
+                                                duration=narration_duration, encoder_options=encoder_options):
+            print("Error Parallel: Could not join the rendered chunks.")
+            return False
+
+        wall_time = time.perf_counter() - render_start_time
+        chunk_time = sum(r['elapsed'] for r in results)
+        print(f"Parallel - {total_frames} frames in {wall_time:.1f}s ({total_frames / wall_time:.1f} fps) with {worker_count} workers; "
+              f"{chunk_time:.1f}s of chunk work ran {chunk_time / wall_time:.2f}x concurrently.")
+
+        if compare_serial:
+            serial_output = os.path.join(scratch_dir, "serial_reference.mp4")
+            serial_start_time = time.perf_counter()
+            if video_processor.render_final_video(video_path, audio_path, srt_path, serial_output, style_options=style_options,
+                                                  encoder_backend="ffmpeg_pipe", encoder_options=encoder_options,
+                                                  burn_backend="compositor", parallel_chunks=1, output_profile=profile):
+                serial_time = time.perf_counter() - serial_start_time
+                print(f"Parallel - Serial render took {serial_time:.1f}s -> speedup {serial_time / wall_time:.2f}x")
+        return True
+
+    except Exception as e:
+        print(f"Error Parallel - An error occurred during the segmented render: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        video_processor._remove_scratch_dir(scratch_dir)
+
+
+if __name__ == '__main__':
+    print("--- Testing Chunk Planning ---")
+    test_fps, test_total_frames = 30, 30 * 95
+    test_keyframes = _background_keyframes({'duration': 20.0, 'keyframes': [0.0, 4.0, 8.0, 12.0, 16.0]}, test_total_frames / test_fps)
+    for test_chunk_count in (1, 4, 8):
+        print(f"{test_chunk_count} chunks -> {plan_chunk_boundaries(test_total_frames, test_fps, test_chunk_count, test_keyframes)}")
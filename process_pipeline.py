@@ -0,0 +1,281 @@
+# process_pipeline.py
+import os
+import math
+import time
+import queue
+import traceback
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from moviepy.editor import AudioFileClip
+import pysrt
+import video_processor
+import output_profiles
+import ffmpeg_tools
+
+# Multi-process render: a decoder, one or more compositors and an encoder each run in their own process and
+# hand frames over through a ring of shared-memory slots. Only (frame index, slot index) pairs travel over
+# the queues, so no frame is pickled or copied between processes and compositing is not bound by one GIL.
+PIPELINE_RING_SLOTS = 12 # Frames in flight across all stages; each slot is one output frame of shared memory
+PIPELINE_COMPOSITOR_WORKERS = 1 # Compositor processes; more only help when compositing is the bottleneck
+QUEUE_POLL_S = 0.5 # Blocked stages re-check the abort flag this often
+
+
+class PipelineAborted(Exception):
+    """Raised inside a stage when another stage has failed."""
+
+
+class _StageClock:
+    """Accumulates the time a stage spends working and the time it spends blocked on its input queue."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.frames = 0
+        self.busy_s = 0.0
+        self.wait_s = 0.0
+        self._start_time = time.perf_counter()
+
+    def stats(self, success: bool) -> dict:
+        wall_s = time.perf_counter() - self._start_time
+        return {
+            'stage': self.name, 'success': success, 'frames': self.frames,
+            'busy_s': self.busy_s, 'wait_s': self.wait_s, 'wall_s': wall_s,
+            'utilization': self.busy_s / wall_s if wall_s > 0 else 0.0,
+        }
+
+
+def _slot_views(shm: shared_memory.SharedMemory, slot_count: int, frame_shape: tuple) -> list[np.ndarray]:
+    frame_bytes = int(np.prod(frame_shape))
+    return [np.ndarray(frame_shape, dtype=np.uint8, buffer=shm.buf, offset=i * frame_bytes) for i in range(slot_count)]
+
+def _get(source_queue, abort_event, clock: _StageClock):
+    """Blocking queue get that gives up once another stage has failed. Time spent here counts as waiting."""
+    wait_start = time.perf_counter()
+    try:
+        while True:
+            try:
+                return source_queue.get(timeout=QUEUE_POLL_S)
+            except queue.Empty:
+                if abort_event.is_set():
+                    raise PipelineAborted()
+    finally:
+        clock.wait_s += time.perf_counter() - wait_start
+
+def _decode_stage(job: dict, slots: list, queues: dict, abort_event, clock: _StageClock):
+    """Decodes the fitted background into free slots, in frame order."""
+    fps = job['profile']['fps']
+    video_clip, background_clip = video_processor._open_background_clip(
+        job['video_path'], job['duration'], job['scratch_dir'], audio=False, profile=job['profile']
+    )
+    try:
+        for frame_index in range(job['total_frames']):
+            slot_index = _get(queues['free'], abort_event, clock)
+            work_start = time.perf_counter()
+            np.copyto(slots[slot_index], background_clip.get_frame(frame_index / fps), casting='unsafe')
+            clock.busy_s += time.perf_counter() - work_start
+            clock.frames += 1
+            queues['decoded'].put((frame_index, slot_index))
+    finally:
+        video_clip.close()
+        if background_clip != video_clip: background_clip.close()
+    for _ in range(job['compositor_workers']):
+        queues['decoded'].put(None) # One end marker per compositor
+
+def _composite_stage(job: dict, slots: list, queues: dict, abort_event, clock: _StageClock):
+    """Blends the subtitle cues into decoded slots in place."""
+    fps = job['profile']['fps']
+    current_style, actual_pos_tuple = video_processor._resolve_subtitle_style(job['style_options'])
+    current_style = output_profiles.scale_subtitle_style(current_style, job['profile'])
+    subs = pysrt.open(job['srt_path'], encoding='utf-8')
+    compositor = video_processor._build_subtitle_compositor(subs, output_profiles.profile_size(job['profile']), current_style, actual_pos_tuple,
+                                                        output_profiles.subtitle_box_width_ratio(job['profile']))
+    while True:
+        item = _get(queues['decoded'], abort_event, clock)
+        if item is None:
+            break
+        frame_index, slot_index = item
+        work_start = time.perf_counter()
+        compositor.composite_in_place(slots[slot_index], frame_index / fps)
+        clock.busy_s += time.perf_counter() - work_start
+        clock.frames += 1
+        queues['composited'].put(item)
+    queues['composited'].put(None)
+
+def _encode_stage(job: dict, slots: list, queues: dict, abort_event, clock: _StageClock):
+    """Writes composited slots to ffmpeg in frame order (compositors may finish out of order) and frees them."""
+    encoder = ffmpeg_tools.FFmpegPipeEncoder(
+        job['output_path'], output_profiles.profile_size(job['profile']), job['profile']['fps'],
+        audio_path=job['audio_track_path'], encoder_options=dict(job['encoder_options'], audio_codec='copy'), log_prefix="Pipeline"
+    )
+    encoder.open()
+    try:
+        pending = {} # Frame index -> slot index, for frames that arrived early
+        next_index = 0
+        finished_compositors = 0
+        while next_index < job['total_frames']:
+            item = _get(queues['composited'], abort_event, clock)
+            if item is None:
+                finished_compositors += 1
+                if finished_compositors == job['compositor_workers'] and next_index not in pending:
+                    raise Exception(f"Compositors finished after {next_index} of {job['total_frames']} frames.")
+                continue
+            pending[item[0]] = item[1]
+            while next_index in pending:
+                slot_index = pending.pop(next_index)
+                work_start = time.perf_counter()
+                encoder.write_frame(slots[slot_index])
+                clock.busy_s += time.perf_counter() - work_start
+                clock.frames += 1
+                queues['free'].put(slot_index)
+                next_index += 1
+    except Exception:
+        encoder.abort()
+        raise
+    if not encoder.close():
+        raise Exception("ffmpeg failed to encode the pipeline output.")
+
+PIPELINE_STAGES = {'decode': _decode_stage, 'composite': _composite_stage, 'encode': _encode_stage}
+
+def _run_stage(stage: str, stage_name: str, job: dict, shm_name: str, queues: dict, abort_event, stats_queue):
+    """Process entry point: attaches to the shared slots, runs one stage and reports its timing."""
+    # Module settings are not inherited by spawned processes
+    video_processor.SUBTITLE_TEXT_ENGINE = job['settings']['subtitle_text_engine']
+    video_processor.TEMPLATE_MEZZANINE_ENABLED = job['settings']['mezzanine_enabled']
+    video_processor.STREAM_COPY_LOOP_ENABLED = job['settings']['stream_copy_loop_enabled']
+    clock = _StageClock(stage_name)
+    success = False
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        slots = _slot_views(shm, job['slot_count'], job['frame_shape'])
+        PIPELINE_STAGES[stage](job, slots, queues, abort_event, clock)
+        success = True
+    except PipelineAborted:
+        pass
+    except Exception as e:
+        print(f"Pipeline - {stage_name} failed: {e}")
+        traceback.print_exc()
+        abort_event.set()
+    finally:
+        slots = None
+        try: shm.close()
+        except BufferError: pass # A traceback still references a slot view; the mapping goes away with the process
+        stats_queue.put(clock.stats(success))
+
+def _print_utilization(stage_stats: list[dict], total_frames: int, wall_s: float):
+    busiest = max(stage_stats, key=lambda s: s['utilization'])
+    stage_summary = ", ".join(f"{s['stage']} {s['utilization'] * 100:.0f}% busy ({s['wait_s']:.1f}s waiting)" for s in stage_stats)
+    print(f"Pipeline - {total_frames} frames in {wall_s:.1f}s ({total_frames / wall_s:.1f} fps). {stage_summary}. Bottleneck: {busiest['stage']}")
+
+def render_final_video_pipelined(
+    video_path: str,
+    audio_path: str,
+    srt_path: str,
+    output_path: str,
+    style_options: dict = None,
+    encoder_options: dict = None,
+    output_profile=None,
+    compositor_workers: int = None,
+    ring_slots: int = None
+) -> bool:
+    """
+    Same result as video_processor.render_final_video (compositor backend, ffmpeg_pipe encoder), with decode,
+    compositing and encode in separate processes sharing ring_slots (default PIPELINE_RING_SLOTS) frame slots.
+    compositor_workers (default PIPELINE_COMPOSITOR_WORKERS) compositor processes share the compositing.
+    Prints each stage's utilization; the busiest stage is the bottleneck.
+    """
+    for label, path in (("Background video", video_path), ("Audio", audio_path), ("SRT file", srt_path)):
+        if not os.path.exists(path):
+            print(f"Error Pipeline: {label} not found at '{path}'")
+            return False
+
+    compositor_workers = max(1, compositor_workers or PIPELINE_COMPOSITOR_WORKERS)
+    slot_count = max(ring_slots or PIPELINE_RING_SLOTS, compositor_workers + 2) # Room for reordering behind the encoder
+    profile = video_processor._resolve_output_profile(output_profile)
+    encoder_options = output_profiles.profile_encoder_options(profile, encoder_options)
+    width, height = output_profiles.profile_size(profile)
+    frame_shape = (height, width, 3)
+    scratch_dir = video_processor._create_scratch_dir(output_path)
+    shm = None
+    processes = []
+    render_start_time = time.perf_counter()
+    try:
+        with AudioFileClip(audio_path) as audio_clip:
+            narration_duration = audio_clip.duration
+        audio_track_path = video_processor._prepare_audio_track(audio_path, scratch_dir, encoder_options)
+        if audio_track_path is None:
+            print("Error Pipeline: Encoding the narration audio failed.")
+            return False
+        total_frames = int(math.ceil(narration_duration * profile['fps'] - 1e-6))
+
+        shm = shared_memory.SharedMemory(create=True, size=slot_count * int(np.prod(frame_shape)))
+        spawn_context = multiprocessing.get_context("spawn")
+        queues = {'free': spawn_context.Queue(), 'decoded': spawn_context.Queue(), 'composited': spawn_context.Queue()}
+        for slot_index in range(slot_count):
+            queues['free'].put(slot_index)
+        abort_event = spawn_context.Event()
+        stats_queue = spawn_context.Queue()
+        job = {
+            'video_path': video_path, 'srt_path': srt_path, 'output_path': output_path, 'scratch_dir': scratch_dir,
+            'audio_track_path': audio_track_path, 'style_options': style_options, 'encoder_options': encoder_options,
+            'profile': profile, 'duration': narration_duration, 'total_frames': total_frames,
+            'slot_count': slot_count, 'frame_shape': frame_shape, 'compositor_workers': compositor_workers,
+            'settings': {
+                'subtitle_text_engine': video_processor.SUBTITLE_TEXT_ENGINE,
+                'mezzanine_enabled': video_processor.TEMPLATE_MEZZANINE_ENABLED,
+                'stream_copy_loop_enabled': video_processor.STREAM_COPY_LOOP_ENABLED,
+            },
+        }
+        stages = [('decode', 'decode')] + [('composite', f"composite[{i}]") for i in range(compositor_workers)] + [('encode', 'encode')]
+        for stage, stage_name in stages:
+            process = spawn_context.Process(target=_run_stage, args=(stage, stage_name, job, shm.name, queues, abort_event, stats_queue), daemon=True)
+            process.start()
+            processes.append(process)
+        print(f"Pipeline - Rendering {total_frames} frames through {len(processes)} processes and {slot_count} shared frame slots.")
+
+        stage_stats = []
+        while len(stage_stats) < len(processes):
+            try:
+                stage_stats.append(stats_queue.get(timeout=QUEUE_POLL_S))
+            except queue.Empty:
+                if not any(p.is_alive() for p in processes) and stats_queue.empty():
+                    print("Error Pipeline: A stage process exited without reporting.")
+                    break
+        for process in processes:
+            process.join()
+
+        if len(stage_stats) < len(processes) or not all(s['success'] for s in stage_stats):
+            failed = [s['stage'] for s in stage_stats if not s['success']]
+            print(f"Error Pipeline: Render failed (stages without success: {failed or 'unknown'}).")
+            return False
+        stage_order = [stage_name for _, stage_name in stages]
+        stage_stats.sort(key=lambda s: stage_order.index(s['stage']))
+        _print_utilization(stage_stats, total_frames, time.perf_counter() - render_start_time)
+        return True
+
+    except Exception as e:
+        print(f"Error Pipeline - An error occurred during the pipelined render: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        for process in processes:
+            if process.is_alive(): process.terminate()
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+        video_processor._remove_scratch_dir(scratch_dir)
+
+
+if __name__ == '__main__':
+    print("--- Testing Shared Frame Slots ---")
+    test_shm = shared_memory.SharedMemory(create=True, size=4 * 1920 * 1080 * 3)
+    try:
+        test_slots = _slot_views(test_shm, 4, (1920, 1080, 3))
+        test_slots[2][:] = 7
+        test_attached = shared_memory.SharedMemory(name=test_shm.name)
+        test_attached_slots = _slot_views(test_attached, 4, (1920, 1080, 3))
+        print(f"Slot 2 seen through a second mapping: {test_attached_slots[2][100, 100]}, slot 1: {test_attached_slots[1][100, 100]}")
+        test_slots = test_attached_slots = None
+        test_attached.close()
+    finally:
+        test_shm.close()
+        test_shm.unlink()
@@ -0,0 +1,320 @@
+# render_benchmark.py
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import traceback
+import tracemalloc
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pysrt
+from moviepy.editor import ImageClip, CompositeVideoClip
+import ffmpeg_tools
+import video_processor
+import subtitle_compositor
+import template_ingest
+
+# Offline render benchmark: synthetic testsrc templates, tone narrations and SRTs of tunable cue density are
+# generated with ffmpeg, then each render path runs in a fresh process so its peak RSS can be reported.
+# --blend instead times only the subtitle blend (MoviePy CompositeVideoClip vs SubtitleCompositor) in memory.
+BENCHMARK_WORK_DIR = "benchmark_work" # Synthetic inputs (reused between runs) and outputs
+BENCHMARK_RESOLUTIONS = {'540p': (540, 960), '720p': (720, 1280), '1080p': (1080, 1920)}
+BENCHMARK_DEFAULT_RESOLUTIONS = ('540p', '1080p')
+BENCHMARK_DEFAULT_DURATIONS = (10.0, 30.0) # Narration length in seconds
+BENCHMARK_DEFAULT_CUE_DENSITIES = (1.0, 3.0) # Subtitle cues per second (3.0 is roughly one word per cue)
+BENCHMARK_TEMPLATE_DURATION = 8.0 # Shorter than the narrations, so the looping path is measured too
+BENCHMARK_FPS = 30
+BENCHMARK_BLEND_FRAMES = 300 # Frames blended per path by the --blend microbenchmark
+BENCHMARK_SAMPLE_WORDS = "so my roommate decided to repaint the whole kitchen without asking anyone first".split()
+
+
+def _generate_lavfi(source: str, output_path: str, output_args: list[str]) -> bool:
+    if os.path.exists(output_path):
+        return True
+    temp_path = f"{output_path}.tmp{os.path.splitext(output_path)[1]}"
+    if not ffmpeg_tools.run_ffmpeg(['-f', 'lavfi', '-i', source] + output_args + [temp_path], log_prefix="Benchmark"):
+        return False
+    os.replace(temp_path, output_path)
+    return True
+
+def make_synthetic_template(output_path: str, size: tuple, duration: float, fps: int = BENCHMARK_FPS) -> bool:
+    """Writes a testsrc video (H.264, one keyframe per second, no audio) like a typical uploaded template."""
+    width, height = size
+    return _generate_lavfi(
+        f"testsrc=size={width}x{height}:rate={fps}:duration={duration:g}", output_path,
+        ['-c:v', 'libx264', '-preset', 'veryfast', '-pix_fmt', 'yuv420p', '-g', str(fps)]
+    )
+
+def make_synthetic_narration(output_path: str, duration: float, sample_rate: int = 24000) -> bool:
+    """Writes a mono 16-bit tone WAV at the TTS sample rate."""
+    return _generate_lavfi(
+        f"sine=frequency=220:sample_rate={sample_rate}:duration={duration:g}", output_path,
+        ['-c:a', 'pcm_s16le', '-ac', '1']
+    )
+
+def make_synthetic_srt(output_path: str, duration: float, cues_per_second: float) -> bool:
+    """Writes back-to-back cues of one to four words covering duration."""
+    if os.path.exists(output_path):
+        return True
+    cue_count = max(1, int(duration * cues_per_second))
+    cue_length_ms = int(duration * 1000 / cue_count)
+    words_per_cue = max(1, min(4, int(round(3.0 / cues_per_second))))
+    subs = pysrt.SubRipFile()
+    for cue_index in range(cue_count):
+        first_word = (cue_index * words_per_cue) % len(BENCHMARK_SAMPLE_WORDS)
+        text = " ".join(BENCHMARK_SAMPLE_WORDS[(first_word + i) % len(BENCHMARK_SAMPLE_WORDS)] for i in range(words_per_cue))
+        subs.append(pysrt.SubRipItem(
+            cue_index + 1,
+            start=pysrt.SubRipTime(milliseconds=cue_index * cue_length_ms),
+            end=pysrt.SubRipTime(milliseconds=(cue_index + 1) * cue_length_ms),
+            text=text
+        ))
+    subs.save(output_path, encoding='utf-8')
+    return True
+
+
+# Render paths. Each gets the scenario inputs and an output path and returns True on success;
+# "setup" (optional) runs untimed in the parent first, e.g. to produce the input of a later stage.
+def _case_narrated(inputs, output_path, encoder_options):
+    return video_processor.create_narrated_video(inputs['template'], inputs['audio'], output_path, encoder_options=encoder_options)
+
+def _setup_burn(inputs, encoder_options):
+    narrated_path = os.path.join(inputs['scenario_dir'], "narrated_input.mp4")
+    if os.path.exists(narrated_path):
+        return True
+    return video_processor.create_narrated_video(inputs['template'], inputs['audio'], narrated_path,
+                                                 encoder_backend="ffmpeg_pipe", encoder_options={'preset': 'ultrafast'})
+
+def _case_burn(inputs, output_path, encoder_options):
+    narrated_path = os.path.join(inputs['scenario_dir'], "narrated_input.mp4")
+    return video_processor.burn_subtitles_on_video(narrated_path, inputs['srt'], output_path, encoder_options=encoder_options,
+                                                   burn_backend="compositor")
+
+def _case_burn_libass(inputs, output_path, encoder_options):
+    narrated_path = os.path.join(inputs['scenario_dir'], "narrated_input.mp4")
+    return video_processor.burn_subtitles_on_video(narrated_path, inputs['srt'], output_path, encoder_options=encoder_options,
+                                                   burn_backend="libass")
+
+def _case_render(inputs, output_path, encoder_options):
+    return video_processor.render_final_video(inputs['template'], inputs['audio'], inputs['srt'], output_path,
+                                              encoder_options=encoder_options, burn_backend="compositor", parallel_chunks=1, render_pipeline="inline")
+
+def _case_render_libass(inputs, output_path, encoder_options):
+    return video_processor.render_final_video(inputs['template'], inputs['audio'], inputs['srt'], output_path,
+                                              encoder_options=encoder_options, burn_backend="libass")
+
+def _case_render_pipeline(inputs, output_path, encoder_options):
+    return video_processor.render_final_video(inputs['template'], inputs['audio'], inputs['srt'], output_path,
+                                              encoder_options=encoder_options, burn_backend="compositor", parallel_chunks=1, render_pipeline="processes")
+
+def _case_render_parallel(inputs, output_path, encoder_options):
+    return video_processor.render_final_video(inputs['template'], inputs['audio'], inputs['srt'], output_path,
+                                              encoder_options=encoder_options, burn_backend="compositor", parallel_chunks=0)
+
+BENCHMARK_CASES = {
+    'narrated': {'run': _case_narrated},
+    'burn': {'run': _case_burn, 'setup': _setup_burn},
+    'burn_libass': {'run': _case_burn_libass, 'setup': _setup_burn},
+    'render': {'run': _case_render},
+    'render_libass': {'run': _case_render_libass},
+    'render_parallel': {'run': _case_render_parallel},
+    'render_pipeline': {'run': _case_render_pipeline},
+}
+BENCHMARK_DEFAULT_CASES = ('narrated', 'burn', 'render', 'render_libass')
+
+
+def _peak_rss_mb() -> tuple[float | None, float | None]:
+    """Peak resident set size of this process and of its finished child processes (ffmpeg, workers), in MB."""
+    try:
+        import resource
+        bytes_per_unit = 1 if sys.platform == "darwin" else 1024 # ru_maxrss is bytes on macOS, KiB on Linux
+        return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * bytes_per_unit / (1024 * 1024),
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * bytes_per_unit / (1024 * 1024))
+    except ImportError:
+        pass
+    try:
+        import psutil # Windows: no resource module, the peak working set is the closest equivalent
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024), None
+    except Exception:
+        return None, None
+
+def _run_case_worker(case_name: str, inputs: dict, output_path: str, settings: dict) -> dict:
+    """Runs one case in a fresh worker process (module settings are applied here, spawned workers do not inherit them)."""
+    video_processor.SUBTITLE_TEXT_ENGINE = settings['subtitle_text_engine']
+    video_processor.VIDEO_ENCODER_BACKEND = settings['encoder_backend']
+    video_processor.TEMPLATE_MEZZANINE_ENABLED = settings['mezzanine_enabled']
+    video_processor.DECODE_READ_AHEAD_FRAMES = settings['read_ahead_frames']
+    start_time = time.perf_counter()
+    try:
+        success = bool(BENCHMARK_CASES[case_name]['run'](inputs, output_path, settings['encoder_options']))
+    except Exception as e:
+        print(f"Benchmark - {case_name} raised: {e}")
+        traceback.print_exc()
+        success = False
+    elapsed = time.perf_counter() - start_time
+    peak_rss_mb, peak_child_rss_mb = _peak_rss_mb()
+    return {'success': success, 'elapsed_s': elapsed, 'peak_rss_mb': peak_rss_mb, 'peak_child_rss_mb': peak_child_rss_mb}
+
+def prepare_scenario(work_dir: str, resolution: str, duration: float, cues_per_second: float) -> dict | None:
+    """Generates (or reuses) the synthetic inputs of one scenario. Returns their paths, or None on failure."""
+    size = BENCHMARK_RESOLUTIONS[resolution]
+    scenario_dir = os.path.join(work_dir, f"{resolution}_{duration:g}s_{cues_per_second:g}cps")
+    os.makedirs(scenario_dir, exist_ok=True)
+    inputs = {
+        'scenario_dir': scenario_dir,
+        'template': os.path.join(work_dir, "templates", f"testsrc_{resolution}.mp4"),
+        'audio': os.path.join(work_dir, f"narration_{duration:g}s.wav"),
+        'srt': os.path.join(scenario_dir, "subtitles.srt"),
+    }
+    os.makedirs(os.path.dirname(inputs['template']), exist_ok=True)
+    if not (make_synthetic_template(inputs['template'], size, BENCHMARK_TEMPLATE_DURATION)
+            and make_synthetic_narration(inputs['audio'], duration)
+            and make_synthetic_srt(inputs['srt'], duration, cues_per_second)):
+        print(f"Benchmark - Could not generate the inputs of scenario {scenario_dir}.")
+        return None
+    return inputs
+
+def run_benchmarks(
+    cases: list[str] = None,
+    resolutions: list[str] = None,
+    durations: list[float] = None,
+    cue_densities: list[float] = None,
+    encoder_options: dict = None,
+    work_dir: str = BENCHMARK_WORK_DIR,
+    keep_outputs: bool = False
+) -> dict:
+    """Runs every case on every scenario and returns the report (see the __main__ block for the JSON layout)."""
+    cases = list(cases or BENCHMARK_DEFAULT_CASES)
+    settings = {
+        'subtitle_text_engine': video_processor.SUBTITLE_TEXT_ENGINE,
+        'encoder_backend': video_processor.VIDEO_ENCODER_BACKEND,
+        'mezzanine_enabled': video_processor.TEMPLATE_MEZZANINE_ENABLED,
+        'read_ahead_frames': video_processor.DECODE_READ_AHEAD_FRAMES,
+        'encoder_options': encoder_options or {},
+    }
+    report = {
+        'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'machine': {'platform': platform.platform(), 'python': platform.python_version(), 'cpu_count': os.cpu_count()},
+        'settings': settings,
+        'results': [],
+    }
+    spawn_context = multiprocessing.get_context("spawn")
+    for resolution in resolutions or BENCHMARK_DEFAULT_RESOLUTIONS:
+        for duration in durations or BENCHMARK_DEFAULT_DURATIONS:
+            for cues_per_second in cue_densities or BENCHMARK_DEFAULT_CUE_DENSITIES:
+                inputs = prepare_scenario(work_dir, resolution, duration, cues_per_second)
+                if inputs is None:
+                    continue
+                if settings['mezzanine_enabled'] and not template_ingest.ingest_template(inputs['template']):
+                    # Untimed: otherwise the first case that decodes the template would also time its transcode
+                    print(f"Benchmark - Could not ingest {inputs['template']}, cases decode the original.")
+                for case_name in cases:
+                    setup = BENCHMARK_CASES[case_name].get('setup')
+                    if setup and not setup(inputs, encoder_options):
+                        print(f"Benchmark - Setup of {case_name} failed, skipping.")
+                        continue
+                    output_path = os.path.join(inputs['scenario_dir'], f"{case_name}.mp4")
+                    print(f"Benchmark - {case_name} @ {resolution}, {duration:g}s, {cues_per_second:g} cues/s...")
+                    with ProcessPoolExecutor(max_workers=1, mp_context=spawn_context) as executor: # Fresh process per case: clean peak RSS
+                        measurement = executor.submit(_run_case_worker, case_name, inputs, output_path, settings).result()
+                    frames = int(round(duration * BENCHMARK_FPS))
+                    elapsed = measurement['elapsed_s']
+                    result = {
+                        'case': case_name, 'resolution': resolution, 'width': BENCHMARK_RESOLUTIONS[resolution][0],
+                        'height': BENCHMARK_RESOLUTIONS[resolution][1], 'duration_s': duration, 'cues_per_second': cues_per_second,
+                        'frames': frames,
+                        'fps': frames / elapsed if measurement['success'] and elapsed > 0 else None,
+                        'realtime_factor': duration / elapsed if measurement['success'] and elapsed > 0 else None, # >1 is faster than realtime
+                        **measurement,
+                    }
+                    report['results'].append(result)
+                    if not keep_outputs and os.path.exists(output_path):
+                        os.remove(output_path)
+    return report
+
+def benchmark_subtitle_blend(resolutions: list[str] = None, frame_count: int = BENCHMARK_BLEND_FRAMES) -> dict:
+    """
+    Microbenchmark of burning one subtitle cue into a frame: CompositeVideoClip with a masked ImageClip
+    versus SubtitleCompositor. Reports fps, bytes allocated per frame (tracemalloc) and the largest pixel difference.
+    """
+    report = {'frames': frame_count, 'subtitle_text_engine': video_processor.SUBTITLE_TEXT_ENGINE, 'results': []}
+    for resolution in resolutions or BENCHMARK_DEFAULT_RESOLUTIONS:
+        frame_w, frame_h = BENCHMARK_RESOLUTIONS[resolution]
+        current_style, actual_pos_tuple = video_processor._resolve_subtitle_style(None)
+        cue_rgba = video_processor.render_subtitle_bitmap(" ".join(BENCHMARK_SAMPLE_WORDS[:4]), current_style, int(frame_w * 0.90))
+        position = subtitle_compositor.resolve_cue_position(actual_pos_tuple, (cue_rgba.shape[1], cue_rgba.shape[0]), (frame_w, frame_h))
+        background = np.random.default_rng(0).integers(0, 256, (frame_h, frame_w, 3), dtype=np.uint8)
+        duration = frame_count / BENCHMARK_FPS
+
+        cue_clip = (ImageClip(cue_rgba[:, :, :3]).set_mask(ImageClip(cue_rgba[:, :, 3] / 255.0, ismask=True))
+                    .set_position(position).set_duration(duration))
+        moviepy_clip = CompositeVideoClip([ImageClip(background).set_duration(duration), cue_clip], size=(frame_w, frame_h))
+        compositor = subtitle_compositor.SubtitleCompositor((frame_w, frame_h))
+        compositor.add_cue(0.0, duration, cue_rgba, position)
+        blend_paths = {
+            'compositevideoclip': moviepy_clip.get_frame,
+            'subtitle_compositor': lambda t: compositor.composite_frame(background, t),
+        }
+
+        reference_frame = None
+        for path_name, get_frame in blend_paths.items():
+            get_frame(0.0) # Warm-up: first-call setup is not part of the per-frame cost
+            tracemalloc.start()
+            start_time = time.perf_counter()
+            for frame_index in range(frame_count):
+                frame = get_frame(frame_index / BENCHMARK_FPS)
+            elapsed = time.perf_counter() - start_time
+            _, traced_peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            frame = np.asarray(frame, dtype=np.uint8)
+            if reference_frame is None:
+                reference_frame = frame.copy()
+            report['results'].append({
+                'path': path_name, 'resolution': resolution, 'width': frame_w, 'height': frame_h,
+                'cue_size': [int(cue_rgba.shape[1]), int(cue_rgba.shape[0])],
+                'fps': frame_count / elapsed, 'ms_per_frame': elapsed * 1000 / frame_count,
+                'peak_traced_kb': traced_peak / 1024,
+                'max_pixel_difference': int(np.abs(frame.astype(np.int16) - reference_frame).max()),
+            })
+        moviepy_clip.close()
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmarks the render paths on synthetic inputs and prints a JSON report.")
+    parser.add_argument("--cases", nargs="+", choices=sorted(BENCHMARK_CASES), default=list(BENCHMARK_DEFAULT_CASES))
+    parser.add_argument("--resolutions", nargs="+", choices=sorted(BENCHMARK_RESOLUTIONS), default=list(BENCHMARK_DEFAULT_RESOLUTIONS))
+    parser.add_argument("--durations", nargs="+", type=float, default=list(BENCHMARK_DEFAULT_DURATIONS))
+    parser.add_argument("--cue-densities", nargs="+", type=float, default=list(BENCHMARK_DEFAULT_CUE_DENSITIES))
+    parser.add_argument("--preset", default=None, help="x264 preset for the measured encodes (default: the renderer's own)")
+    parser.add_argument("--text-engine", choices=video_processor.SUBTITLE_TEXT_ENGINES, default=video_processor.SUBTITLE_TEXT_ENGINE)
+    parser.add_argument("--encoder-backend", choices=video_processor.VIDEO_ENCODER_BACKENDS, default=video_processor.VIDEO_ENCODER_BACKEND)
+    parser.add_argument("--no-mezzanine", action="store_true", help="Decode the synthetic templates directly")
+    parser.add_argument("--read-ahead", type=int, default=video_processor.DECODE_READ_AHEAD_FRAMES, help="Decoder read-ahead depth in frames (0 decodes inline)")
+    parser.add_argument("--work-dir", default=BENCHMARK_WORK_DIR)
+    parser.add_argument("--output", default=None, help="Also write the JSON report to this file")
+    parser.add_argument("--keep-outputs", action="store_true")
+    parser.add_argument("--blend", action="store_true", help="Only run the in-memory subtitle blend microbenchmark")
+    parser.add_argument("--blend-frames", type=int, default=BENCHMARK_BLEND_FRAMES)
+    cli_args = parser.parse_args()
+
+    video_processor.SUBTITLE_TEXT_ENGINE = cli_args.text_engine
+    video_processor.VIDEO_ENCODER_BACKEND = cli_args.encoder_backend
+    video_processor.TEMPLATE_MEZZANINE_ENABLED = not cli_args.no_mezzanine
+    video_processor.DECODE_READ_AHEAD_FRAMES = cli_args.read_ahead
+    if cli_args.blend:
+        benchmark_report = benchmark_subtitle_blend(resolutions=cli_args.resolutions, frame_count=cli_args.blend_frames)
+    else:
+        benchmark_report = run_benchmarks(
+            cases=cli_args.cases, resolutions=cli_args.resolutions, durations=cli_args.durations,
+            cue_densities=cli_args.cue_densities, encoder_options={'preset': cli_args.preset} if cli_args.preset else None,
+            work_dir=cli_args.work_dir, keep_outputs=cli_args.keep_outputs
+        )
+    report_json = json.dumps(benchmark_report, indent=2)
+    print(report_json)
+    if cli_args.output:
+        with open(cli_args.output, "w", encoding="utf-8") as f:
+            f.write(report_json + "\n")
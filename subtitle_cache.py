@@ -0,0 +1,203 @@
+# subtitle_cache.py
+import os
+import json
+import hashlib
+import threading
+import traceback
+from collections import OrderedDict
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SUBTITLE_CACHE_DIR = os.path.join(SCRIPT_DIR, ".subtitle_cache") # On-disk tier for pre-rendered RGBA cue bitmaps (next to the app, not the CWD)
+CACHE_FORMAT_VERSION = 1 # Bump when the rasterizer output changes so stale bitmaps are not reused
+
+MEMORY_CACHE_MAX_ITEMS = 64 # In-memory LRU tier; renders rasterize cues on the fly, so repeats past this come from disk
+DISK_CACHE_MAX_BYTES = 512 * 1024 * 1024 # On-disk tier size cap (512 MB)
+
+# Style keys that change how a cue is rasterized. Timing and position do not, so they are not part of the key.
+STYLE_KEYS_FOR_CACHE = ('font', 'fontsize', 'color', 'stroke_color', 'stroke_width', 'bg_color', 'method', 'align')
+
+
+def make_cache_key(text: str, style: dict, box_width: int | None, engine: str = "imagemagick") -> str:
+    """Builds a content-addressed key for a cue bitmap from its text, resolved style and box width."""
+    key_payload = {
+        'v': CACHE_FORMAT_VERSION,
+        'engine': engine,
+        'text': text,
+        'width': box_width,
+        'style': {k: str(style.get(k)) for k in STYLE_KEYS_FOR_CACHE},
+    }
+    return hashlib.sha256(json.dumps(key_payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class SubtitleBitmapCache:
+    """Two-tier (memory LRU + size-capped disk) cache of RGBA uint8 subtitle bitmaps."""
+
+    def __init__(self, cache_dir: str | None = SUBTITLE_CACHE_DIR, max_memory_items: int = MEMORY_CACHE_MAX_ITEMS, max_disk_bytes: int = DISK_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_memory_items = max_memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._disk_bytes = None # Lazily computed on first disk write
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+        if self.cache_dir and not os.path.exists(self.cache_dir):
+            try: os.makedirs(self.cache_dir)
+            except OSError as e:
+                print(f"SubCache - Could not create cache directory {self.cache_dir}: {e}. Disk tier disabled.")
+                self.cache_dir = None
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+    def _remember(self, key: str, rgba: np.ndarray):
+        """Inserts into the memory tier, evicting the least recently used bitmap if full. Caller holds the lock."""
+        self._memory[key] = rgba
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            rgba = self._memory.get(key)
+            if rgba is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return rgba
+
+        if self.cache_dir:
+            disk_path = self._disk_path(key)
+            if os.path.exists(disk_path):
+                try:
+                    rgba = np.load(disk_path, allow_pickle=False)
+                    os.utime(disk_path) # Refresh mtime so disk eviction stays LRU
+                    with self._lock:
+                        self._remember(key, rgba)
+                        self.hits += 1
+                    return rgba
+                except Exception as e:
+                    print(f"SubCache - Corrupt cache entry {disk_path}, discarding: {e}")
+                    try: os.remove(disk_path)
+                    except OSError: pass
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, rgba: np.ndarray, use_disk: bool = True):
+        rgba = np.ascontiguousarray(rgba, dtype=np.uint8)
+        rgba.setflags(write=False) # Bitmaps are shared between renders, nobody may modify them in place
+        with self._lock:
+            self._remember(key, rgba)
+
+        if not self.cache_dir or not use_disk:
+            return
+        disk_path = self._disk_path(key)
+        if os.path.exists(disk_path):
+            return
+        temp_path = f"{disk_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                np.save(f, rgba, allow_pickle=False)
+            os.replace(temp_path, disk_path) # Atomic, concurrent renders never see half-written files
+            self._account_disk_write(os.path.getsize(disk_path))
+        except Exception as e:
+            print(f"SubCache - Could not write cache entry {disk_path}: {e}")
+            if os.path.exists(temp_path):
+                try: os.remove(temp_path)
+                except OSError: pass
+
+    def get_or_create(self, key: str, render_fn, use_disk: bool = True) -> np.ndarray:
+        """
+        Returns the cached bitmap for key, calling render_fn() to create and store it on a miss.
+        With use_disk=False only the memory tier is read and written (e.g. for throwaway preview styles).
+        """
+        if use_disk:
+            rgba = self.get(key)
+        else:
+            with self._lock:
+                rgba = self._memory.get(key)
+                if rgba is not None:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        if rgba is None:
+            rgba = render_fn()
+            self.put(key, rgba, use_disk=use_disk)
+        return rgba
+
+    def _account_disk_write(self, added_bytes: int):
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(entry.stat().st_size for entry in self._scan_disk_entries())
+            else:
+                self._disk_bytes += added_bytes
+            if self._disk_bytes <= self.max_disk_bytes:
+                return
+            self._evict_disk_entries()
+
+    def _scan_disk_entries(self) -> list:
+        try:
+            return [entry for entry in os.scandir(self.cache_dir) if entry.is_file() and entry.name.endswith(".npy")]
+        except OSError:
+            return []
+
+    def _evict_disk_entries(self):
+        """Deletes the least recently used files until the disk tier is under 90% of its cap. Caller holds the lock."""
+        target_bytes = int(self.max_disk_bytes * 0.9)
+        entries = sorted(self._scan_disk_entries(), key=lambda entry: entry.stat().st_mtime)
+        total_bytes = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total_bytes <= target_bytes:
+                break
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                total_bytes -= size
+            except OSError:
+                continue
+        self._disk_bytes = total_bytes
+
+    def clear(self, include_disk: bool = False):
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.misses = 0
+            if include_disk and self.cache_dir:
+                for entry in self._scan_disk_entries():
+                    try: os.remove(entry.path)
+                    except OSError: pass
+                self._disk_bytes = 0
+
+
+_DEFAULT_CACHE = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+def get_default_cache() -> SubtitleBitmapCache:
+    """Returns the process-wide cue bitmap cache, creating it on first use."""
+    global _DEFAULT_CACHE
+    with _DEFAULT_CACHE_LOCK:
+        if _DEFAULT_CACHE is None:
+            try:
+                _DEFAULT_CACHE = SubtitleBitmapCache()
+            except Exception as e:
+                print(f"SubCache - Error creating disk cache, using memory only: {e}")
+                traceback.print_exc()
+                _DEFAULT_CACHE = SubtitleBitmapCache(cache_dir=None)
+        return _DEFAULT_CACHE
+
+
+if __name__ == '__main__':
+    print("--- Testing Subtitle Bitmap Cache ---")
+    test_cache = SubtitleBitmapCache(cache_dir="_subtitle_cache_test", max_memory_items=2, max_disk_bytes=1024 * 1024)
+    test_style = {'font': 'Arial', 'fontsize': 48, 'color': 'white', 'stroke_color': 'black', 'stroke_width': 1, 'bg_color': 'transparent'}
+    for i, cue_text in enumerate(["AITA", "Edit:", "Thanks for reading", "AITA"]):
+        cue_key = make_cache_key(cue_text, test_style, 972)
+        bitmap = test_cache.get_or_create(cue_key, lambda i=i: np.full((40, 200, 4), i * 50, dtype=np.uint8))
+        print(f"'{cue_text}' -> {cue_key[:12]}... shape={bitmap.shape} first_value={bitmap[0, 0, 0]}")
+    print(f"Hits: {test_cache.hits}, Misses: {test_cache.misses}")
+    test_cache.clear(include_disk=True)
+    try: os.rmdir("_subtitle_cache_test")
+    except OSError: pass
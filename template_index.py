@@ -0,0 +1,161 @@
+# template_index.py
+import os
+import json
+import hashlib
+import threading
+import traceback
+import ffmpeg_tools
+
+# Persistent per-folder metadata index, so listing templates and planning renders never opens a decoder.
+TEMPLATE_INDEX_FILENAME = ".template_index.json" # Stored inside each indexed folder
+TEMPLATE_INDEX_VERSION = 1 # Bump when record fields change so every entry is re-probed
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv')
+HASH_CHUNK_BYTES = 1024 * 1024
+
+_index_lock = threading.RLock() # The GUI, background ingest and renders may refresh the same folder
+_loaded_indexes = {} # folder abspath -> {'version': ..., 'entries': {filename: record}}
+
+
+def _index_path(directory: str) -> str:
+    return os.path.join(directory, TEMPLATE_INDEX_FILENAME)
+
+def _hash_file(path: str) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_BYTES), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def _load_index(directory: str) -> dict:
+    """Returns the in-memory index of a folder, reading it from disk on first use. Caller holds the lock."""
+    key = os.path.abspath(directory)
+    if key in _loaded_indexes:
+        return _loaded_indexes[key]
+    index = {'version': TEMPLATE_INDEX_VERSION, 'entries': {}}
+    index_path = _index_path(directory)
+    if os.path.exists(index_path):
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+            if stored.get('version') == TEMPLATE_INDEX_VERSION:
+                index = stored
+        except Exception as e:
+            print(f"TemplateIndex - Could not read {index_path}, rebuilding: {e}")
+    _loaded_indexes[key] = index
+    return index
+
+def _save_index(directory: str, index: dict):
+    """Writes the index atomically. Caller holds the lock."""
+    index_path = _index_path(directory)
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+        os.replace(temp_path, index_path)
+    except Exception as e:
+        print(f"TemplateIndex - Could not write {index_path}: {e}")
+        if os.path.exists(temp_path):
+            try: os.remove(temp_path)
+            except OSError: pass
+
+def _build_record(video_path: str, stat: os.stat_result) -> dict | None:
+    """Probes a video file (headers and keyframe packets only) and returns its index record."""
+    info = ffmpeg_tools.probe_video_info(video_path)
+    if info is None:
+        print(f"TemplateIndex - Could not read video metadata of {video_path}, skipping.")
+        return None
+    record = {
+        'filename': os.path.basename(video_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': _hash_file(video_path),
+        'duration': info['duration'],
+        'fps': info['fps'],
+        'width': info['width'],
+        'height': info['height'],
+        'codec': info['codec'],
+        'has_audio': info['has_audio'],
+        'keyframes': [round(t, 6) for t in ffmpeg_tools.probe_keyframe_times(video_path)],
+    }
+    # print(f"TemplateIndex - Indexed {record['filename']}: {record['width']}x{record['height']} {record['fps']:.2f}fps {record['duration']:.2f}s") # Optional debug
+    return record
+
+def _with_path(directory: str, record: dict) -> dict:
+    """Returns a copy of a stored record with its full 'path' filled in (paths are not stored, the folder may move)."""
+    return dict(record, path=os.path.join(directory, record['filename']))
+
+def refresh_index(directory: str) -> list[dict]:
+    """
+    Brings the index of a folder up to date and returns its records sorted by filename.
+    Only files that are new or whose size/mtime changed are probed; records of deleted files are dropped.
+    """
+    if not os.path.isdir(directory):
+        return []
+    with _index_lock:
+        index = _load_index(directory)
+        entries = index['entries']
+        changed = False
+        present = set()
+        for filename in sorted(os.listdir(directory)):
+            if not filename.lower().endswith(VIDEO_EXTENSIONS):
+                continue
+            video_path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(video_path)
+            except OSError:
+                continue
+            present.add(filename)
+            record = entries.get(filename)
+            if record and record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+                continue
+            try:
+                new_record = _build_record(video_path, stat)
+            except Exception as e:
+                print(f"TemplateIndex - Error indexing {video_path}: {e}")
+                traceback.print_exc()
+                new_record = None
+            if new_record:
+                entries[filename] = new_record
+                changed = True
+            elif filename in entries:
+                del entries[filename]
+                changed = True
+        for filename in [f for f in entries if f not in present]:
+            del entries[filename]
+            changed = True
+        if changed:
+            _save_index(directory, index)
+        return [_with_path(directory, entries[f]) for f in sorted(entries) if f in present]
+
+def get_video_info(video_path: str) -> dict | None:
+    """Returns the index record of any video file, indexing it (and refreshing its folder entry) if needed."""
+    if not os.path.exists(video_path):
+        return None
+    directory = os.path.dirname(video_path) or "."
+    filename = os.path.basename(video_path)
+    with _index_lock:
+        index = _load_index(directory)
+        record = index['entries'].get(filename)
+        stat = os.stat(video_path)
+        if record and record['size'] == stat.st_size and record['mtime_ns'] == stat.st_mtime_ns:
+            return _with_path(directory, record)
+        try:
+            record = _build_record(video_path, stat)
+        except Exception as e:
+            print(f"TemplateIndex - Error indexing {video_path}: {e}")
+            traceback.print_exc()
+            record = None
+        if record is None:
+            return None
+        index['entries'][filename] = record
+        _save_index(directory, index)
+        return _with_path(directory, record)
+
+
+if __name__ == '__main__':
+    print("--- Testing Template Metadata Index ---")
+    test_dir = "video_templates"
+    for test_record in refresh_index(test_dir):
+        print(f"{test_record['filename']}: {test_record['width']}x{test_record['height']} {test_record['codec']} "
+              f"{test_record['fps']:.2f}fps {test_record['duration']:.2f}s, {len(test_record['keyframes'])} keyframes, sha256 {test_record['sha256'][:12]}...")
+    print(f"Second refresh (no changes, nothing re-probed): {len(refresh_index(test_dir))} records")
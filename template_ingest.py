@@ -0,0 +1,144 @@
+# template_ingest.py
+import os
+import json
+import threading
+import traceback
+import ffmpeg_tools
+
+# Templates are transcoded once into a normalized "mezzanine" stored next to the original,
+# so renders never decode 4K/60fps or long-GOP uploads at full cost.
+MEZZANINE_CACHE_DIRNAME = ".mezzanine_cache" # Created inside the template's own folder
+MEZZANINE_FORMAT_VERSION = 1 # Bump when the settings below change so existing mezzanines are rebuilt
+
+MEZZANINE_SIZE = (1080, 1920) # width, height (9:16)
+MEZZANINE_FPS = 30
+MEZZANINE_GOP_FRAMES = 30 # One keyframe per second keeps seeks and stream-copy cuts cheap
+MEZZANINE_ENCODER_OPTIONS = {'codec': 'libx264', 'preset': 'veryfast', 'crf': 18, 'pix_fmt': 'yuv420p'}
+
+_ingest_locks = {}
+_ingest_locks_guard = threading.Lock()
+
+
+def get_mezzanine_paths(video_path: str) -> tuple[str, str]:
+    """Returns (mezzanine_video_path, metadata_json_path) for a template."""
+    template_dir = os.path.dirname(os.path.abspath(video_path))
+    base_name = os.path.splitext(os.path.basename(video_path))[0]
+    ext = os.path.splitext(video_path)[1].lower().lstrip('.') # Keeps "clip.mp4" and "clip.mov" apart
+    cache_dir = os.path.join(template_dir, MEZZANINE_CACHE_DIRNAME)
+    return os.path.join(cache_dir, f"{base_name}_{ext}_mezz.mp4"), os.path.join(cache_dir, f"{base_name}_{ext}_mezz.json")
+
+def _source_signature(video_path: str) -> dict:
+    """Identifies the source file and the mezzanine settings it was converted with."""
+    stat = os.stat(video_path)
+    return {
+        'version': MEZZANINE_FORMAT_VERSION,
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'width': MEZZANINE_SIZE[0],
+        'height': MEZZANINE_SIZE[1],
+        'fps': MEZZANINE_FPS,
+        'gop': MEZZANINE_GOP_FRAMES,
+    }
+
+def is_mezzanine_current(video_path: str) -> bool:
+    """True if a mezzanine exists for video_path and was built from the file as it is now."""
+    mezz_path, meta_path = get_mezzanine_paths(video_path)
+    if not (os.path.exists(mezz_path) and os.path.exists(meta_path)):
+        return False
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            stored_signature = json.load(f)
+        return stored_signature == _source_signature(video_path)
+    except Exception as e:
+        print(f"Ingest - Could not read mezzanine metadata {meta_path}: {e}")
+        return False
+
+def _get_ingest_lock(video_path: str) -> threading.Lock:
+    key = os.path.abspath(video_path)
+    with _ingest_locks_guard:
+        if key not in _ingest_locks:
+            _ingest_locks[key] = threading.Lock()
+        return _ingest_locks[key]
+
+def ingest_template(video_path: str, force: bool = False) -> str | None:
+    """
+    Transcodes a template into its mezzanine (MEZZANINE_SIZE, MEZZANINE_FPS, short GOP, no audio).
+    The source is scaled to cover the frame and center-cropped. Does nothing if the mezzanine is current.
+    Returns the mezzanine path, or None on failure.
+    """
+    if not os.path.exists(video_path):
+        print(f"Ingest - Error: Template not found at {video_path}")
+        return None
+
+    mezz_path, meta_path = get_mezzanine_paths(video_path)
+    with _get_ingest_lock(video_path): # A render and the background ingest may ask for the same template
+        if not force and is_mezzanine_current(video_path):
+            return mezz_path
+
+        os.makedirs(os.path.dirname(mezz_path), exist_ok=True)
+        signature = _source_signature(video_path) # Taken before transcoding so a file changed mid-ingest is redone later
+        width, height = MEZZANINE_SIZE
+        video_filter = (
+            f"scale={width}:{height}:force_original_aspect_ratio=increase:flags=bicubic,"
+            f"crop={width}:{height},setsar=1,fps={MEZZANINE_FPS}"
+        )
+        opts = MEZZANINE_ENCODER_OPTIONS
+        temp_path = f"{mezz_path}.{os.getpid()}.tmp.mp4"
+        args = [
+            '-i', video_path,
+            '-map', '0:v:0', '-an', '-sn', '-dn',
+            '-vf', video_filter,
+            '-c:v', opts['codec'], '-preset', opts['preset'], '-crf', str(opts['crf']), '-pix_fmt', opts['pix_fmt'],
+            '-g', str(MEZZANINE_GOP_FRAMES), '-keyint_min', str(MEZZANINE_GOP_FRAMES), '-sc_threshold', '0',
+            '-movflags', '+faststart',
+            temp_path,
+        ]
+        try:
+            print(f"Ingest - Creating mezzanine for {os.path.basename(video_path)} ({width}x{height} @ {MEZZANINE_FPS}fps)...")
+            if not ffmpeg_tools.run_ffmpeg(args, log_prefix="Ingest"):
+                return None
+            os.replace(temp_path, mezz_path)
+            with open(meta_path, "w", encoding="utf-8") as f:
+                json.dump(signature, f, indent=2)
+            # print(f"Ingest - Mezzanine saved to: {mezz_path}") # Optional debug
+            return mezz_path
+        except Exception as e:
+            print(f"Ingest - Error creating mezzanine for {video_path}: {e}")
+            traceback.print_exc()
+            return None
+        finally:
+            if os.path.exists(temp_path):
+                try: os.remove(temp_path)
+                except OSError: pass
+
+def resolve_render_source(video_path: str) -> str:
+    """Returns the mezzanine to decode for video_path, creating or refreshing it if needed. Falls back to the original."""
+    mezz_path = ingest_template(video_path)
+    if mezz_path is None:
+        print(f"Ingest - Using original template for {os.path.basename(video_path)} (no mezzanine available).")
+        return video_path
+    return mezz_path
+
+def ingest_all_templates(video_paths: list[str]) -> int:
+    """Ingests every template that has no current mezzanine. Returns how many were (re)created."""
+    created = 0
+    for video_path in video_paths:
+        if is_mezzanine_current(video_path):
+            continue
+        if ingest_template(video_path):
+            created += 1
+    return created
+
+
+if __name__ == '__main__':
+    print("--- Testing Template Ingest ---")
+    test_templates_dir = "video_templates"
+    test_videos = sorted(
+        os.path.join(test_templates_dir, f) for f in os.listdir(test_templates_dir)
+        if f.lower().endswith(('.mp4', '.mov', '.avi', '.mkv'))
+    ) if os.path.isdir(test_templates_dir) else []
+    if not test_videos:
+        print(f"No templates in '{test_templates_dir}' to test with.")
+    for test_video in test_videos:
+        print(f"{test_video}: current={is_mezzanine_current(test_video)}")
+        print(f"  -> {resolve_render_source(test_video)} (current={is_mezzanine_current(test_video)})")
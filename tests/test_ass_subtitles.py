@@ -0,0 +1,33 @@
+# tests/test_ass_subtitles.py
+import pytest
+import ass_subtitles
+
+
+@pytest.mark.parametrize("seconds, expected", [
+    (0, "0:00:00.00"),
+    (1.234, "0:00:01.23"),
+    (1.235, "0:00:01.24"), # Rounded to the nearest centisecond, not truncated
+    (59.999, "0:01:00.00"), # Rounding carries into the minutes
+    (61.5, "0:01:01.50"),
+    (3599.99, "0:59:59.99"),
+    (3723.4, "1:02:03.40"),
+    (-0.5, "0:00:00.00"),
+])
+def test_ass_time(seconds, expected):
+    assert ass_subtitles.ass_time(seconds) == expected
+
+@pytest.mark.parametrize("text, expected", [
+    ("Hello world", "Hello world"),
+    ("  first line \n second line  ", "first line\\Nsecond line"),
+    ("windows\r\nline breaks", "windows\\Nline breaks"),
+    ("{\\b1}bold{\\b0}", "(\\\u200bb1)bold(\\\u200bb0)"),
+    ("a \\N b", "a \\\u200bN b"), # A literal \N in the cue stays text instead of becoming a line break
+    ("", ""),
+])
+def test_escape_ass_text(text, expected):
+    assert ass_subtitles.escape_ass_text(text) == expected
+
+def test_escaped_text_has_no_override_blocks():
+    escaped = ass_subtitles.escape_ass_text("{\\pos(0,0)}{\\fnComic Sans}text")
+    assert "{" not in escaped and "}" not in escaped
+    assert "\\p" not in escaped and "\\f" not in escaped
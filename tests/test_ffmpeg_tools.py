@@ -0,0 +1,42 @@
+# tests/test_ffmpeg_tools.py
+import os
+import shutil
+import subprocess
+import numpy as np
+import pytest
+import ffmpeg_tools
+
+FPS = 30
+FRAME_SIZE = (64, 48)
+
+
+@pytest.mark.parametrize("time_sec, expected", [
+    (0.0, "0.000"),
+    (-1.0, "0.000"),
+    (32 / 30, "1.066"), # 1.0667 would round up past the frame
+    (1.0335, "1.033"),
+    (2.5, "2.500"),
+])
+def test_seek_timestamp_never_rounds_up(time_sec, expected):
+    assert ffmpeg_tools.seek_timestamp(time_sec) == expected
+    assert float(ffmpeg_tools.seek_timestamp(time_sec)) <= max(0.0, time_sec)
+
+@pytest.fixture
+def all_keyframe_video(tmp_path):
+    """Short all-intra video, so every frame is a keyframe, plus its frames decoded in order."""
+    ffmpeg = ffmpeg_tools.get_ffmpeg_binary()
+    if not (shutil.which(ffmpeg) or os.path.exists(ffmpeg)):
+        pytest.skip("ffmpeg not available")
+    video_path = str(tmp_path / "intra.mp4")
+    subprocess.run([ffmpeg, '-loglevel', 'error', '-f', 'lavfi', '-i', f"testsrc2=size={FRAME_SIZE[0]}x{FRAME_SIZE[1]}:rate={FPS}:duration=2",
+                    '-c:v', 'libx264', '-g', '1', '-pix_fmt', 'yuv420p', video_path], check=True)
+    raw = subprocess.run([ffmpeg, '-loglevel', 'error', '-i', video_path, '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-'],
+                         stdout=subprocess.PIPE, check=True).stdout
+    frames = np.frombuffer(raw, dtype=np.uint8).reshape(-1, FRAME_SIZE[1], FRAME_SIZE[0], 3)
+    return video_path, frames
+
+@pytest.mark.parametrize("frame_index", [0, 1, 31, 32, 59])
+def test_extract_keyframe_image_returns_the_keyframe_at_its_time(all_keyframe_video, frame_index):
+    video_path, frames = all_keyframe_video
+    image = ffmpeg_tools.extract_keyframe_image(video_path, frame_index / FPS)
+    assert np.array_equal(np.asarray(image), frames[frame_index])
@@ -0,0 +1,47 @@
+# tests/test_libass_burn.py
+import pytest
+import ffmpeg_tools
+import output_profiles
+import video_processor
+
+SRT_TEXT = "1\n00:00:00,000 --> 00:00:01,500\nHello there\n"
+
+
+@pytest.fixture
+def captured_ass(tmp_path, monkeypatch):
+    """Runs _burn_with_libass without ffmpeg and returns a function giving the generated ASS script per profile."""
+    srt_path = tmp_path / "subs.srt"
+    srt_path.write_text(SRT_TEXT, encoding="utf-8")
+    scripts = []
+
+    def fake_burn(video_path, ass_path, output_path, **kwargs):
+        with open(ass_path, "r", encoding="utf-8") as f:
+            scripts.append(f.read())
+        return True
+
+    monkeypatch.setattr(ffmpeg_tools, "probe_video_info", lambda path: {'duration': 5.0})
+    monkeypatch.setattr(ffmpeg_tools, "burn_ass_subtitles", fake_burn)
+
+    def render(profile_name: str) -> str:
+        profile = output_profiles.get_output_profile(profile_name)
+        current_style, actual_pos_tuple = video_processor._resolve_subtitle_style(None)
+        assert video_processor._burn_with_libass("template.mp4", str(srt_path), str(tmp_path / "out.mp4"),
+                                                 current_style, actual_pos_tuple, profile)
+        return scripts[-1]
+    return render
+
+def _default_style_margins(script: str) -> tuple[int, int]:
+    style_line = next(line for line in script.splitlines() if line.startswith("Style: Default,"))
+    fields = style_line[len("Style: "):].split(",")
+    return int(fields[19]), int(fields[20]) # MarginL, MarginR
+
+@pytest.mark.parametrize("profile_name", ["vertical_1080p", "square_1080p", "landscape_1080p"])
+def test_libass_wraps_at_the_profile_box_width(captured_ass, profile_name):
+    profile = output_profiles.get_output_profile(profile_name)
+    frame_w, _ = output_profiles.profile_size(profile)
+    margin_l, margin_r = _default_style_margins(captured_ass(profile_name))
+    assert frame_w - margin_l - margin_r == pytest.approx(output_profiles.subtitle_box_width(profile), abs=2) # Each margin is truncated
+
+def test_landscape_wraps_narrower_than_the_full_box_ratio(captured_ass):
+    margin_l, _ = _default_style_margins(captured_ass("landscape_1080p"))
+    assert margin_l == int(1920 * (1.0 - output_profiles.SUBTITLE_BOX_WIDTH_RATIO_LANDSCAPE) / 2)
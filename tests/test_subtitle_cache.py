@@ -0,0 +1,68 @@
+# tests/test_subtitle_cache.py
+import os
+import numpy as np
+import subtitle_cache
+
+BITMAP_SHAPE = (32, 32, 4)
+
+
+def _bitmap(value: int) -> np.ndarray:
+    return np.full(BITMAP_SHAPE, value, dtype=np.uint8)
+
+def _entry_bytes(tmp_path) -> int:
+    probe_path = tmp_path / "probe.npy"
+    np.save(probe_path, _bitmap(0), allow_pickle=False)
+    size = os.path.getsize(probe_path)
+    os.remove(probe_path)
+    return size
+
+def _disk_keys(cache_dir) -> set:
+    return {name[:-len(".npy")] for name in os.listdir(cache_dir) if name.endswith(".npy")}
+
+
+def test_disk_tier_stays_under_its_cap_and_evicts_least_recently_used(tmp_path):
+    cache_dir = tmp_path / "cache"
+    max_disk_bytes = _entry_bytes(tmp_path) * 5
+    cache = subtitle_cache.SubtitleBitmapCache(str(cache_dir), max_memory_items=2, max_disk_bytes=max_disk_bytes)
+    keys = [f"key{i}" for i in range(8)]
+    for i, key in enumerate(keys):
+        cache.put(key, _bitmap(i))
+        os.utime(cache._disk_path(key), (1_000_000 + i, 1_000_000 + i)) # Distinct mtimes, oldest first
+        disk_bytes = sum(os.path.getsize(cache_dir / name) for name in os.listdir(cache_dir))
+        assert disk_bytes <= max_disk_bytes
+
+    on_disk = _disk_keys(cache_dir)
+    assert keys[-1] in on_disk
+    assert keys[0] not in on_disk
+    assert on_disk == set(keys[-len(on_disk):]) # Only the most recently written entries survive
+
+def test_disk_read_refreshes_recency(tmp_path):
+    cache_dir = tmp_path / "cache"
+    max_disk_bytes = _entry_bytes(tmp_path) * 3
+    cache = subtitle_cache.SubtitleBitmapCache(str(cache_dir), max_memory_items=1, max_disk_bytes=max_disk_bytes)
+    for i, key in enumerate(("a", "b", "c")):
+        cache.put(key, _bitmap(i))
+        os.utime(cache._disk_path(key), (1_000_000 + i, 1_000_000 + i))
+    cache.clear() # Memory tier only, the next get() reads "a" from disk
+    assert cache.get("a")[0, 0, 0] == 0
+    cache.put("d", _bitmap(3))
+    assert "a" in _disk_keys(cache_dir)
+    assert "b" not in _disk_keys(cache_dir)
+
+def test_memory_only_entries_never_touch_disk(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache = subtitle_cache.SubtitleBitmapCache(str(cache_dir))
+    rgba = cache.get_or_create("preview", lambda: _bitmap(7), use_disk=False)
+    assert rgba[0, 0, 0] == 7
+    assert os.listdir(cache_dir) == []
+    assert cache.get_or_create("preview", lambda: _bitmap(0), use_disk=False)[0, 0, 0] == 7
+    assert (cache.hits, cache.misses) == (1, 1)
+
+def test_cache_key_depends_on_text_style_and_width():
+    style = {'font': 'Arial', 'fontsize': 24, 'color': 'white'}
+    key = subtitle_cache.make_cache_key("Hello", style, 972)
+    assert key == subtitle_cache.make_cache_key("Hello", dict(style), 972)
+    assert key != subtitle_cache.make_cache_key("Hello!", style, 972)
+    assert key != subtitle_cache.make_cache_key("Hello", dict(style, fontsize=30), 972)
+    assert key != subtitle_cache.make_cache_key("Hello", style, 1344)
+    assert key == subtitle_cache.make_cache_key("Hello", dict(style, position_choice='Top'), 972) # Position is not rasterized
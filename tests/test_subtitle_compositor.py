@@ -0,0 +1,66 @@
+# tests/test_subtitle_compositor.py
+import numpy as np
+import subtitle_compositor
+
+FRAME_SIZE = (64, 48)
+
+
+def _solid_cue(width: int, height: int, color: tuple, alpha: int = 255) -> np.ndarray:
+    rgba = np.zeros((height, width, 4), dtype=np.uint8)
+    rgba[:, :, :3] = color
+    rgba[:, :, 3] = alpha
+    return rgba
+
+def _active_starts(compositor, t: float) -> list:
+    return [start for start, _, _ in compositor.active_cues(t)]
+
+
+def test_cue_is_active_from_start_up_to_but_not_including_end():
+    compositor = subtitle_compositor.SubtitleCompositor(FRAME_SIZE)
+    compositor.add_cue(1.0, 2.0, _solid_cue(8, 8, (255, 0, 0)), (0, 0))
+    assert _active_starts(compositor, 0.999) == []
+    assert _active_starts(compositor, 1.0) == [1.0]
+    assert _active_starts(compositor, 1.999) == [1.0]
+    assert _active_starts(compositor, 2.0) == []
+
+def test_back_to_back_cues_hand_over_at_the_shared_boundary():
+    compositor = subtitle_compositor.SubtitleCompositor(FRAME_SIZE)
+    compositor.add_cue(0.0, 1.5, _solid_cue(8, 8, (255, 0, 0)), (0, 0))
+    compositor.add_cue(1.5, 3.0, _solid_cue(8, 8, (0, 255, 0)), (0, 0))
+    assert _active_starts(compositor, 1.4999) == [0.0]
+    assert _active_starts(compositor, 1.5) == [1.5]
+    assert _active_starts(compositor, 3.0) == []
+
+def test_overlapping_cues_are_drawn_in_insertion_order():
+    compositor = subtitle_compositor.SubtitleCompositor(FRAME_SIZE)
+    compositor.add_cue(0.0, 2.0, _solid_cue(8, 8, (255, 0, 0)), (0, 0))
+    compositor.add_cue(1.0, 3.0, _solid_cue(8, 8, (0, 255, 0)), (0, 0))
+    assert _active_starts(compositor, 0.5) == [0.0]
+    assert _active_starts(compositor, 1.0) == [0.0, 1.0]
+    assert _active_starts(compositor, 2.0) == [1.0]
+
+def test_empty_cues_are_ignored():
+    compositor = subtitle_compositor.SubtitleCompositor(FRAME_SIZE)
+    compositor.add_cue(1.0, 1.0, _solid_cue(8, 8, (255, 0, 0)), (0, 0))
+    assert compositor.cue_count == 0
+    assert compositor.active_cues(1.0) == []
+
+def test_lazy_cue_matches_the_same_boundaries():
+    compositor = subtitle_compositor.SubtitleCompositor(FRAME_SIZE, lookahead_s=0.5)
+    compositor.add_lazy_cue(1.0, 2.0, lambda: (_solid_cue(8, 8, (255, 0, 0)), (0, 0)))
+    assert _active_starts(compositor, 0.999) == []
+    assert compositor.live_cue_count == 1 # Rasterized within the lookahead
+    assert _active_starts(compositor, 1.0) == [1.0]
+    assert _active_starts(compositor, 2.0) == []
+    assert compositor.live_cue_count == 0
+
+def test_composite_blends_only_inside_the_cue_interval():
+    compositor = subtitle_compositor.SubtitleCompositor(FRAME_SIZE)
+    compositor.add_cue(1.0, 2.0, _solid_cue(4, 4, (200, 100, 50), alpha=128), (10, 20))
+    frame = np.zeros((FRAME_SIZE[1], FRAME_SIZE[0], 3), dtype=np.uint8)
+    assert compositor.composite_frame(frame, 2.0) is frame
+    blended = compositor.composite_frame(frame, 1.0)
+    expected = np.round(np.array([200, 100, 50]) * 128 / 255).astype(np.uint8)
+    assert (blended[20:24, 10:14] == expected).all()
+    assert not blended[:20].any() and not blended[24:].any()
+    assert not frame.any() # The source frame is left untouched
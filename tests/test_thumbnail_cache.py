@@ -0,0 +1,54 @@
+# tests/test_thumbnail_cache.py
+import os
+import pytest
+import video_processor
+
+CURRENT_HASH = "a" * 64
+OLD_HASH = "b" * 64
+
+
+@pytest.fixture
+def thumbnail_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(video_processor, "THUMBNAIL_CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+def _touch(directory, filename: str):
+    (directory / filename).write_bytes(b"")
+
+
+def test_cache_path_is_keyed_on_content_time_and_size(thumbnail_dir):
+    path = video_processor._thumbnail_cache_path("/templates/clip.mp4", CURRENT_HASH, 1.0, (128, 227))
+    assert os.path.basename(path) == f"clip_mp4_{CURRENT_HASH[:16]}_t1000_128x227.png"
+    assert path != video_processor._thumbnail_cache_path("/templates/clip.mp4", OLD_HASH, 1.0, (128, 227))
+    assert path != video_processor._thumbnail_cache_path("/templates/clip.mp4", CURRENT_HASH, 2.0, (128, 227))
+    assert path != video_processor._thumbnail_cache_path("/templates/clip.mp4", CURRENT_HASH, 1.0, (160, 284))
+
+def test_outdated_and_legacy_thumbnails_are_removed(thumbnail_dir):
+    current = os.path.basename(video_processor._thumbnail_cache_path("clip.mp4", CURRENT_HASH, 1.0, (128, 227)))
+    outdated = os.path.basename(video_processor._thumbnail_cache_path("clip.mp4", OLD_HASH, 1.0, (128, 227)))
+    pre_extension = f"clip_{OLD_HASH[:16]}_t1000_128x227.png"
+    for filename in (current, outdated, pre_extension, "clip_thumb_128x227.png", "clip_thumb_300x540.png"):
+        _touch(thumbnail_dir, filename)
+    video_processor._remove_outdated_thumbnails("clip.mp4", CURRENT_HASH)
+    assert os.listdir(thumbnail_dir) == [current]
+
+def test_other_templates_thumbnails_are_kept(thumbnail_dir):
+    kept = [
+        os.path.basename(video_processor._thumbnail_cache_path("clip10.mp4", OLD_HASH, 1.0, (128, 227))),
+        "clip10_thumb_128x227.png", # Same prefix, different template
+        "clip_notes.png",
+    ]
+    for filename in kept:
+        _touch(thumbnail_dir, filename)
+    video_processor._remove_outdated_thumbnails("clip.mp4", CURRENT_HASH)
+    assert sorted(os.listdir(thumbnail_dir)) == sorted(kept)
+
+def test_templates_with_the_same_stem_keep_their_own_thumbnails(thumbnail_dir):
+    mp4_thumb = video_processor._thumbnail_cache_path("clip.mp4", CURRENT_HASH, 1.0, (128, 227))
+    mov_thumb = video_processor._thumbnail_cache_path("clip.mov", OLD_HASH, 1.0, (128, 227))
+    assert mp4_thumb != mov_thumb
+    _touch(thumbnail_dir, os.path.basename(mov_thumb))
+    video_processor._remove_outdated_thumbnails("clip.mp4", CURRENT_HASH)
+    _touch(thumbnail_dir, os.path.basename(mp4_thumb))
+    video_processor._remove_outdated_thumbnails("clip.mov", OLD_HASH)
+    assert sorted(os.listdir(thumbnail_dir)) == sorted([os.path.basename(mp4_thumb), os.path.basename(mov_thumb)])
@@ -0,0 +1,288 @@
+# text_renderer.py
+import os
+import re
+import math
+import struct
+import threading
+import traceback
+from functools import lru_cache
+from PIL import Image, ImageDraw, ImageFont, ImageColor
+import numpy as np
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+FONTS_DIR = os.path.join(SCRIPT_DIR, "assets", "fonts")
+DEFAULT_FONT_NAME = "Lato-Bold" # Used when a style asks for a font that is neither bundled nor installed
+FONT_FILE_EXTENSIONS = ('.ttf', '.otf')
+
+_font_index = None # normalized name -> (font file path, variable font instance name or None)
+_font_families = None # family display name -> {style display name: font name}
+_font_index_lock = threading.Lock()
+_warned_missing_fonts = set()
+
+
+def _normalize_font_name(name: str) -> str:
+    """'Lato-Bold-Italic', 'Lato BoldItalic' and 'lato_bolditalic' all normalize to 'latobolditalic'."""
+    return re.sub(r"[^a-z0-9]", "", name.lower())
+
+def _split_camel_case(style: str) -> str:
+    """'BoldItalic' -> 'Bold Italic', 'ExtraLight' stays 'ExtraLight' (known weight names are kept whole)."""
+    for compound in ("ExtraLight", "ExtraBold", "SemiBold"):
+        style = style.replace(compound, compound.replace("Light", "_Light").replace("Bold", "_Bold"))
+    spaced = re.sub(r"(?<=[a-z])(?=[A-Z])", " ", style)
+    return spaced.replace("_", "")
+
+def _build_font_index():
+    """Scans FONTS_DIR once and registers every static font and every named instance of the variable fonts."""
+    global _font_index, _font_families
+    with _font_index_lock:
+        if _font_index is not None:
+            return
+        index, families = {}, {}
+        if not os.path.isdir(FONTS_DIR):
+            print(f"TextRender - Fonts directory '{FONTS_DIR}' not found. Only installed fonts can be used.")
+        else:
+            for filename in sorted(os.listdir(FONTS_DIR)):
+                if not filename.lower().endswith(FONT_FILE_EXTENSIONS):
+                    continue
+                font_path = os.path.join(FONTS_DIR, filename)
+                stem = os.path.splitext(filename)[0]
+                file_prefix = stem.split("-")[0]
+                try:
+                    probe_font = ImageFont.truetype(font_path, 12)
+                    family_display = probe_font.getname()[0] or file_prefix
+                except Exception as e:
+                    print(f"TextRender - Skipping unreadable font {filename}: {e}")
+                    continue
+
+                family_styles = families.setdefault(family_display, {})
+                if "VariableFont" in stem:
+                    try:
+                        instance_names = [n.decode() if isinstance(n, bytes) else n for n in probe_font.get_variation_names()]
+                    except Exception: # FreeType built without variation support, only the default instance is usable
+                        instance_names = []
+                    for instance_name in instance_names:
+                        font_name = f"{file_prefix}-{instance_name.replace(' ', '-')}"
+                        index[_normalize_font_name(font_name)] = (font_path, instance_name)
+                        family_styles[instance_name] = font_name
+                    if "-Italic-" not in stem:
+                        index.setdefault(_normalize_font_name(file_prefix), (font_path, "Regular" if "Regular" in instance_names else None))
+                else:
+                    style_part = stem[len(file_prefix) + 1:] or "Regular"
+                    font_name = f"{file_prefix}-{style_part}"
+                    index[_normalize_font_name(font_name)] = (font_path, None)
+                    family_styles[_split_camel_case(style_part)] = font_name
+                    if style_part == "Regular":
+                        index.setdefault(_normalize_font_name(file_prefix), (font_path, None))
+        _font_index, _font_families = index, families
+
+def list_bundled_font_families() -> dict:
+    """Returns {family display name: {style display name: font name}} for the fonts in FONTS_DIR."""
+    _build_font_index()
+    return {family: dict(styles) for family, styles in _font_families.items()}
+
+def resolve_font_path(font_name: str) -> str | None:
+    """Returns the bundled font file for a style font name (e.g. 'Poppins-Bold'), or None if it is not bundled."""
+    if not font_name:
+        return None
+    if font_name.lower().endswith(FONT_FILE_EXTENSIONS) and os.path.exists(font_name):
+        return font_name
+    _build_font_index()
+    entry = _font_index.get(_normalize_font_name(font_name))
+    return entry[0] if entry else None
+
+@lru_cache(maxsize=64)
+def _load_font(font_name: str, fontsize: int) -> ImageFont.FreeTypeFont:
+    """Loads a font by style name: bundled fonts first, then installed system fonts, then DEFAULT_FONT_NAME."""
+    _build_font_index()
+    entry = None
+    if font_name and font_name.lower().endswith(FONT_FILE_EXTENSIONS) and os.path.exists(font_name):
+        entry = (font_name, None)
+    elif font_name:
+        entry = _font_index.get(_normalize_font_name(font_name))
+
+    if entry:
+        font = ImageFont.truetype(entry[0], fontsize)
+        if entry[1]:
+            try: font.set_variation_by_name(entry[1])
+            except Exception as e: print(f"TextRender - Could not select instance '{entry[1]}' of {entry[0]}: {e}")
+        return font
+
+    # Not bundled: PIL can still find installed fonts by file name (e.g. 'Impact' -> impact.ttf on Windows)
+    if font_name:
+        for candidate in (font_name, f"{font_name}.ttf", f"{font_name.replace('-', '')}.ttf"):
+            try:
+                return ImageFont.truetype(candidate, fontsize)
+            except OSError:
+                continue
+        if font_name not in _warned_missing_fonts:
+            _warned_missing_fonts.add(font_name)
+            print(f"TextRender - Font '{font_name}' not found, using '{DEFAULT_FONT_NAME}'.")
+
+    if font_name != DEFAULT_FONT_NAME and _normalize_font_name(DEFAULT_FONT_NAME) in _font_index:
+        return _load_font(DEFAULT_FONT_NAME, fontsize)
+    return ImageFont.load_default(size=fontsize)
+
+def get_font_face(font_name: str) -> tuple[str, str]:
+    """Returns the (family, style) the given style font name resolves to, e.g. 'Poppins-BoldItalic' -> ('Poppins', 'Bold Italic')."""
+    family, style = _load_font(font_name or DEFAULT_FONT_NAME, 24).getname()
+    return family or font_name, style or "Regular"
+
+def _read_win_metrics(font_path: str) -> tuple[int, int, int] | None:
+    """Reads (usWinAscent, usWinDescent, unitsPerEm) from the OS/2 and head tables of a TrueType/OpenType file."""
+    with open(font_path, "rb") as f:
+        header = f.read(12)
+        if len(header) < 12: return None
+        num_tables = struct.unpack(">H", header[4:6])[0]
+        tables = {}
+        for _ in range(num_tables):
+            tag, _, offset, _ = struct.unpack(">4sIII", f.read(16))
+            tables[tag] = offset
+        if b"OS/2" not in tables or b"head" not in tables: return None
+        f.seek(tables[b"OS/2"] + 74)
+        win_ascent, win_descent = struct.unpack(">HH", f.read(4))
+        f.seek(tables[b"head"] + 18)
+        units_per_em = struct.unpack(">H", f.read(2))[0]
+    return win_ascent, win_descent, units_per_em
+
+@lru_cache(maxsize=64)
+def get_ass_fontsize(font_name: str, fontsize: int) -> int:
+    """
+    Converts a PIL/ImageMagick pixel font size to the ASS Fontsize that gives the same glyph size in libass,
+    which scales fonts so that usWinAscent + usWinDescent equals the requested size.
+    """
+    fontsize = max(1, int(fontsize))
+    font = _load_font(font_name or DEFAULT_FONT_NAME, fontsize)
+    try:
+        win_metrics = _read_win_metrics(font.path)
+        if win_metrics and win_metrics[0] + win_metrics[1] > 0 and win_metrics[2] > 0:
+            return max(1, int(round(fontsize * (win_metrics[0] + win_metrics[1]) / win_metrics[2])))
+    except Exception as e:
+        print(f"TextRender - Could not read metrics of {getattr(font, 'path', font_name)}: {e}")
+    ascent, descent = font.getmetrics()
+    return ascent + descent
+
+def parse_color(color_value) -> tuple | None:
+    """Parses '#RRGGBB', color names, 'rgb(...)' and 'rgba(r,g,b,0.4)' into an RGBA tuple. Transparent gives None."""
+    if color_value is None:
+        return None
+    if isinstance(color_value, (tuple, list)):
+        rgba = tuple(int(c) for c in color_value)
+        return rgba if len(rgba) == 4 else rgba + (255,)
+    color_str = str(color_value).strip()
+    if color_str.lower() in ("", "transparent", "none"):
+        return None
+    rgba_match = re.fullmatch(r"rgba\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*([\d.]+)\s*\)", color_str, re.IGNORECASE)
+    if rgba_match:
+        r, g, b = (int(rgba_match.group(i)) for i in range(1, 4))
+        alpha_value = float(rgba_match.group(4))
+        alpha = int(round(alpha_value * 255)) if alpha_value <= 1.0 else int(alpha_value) # CSS style 0-1, or 0-255
+        return (r, g, b, max(0, min(alpha, 255)))
+    rgba = ImageColor.getrgb(color_str)
+    return rgba if len(rgba) == 4 else rgba + (255,)
+
+def _wrap_text(text: str, font: ImageFont.FreeTypeFont, max_line_width: int | None) -> list[str]:
+    """Greedy word wrap that keeps explicit line breaks. Words wider than the box get a line of their own."""
+    lines = []
+    for paragraph in text.splitlines() or [""]:
+        words = paragraph.split()
+        if max_line_width is None or not words:
+            lines.append(" ".join(words))
+            continue
+        current_line = words[0]
+        for word in words[1:]:
+            candidate = f"{current_line} {word}"
+            if font.getlength(candidate) <= max_line_width:
+                current_line = candidate
+            else:
+                lines.append(current_line)
+                current_line = word
+        lines.append(current_line)
+    return lines
+
+def horizontal_alignment(align_value: str | None) -> str:
+    """Maps TextClip/ImageMagick gravity values ('center', 'West', 'NorthEast'...) to left/center/right."""
+    align_lower = (align_value or "center").lower()
+    if "west" in align_lower or align_lower == "left": return "left"
+    if "east" in align_lower or align_lower == "right": return "right"
+    return "center"
+
+def render_text_rgba(text: str, style_options: dict, box_width: int | None = None) -> np.ndarray:
+    """
+    Rasterizes subtitle text in-process with FreeType and returns an RGBA uint8 array.
+    Takes the same style dict as the TextClip path ('font', 'fontsize', 'color', 'stroke_color',
+    'stroke_width', 'bg_color', 'method', 'align'). With method 'caption' the text is wrapped to
+    box_width and the background box spans the full width, like ImageMagick's caption: mode.
+    """
+    fontsize = max(1, int(style_options.get('fontsize', 24)))
+    font = _load_font(style_options.get('font', DEFAULT_FONT_NAME), fontsize)
+    fill_rgba = parse_color(style_options.get('color', 'white')) or (255, 255, 255, 255)
+    stroke_width = float(style_options.get('stroke_width', 0) or 0)
+    stroke_rgba = parse_color(style_options.get('stroke_color')) if stroke_width > 0 else None
+    stroke_px = int(math.ceil(stroke_width)) if stroke_rgba else 0
+    bg_rgba = parse_color(style_options.get('bg_color'))
+    alignment = horizontal_alignment(style_options.get('align'))
+
+    wrap_to_box = style_options.get('method', 'caption') == 'caption' and box_width
+    lines = _wrap_text(text, font, (box_width - 2 * stroke_px) if wrap_to_box else None)
+
+    ascent, descent = font.getmetrics()
+    line_height = ascent + descent
+    line_widths = [int(math.ceil(font.getlength(line))) for line in lines]
+    canvas_width = int(box_width) if wrap_to_box else max(line_widths + [1]) + 2 * stroke_px
+    canvas_height = len(lines) * line_height + 2 * stroke_px
+
+    # Coverage masks are drawn in 'L' mode and colored afterwards. Drawing straight onto a transparent
+    # RGBA canvas would darken the antialiased edges, because PIL blends color and alpha separately.
+    stroke_mask = Image.new("L", (canvas_width, canvas_height), 0)
+    fill_mask = Image.new("L", (canvas_width, canvas_height), 0)
+    stroke_draw, fill_draw = ImageDraw.Draw(stroke_mask), ImageDraw.Draw(fill_mask)
+    for i, (line, line_width) in enumerate(zip(lines, line_widths)):
+        if not line: continue
+        if alignment == "left": x = stroke_px
+        elif alignment == "right": x = canvas_width - stroke_px - line_width
+        else: x = (canvas_width - line_width) // 2
+        y = stroke_px + i * line_height
+        fill_draw.text((x, y), line, font=font, fill=255)
+        if stroke_px:
+            stroke_draw.text((x, y), line, font=font, fill=255, stroke_width=stroke_px, stroke_fill=255)
+
+    fill_cov = np.asarray(fill_mask, dtype=np.float32) / 255.0
+    if stroke_px:
+        text_alpha = np.maximum(np.asarray(stroke_mask, dtype=np.float32) / 255.0, fill_cov)
+        text_rgb = fill_cov[..., None] * np.array(fill_rgba[:3], np.float32) + (1.0 - fill_cov[..., None]) * np.array(stroke_rgba[:3], np.float32)
+        text_alpha = text_alpha * ((fill_cov * fill_rgba[3] + (1.0 - fill_cov) * stroke_rgba[3]) / 255.0)
+    else:
+        text_alpha = fill_cov * (fill_rgba[3] / 255.0)
+        text_rgb = np.broadcast_to(np.array(fill_rgba[:3], np.float32), fill_cov.shape + (3,))
+
+    if bg_rgba:
+        bg_alpha = bg_rgba[3] / 255.0
+        out_alpha = text_alpha + bg_alpha * (1.0 - text_alpha)
+        safe_alpha = np.where(out_alpha > 0, out_alpha, 1.0)
+        out_rgb = (text_rgb * text_alpha[..., None] + np.array(bg_rgba[:3], np.float32) * (bg_alpha * (1.0 - text_alpha))[..., None]) / safe_alpha[..., None]
+    else:
+        out_alpha, out_rgb = text_alpha, text_rgb
+
+    rgba = np.empty((canvas_height, canvas_width, 4), dtype=np.uint8)
+    rgba[..., :3] = np.clip(out_rgb + 0.5, 0, 255).astype(np.uint8)
+    rgba[..., 3] = np.clip(out_alpha * 255.0 + 0.5, 0, 255).astype(np.uint8)
+    return rgba
+
+
+if __name__ == '__main__':
+    print("--- Testing PIL Text Renderer ---")
+    for family, styles in list_bundled_font_families().items():
+        print(f"  {family}: {', '.join(styles.keys())}")
+    sample_style = {
+        'font': 'Poppins-Bold', 'fontsize': 64, 'color': '#FFFF00',
+        'stroke_color': '#000000', 'stroke_width': 2,
+        'bg_color': 'rgba(0,0,0,0.4)', 'method': 'caption', 'align': 'center'
+    }
+    try:
+        test_rgba = render_text_rgba("Hello World! This line should wrap inside the caption box.", sample_style, box_width=972)
+        print(f"Rendered bitmap: {test_rgba.shape}, max alpha {test_rgba[..., 3].max()}")
+        Image.fromarray(test_rgba, "RGBA").save("_text_renderer_test.png")
+        print("Saved: _text_renderer_test.png")
+    except Exception as e:
+        print(f"Render test failed: {e}")
+        traceback.print_exc()
@@ -0,0 +1,183 @@
+# variant_render.py
+import os
+import json
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import pysrt
+import video_processor
+import output_profiles
+import file_manager
+
+# A/B variants of one story: the narration and its SRT are produced once, every distinct cue bitmap is
+# rasterized once into the shared subtitle cue cache, then each (template, style, profile) variant is
+# rendered in its own worker process, at most max_workers at a time.
+DEFAULT_VARIANT_WORKERS = 0 # 0 = one worker per 2 CPU cores (each render also runs an ffmpeg encoder)
+
+
+def normalize_variant(variant) -> dict:
+    """Accepts a (template, style, profile) tuple or a dict with those keys; style and profile may be None."""
+    if isinstance(variant, dict):
+        return {'template': variant['template'], 'style': variant.get('style'), 'profile': variant.get('profile')}
+    template, style, profile = (tuple(variant) + (None, None))[:3]
+    return {'template': template, 'style': style, 'profile': profile}
+
+def variant_output_path(output_dir: str, id_str: str, variant_index: int) -> str:
+    return os.path.join(output_dir, f"{id_str}_v{variant_index + 1:02d}.mp4")
+
+def prerender_variant_cues(srt_path: str, variants: list[dict]) -> int:
+    """
+    Rasterizes every cue of srt_path once per distinct (scaled style, box width) used by the variants, so the
+    render workers find them in the subtitle cue cache. Returns the number of distinct bitmaps.
+    """
+    subs = pysrt.open(srt_path, encoding='utf-8')
+    cue_texts = {sub_item.text for sub_item in subs if sub_item.end.ordinal > sub_item.start.ordinal}
+    seen_styles = set()
+    bitmap_count = 0
+    for variant in variants:
+        profile = video_processor._resolve_output_profile(variant['profile'])
+        current_style, _ = video_processor._resolve_subtitle_style(variant['style'])
+        current_style = output_profiles.scale_subtitle_style(current_style, profile)
+        box_width = output_profiles.subtitle_box_width(profile)
+        style_key = (json.dumps(current_style, sort_keys=True, default=str), box_width)
+        if style_key in seen_styles:
+            continue
+        seen_styles.add(style_key)
+        for text in cue_texts:
+            video_processor.render_subtitle_bitmap(text, current_style, box_width)
+            bitmap_count += 1
+    return bitmap_count
+
+def prepare_variant_sources(variants: list[dict]) -> int:
+    """
+    Ingests the mezzanine of every distinct (template, profile) source once, before the workers start:
+    template_ingest only serializes ingest within one process, so workers would transcode the same template.
+    Returns the number of distinct sources resolved.
+    """
+    sources = set()
+    for variant in variants:
+        profile = video_processor._resolve_output_profile(variant['profile'])
+        sources.add(output_profiles.resolve_profile_source(variant['template'], profile, True))
+    return len(sources)
+
+def _render_variant(job: dict) -> dict:
+    """Worker process: renders one variant with video_processor.render_final_video."""
+    # Module settings are not inherited by spawned workers
+    video_processor.SUBTITLE_TEXT_ENGINE = job['settings']['subtitle_text_engine']
+    video_processor.SUBTITLE_BURN_BACKEND = job['settings']['burn_backend']
+    video_processor.VIDEO_ENCODER_BACKEND = job['settings']['encoder_backend']
+    variant_start_time = time.perf_counter()
+    try:
+        success = video_processor.render_final_video(
+            job['template'], job['audio_path'], job['srt_path'], job['output_path'], style_options=job['style'],
+            encoder_options=job['encoder_options'], parallel_chunks=1, output_profile=job['profile']
+        )
+    except Exception as e:
+        print(f"Variants - Variant {job['index'] + 1} raised: {e}")
+        traceback.print_exc()
+        success = False
+    return {
+        'index': job['index'], 'template': job['template'], 'profile': job['profile'], 'output_path': job['output_path'],
+        'success': bool(success), 'elapsed': time.perf_counter() - variant_start_time,
+    }
+
+def render_variants(
+    audio_path: str,
+    srt_path: str,
+    variants: list,
+    id_str: str,
+    output_dir: str = None,
+    max_workers: int = None,
+    encoder_options: dict = None,
+    progress_callback=None
+) -> list[dict] | None:
+    """
+    Renders every variant of an already narrated and transcribed story to output_dir (default FINAL_VIDEO_DIR)
+    as <id_str>_vNN.mp4. Returns one result dict per variant in input order, or None if nothing could start.
+    progress_callback(done_count, total_count, result) is called from this thread as variants finish.
+    """
+    for label, path in (("Audio", audio_path), ("SRT file", srt_path)):
+        if not os.path.exists(path):
+            print(f"Error Variants: {label} not found at '{path}'")
+            return None
+    variants = [normalize_variant(v) for v in variants]
+    missing_templates = [v['template'] for v in variants if not os.path.exists(v['template'])]
+    if not variants or missing_templates:
+        print(f"Error Variants: No variants given or templates not found: {missing_templates}")
+        return None
+
+    output_dir = output_dir or file_manager.FINAL_VIDEO_DIR
+    os.makedirs(output_dir, exist_ok=True)
+    cpu_count = os.cpu_count() or 1
+    max_workers = max(1, min(len(variants), max_workers or DEFAULT_VARIANT_WORKERS or cpu_count // 2 or 1))
+    variant_encoder_options = dict(encoder_options or {})
+    variant_encoder_options.setdefault('threads', max(1, cpu_count // max_workers)) # Workers share the cores
+
+    start_time = time.perf_counter()
+    if video_processor.TEMPLATE_MEZZANINE_ENABLED:
+        source_count = prepare_variant_sources(variants)
+        print(f"Variants - {source_count} render sources ready in {time.perf_counter() - start_time:.1f}s.")
+    if video_processor.SUBTITLE_BURN_BACKEND != "libass": # libass rasterizes inside ffmpeg, nothing to share
+        bitmap_count = prerender_variant_cues(srt_path, variants)
+        print(f"Variants - {bitmap_count} cue bitmaps rasterized for {len(variants)} variants in {time.perf_counter() - start_time:.1f}s.")
+
+    settings = {
+        'subtitle_text_engine': video_processor.SUBTITLE_TEXT_ENGINE,
+        'burn_backend': video_processor.SUBTITLE_BURN_BACKEND,
+        'encoder_backend': video_processor.VIDEO_ENCODER_BACKEND,
+    }
+    jobs = [dict(variant, index=i, audio_path=audio_path, srt_path=srt_path, settings=settings,
+                 output_path=variant_output_path(output_dir, id_str, i), encoder_options=variant_encoder_options)
+            for i, variant in enumerate(variants)]
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_render_variant, job) for job in jobs]
+        for done_count, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            results[result['index']] = result
+            if progress_callback: progress_callback(done_count, len(jobs), result)
+
+    succeeded = sum(r['success'] for r in results)
+    print(f"Variants - {succeeded}/{len(jobs)} variants rendered in {time.perf_counter() - start_time:.1f}s with {max_workers} workers.")
+    return results
+
+def render_story_variants(
+    story: str,
+    voice_technical_name: str,
+    variants: list,
+    id_str: str = None,
+    srt_words: int | None = None,
+    whisper_model: str = "base.en",
+    language: str = "en",
+    max_workers: int = None,
+    progress_callback=None
+) -> list[dict] | None:
+    """
+    Synthesizes the narration and its SRT once for story, then renders every (template, style, profile) variant
+    (see render_variants). Returns the per-variant results, or None if TTS or transcription failed.
+    """
+    # Imported here: the model libraries are only needed once per story, not in every render worker
+    import tts_kokoro_module
+    import srt_generator
+    id_str = id_str or file_manager.get_next_id_str()
+    audio_path = os.path.join(file_manager.AUDIO_DIR, f"{id_str}.wav")
+    srt_path = os.path.join(file_manager.SRT_DIR, f"{id_str}.srt")
+    if not tts_kokoro_module.generate_speech_with_voice_name(story, voice_technical_name, audio_path):
+        print("Error Variants: TTS (Speech Generation) failed.")
+        return None
+    if not srt_generator.create_srt_file(audio_path, srt_path, model_size=whisper_model, language=language, max_words_per_segment=srt_words):
+        print("Error Variants: SRT (Subtitle Generation) failed.")
+        return None
+    return render_variants(audio_path, srt_path, variants, id_str, max_workers=max_workers, progress_callback=progress_callback)
+
+
+if __name__ == '__main__':
+    print("--- Testing Variant Rendering ---")
+    test_templates = [t['path'] for t in video_processor.list_video_templates()][:2]
+    test_audio, test_srt = os.path.join(file_manager.AUDIO_DIR, "variant_test.wav"), os.path.join(file_manager.SRT_DIR, "variant_test.srt")
+    if not test_templates or not os.path.exists(test_audio) or not os.path.exists(test_srt):
+        print(f"Needs templates in {video_processor.VIDEO_TEMPLATES_DIR} plus {test_audio} and {test_srt}.")
+    else:
+        test_variants = [(test_templates[0], None, None), (test_templates[-1], {'color': '#FFFF00', 'fontsize': 48}, "square_1080p")]
+        for test_result in render_variants(test_audio, test_srt, test_variants, "variant_test", max_workers=2) or []:
+            print(test_result)
@@ -1,20 +1,81 @@
 # video_processor.py
 import os
+import re
 import traceback
-from moviepy.editor import VideoFileClip, AudioFileClip, TextClip, CompositeVideoClip
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from moviepy.editor import VideoFileClip, AudioFileClip, TextClip
 from moviepy.video.fx.all import loop as vfx_loop
 import pysrt # For parsing SRT files
 from PIL import Image
 import numpy as np 
-
-SUBTITLE_PREVIEW_IMAGE_TEMP_FILE = "_subtitle_preview_image_temp.png" # Unused, remove if not needed by other logic
-PREVIEW_SUBTITLE_HEIGHT = 80 
+import time
+import shutil
+import tempfile
+import subtitle_cache
+import subtitle_compositor
+import ass_subtitles
+import text_renderer
+import ffmpeg_tools
+import template_ingest
+import template_index
+import output_profiles
+import frame_readahead
 
 VIDEO_TEMPLATES_DIR = "video_templates" 
 THUMBNAIL_CACHE_DIR = os.path.join(VIDEO_TEMPLATES_DIR, ".thumbnails_cache") 
 
-COMBINED_PREVIEW_IMAGE_TEMP_FILE = "_combined_preview_temp.png" 
-SUBTITLE_ONLY_PREVIEW_IMAGE_TEMP_FILE = "_subtitle_only_preview_temp.png" 
+# Sizes used by the GUI (main grid, "view all" popup, subtitle preview). A thumbnail cache miss creates all of them at once.
+THUMBNAIL_SIZES = ((128, 227), (160, 284), (360, 640))
+
+# Engine used to rasterize subtitle cues for both burn-in and preview:
+# "imagemagick" (MoviePy TextClip) or "pil" (in-process FreeType with the bundled assets/fonts, see text_renderer.py)
+SUBTITLE_TEXT_ENGINE = "imagemagick"
+SUBTITLE_TEXT_ENGINES = ("imagemagick", "pil")
+
+# Encoder used by the render functions: "moviepy" (write_videofile) or
+# "ffmpeg_pipe" (raw frames streamed into one long-lived ffmpeg process, see ffmpeg_tools.py)
+VIDEO_ENCODER_BACKEND = "moviepy"
+VIDEO_ENCODER_BACKENDS = ("moviepy", "ffmpeg_pipe")
+
+# How subtitles are burned in: "compositor" (cue bitmaps blended in Python, see subtitle_compositor.py) or
+# "libass" (SRT converted to ASS and rendered by ffmpeg's ass filter during the encode, see ass_subtitles.py)
+SUBTITLE_BURN_BACKEND = "compositor"
+SUBTITLE_BURN_BACKENDS = ("compositor", "libass")
+
+# Split the final render into this many keyframe-aligned chunks encoded in parallel worker processes
+# (compositor backend only, see parallel_render.py). 1 renders serially, 0 uses one chunk per CPU core.
+PARALLEL_RENDER_CHUNKS = 1
+
+# "processes" runs a serial compositor render as decoder, compositor and encoder processes exchanging frames
+# through shared memory (see process_pipeline.py); "inline" runs all three in this process.
+RENDER_PIPELINE = "inline"
+RENDER_PIPELINES = ("inline", "processes")
+
+# Rasterize subtitle cues just before they appear and release them once they end, instead of building
+# every cue bitmap up front (see SubtitleCompositor.add_lazy_cue). Keeps render memory flat on long stories.
+SUBTITLE_LAZY_CUES = True
+
+# Decode this many frames ahead on a background thread so decoding overlaps compositing and encoding
+# (see frame_readahead.py). Each frame of depth costs one decoded frame of memory; 0 decodes inline.
+DECODE_READ_AHEAD_FRAMES = frame_readahead.DEFAULT_READ_AHEAD_FRAMES
+
+# Decode templates from their normalized mezzanine (1080x1920, fixed fps, short GOP), see template_ingest.py
+TEMPLATE_MEZZANINE_ENABLED = True
+
+# Extend templates shorter than the narration by stream-copy concatenation instead of vfx_loop
+STREAM_COPY_LOOP_ENABLED = True
+
+# Output format of the render functions when none is passed (see output_profiles.OUTPUT_PROFILES).
+# Templates are cropped/scaled to it while decoding and subtitle sizes are scaled to its frame.
+OUTPUT_PROFILE = output_profiles.DEFAULT_OUTPUT_PROFILE
+
+# Draft renders (see render_draft_video): a quarter of the pixels, half the frame rate, fastest x264 preset
+DRAFT_OUTPUT_PROFILE = "draft_540p"
+DRAFT_ENCODER_OPTIONS = {'preset': 'ultrafast'}
+
+# Output profiles of render_multi_aspect_video: Shorts/TikTok (9:16), Instagram feed (1:1) and YouTube (16:9)
+MULTI_ASPECT_PROFILES = ("vertical_1080p", "square_1080p", "landscape_1080p")
 
 if not os.path.exists(VIDEO_TEMPLATES_DIR):
     os.makedirs(VIDEO_TEMPLATES_DIR)
@@ -24,88 +85,297 @@ if not os.path.exists(THUMBNAIL_CACHE_DIR):
     # print(f"VideoProc - Thumbnail cache directory created: {THUMBNAIL_CACHE_DIR}") # Optional debug
 
 
-def list_video_templates() -> list[str]:
-    """Returns a list of full paths to video files in VIDEO_TEMPLATES_DIR."""
-    video_files = []
+def list_video_templates() -> list[dict]:
+    """
+    Returns metadata records for the video files in VIDEO_TEMPLATES_DIR, sorted by filename.
+    Each record has 'path', 'filename', 'duration', 'fps', 'width', 'height', 'codec', 'keyframes',
+    'size', 'mtime_ns' and 'sha256'. Records come from the persistent index (template_index.py), no decoder is opened.
+    """
     if not os.path.exists(VIDEO_TEMPLATES_DIR):
         print(f"VideoProc - Templates directory '{VIDEO_TEMPLATES_DIR}' not found.")
-        return video_files
+        return []
+    return template_index.refresh_index(VIDEO_TEMPLATES_DIR)
 
-    valid_extensions = ('.mp4', '.mov', '.avi', '.mkv') 
-    for filename in sorted(os.listdir(VIDEO_TEMPLATES_DIR)):
-        if filename.lower().endswith(valid_extensions):
-            video_files.append(os.path.join(VIDEO_TEMPLATES_DIR, filename))
-    return video_files
+def _thumbnail_name_prefix(video_path: str) -> str:
+    """File name prefix of a template's thumbnails; the extension keeps "clip.mp4" and "clip.mov" apart."""
+    base_name, ext = os.path.splitext(os.path.basename(video_path))
+    return f"{base_name}_{ext.lower().lstrip('.')}"
+
+def _thumbnail_cache_path(video_path: str, content_hash: str, time_sec: float, size: tuple) -> str:
+    """Cache file for one thumbnail size. The content hash in the name makes replaced templates miss the cache."""
+    return os.path.join(THUMBNAIL_CACHE_DIR, f"{_thumbnail_name_prefix(video_path)}_{content_hash[:16]}_t{int(round(time_sec * 1000))}_{size[0]}x{size[1]}.png")
+
+def _remove_outdated_thumbnails(video_path: str, content_hash: str):
+    """
+    Deletes cached thumbnails of earlier versions of a template (same file name, different content),
+    plus its thumbnails in the older <stem>_thumb_WxH.png and <stem>_<hash>_... namings without the extension.
+    """
+    stem = os.path.splitext(os.path.basename(video_path))[0]
+    outdated_pattern = re.compile(rf"^{re.escape(_thumbnail_name_prefix(video_path))}_(?!{content_hash[:16]})[0-9a-f]{{16}}_t\d+_\d+x\d+\.png$")
+    legacy_pattern = re.compile(rf"^{re.escape(stem)}_(thumb|[0-9a-f]{{16}}_t\d+)_\d+x\d+\.png$")
+    for filename in os.listdir(THUMBNAIL_CACHE_DIR):
+        if outdated_pattern.match(filename) or legacy_pattern.match(filename):
+            try: os.remove(os.path.join(THUMBNAIL_CACHE_DIR, filename))
+            except OSError: pass
+
+def _create_thumbnail_set(video_path: str, content_hash: str, duration: float, keyframes: list, time_sec: float, sizes: list) -> dict:
+    """Decodes one keyframe and writes every requested size from it. Returns {size: path} for the sizes written."""
+    # Ensure time_sec is within video duration, then use the last keyframe at or before it
+    actual_time_sec = min(time_sec, duration - 0.1) if duration > 0.1 else 0
+    keyframe_time = max((kf for kf in keyframes if kf <= actual_time_sec), default=0.0)
+    frame_image = ffmpeg_tools.extract_keyframe_image(video_path, keyframe_time)
+    if frame_image is None:
+        return {}
+    _remove_outdated_thumbnails(video_path, content_hash)
+    written = {}
+    for size in sizes:
+        size = tuple(size)
+        thumbnail_cache_path = _thumbnail_cache_path(video_path, content_hash, time_sec, size)
+        temp_path = f"{thumbnail_cache_path}.{os.getpid()}.tmp.png"
+        try:
+            frame_image.resize(size, Image.Resampling.LANCZOS).save(temp_path, "PNG")
+            os.replace(temp_path, thumbnail_cache_path) # The GUI thread and batch workers may write the same file
+            written[size] = thumbnail_cache_path
+        except Exception as e:
+            print(f"VideoProc - Error saving thumbnail {thumbnail_cache_path}: {e}")
+            if os.path.exists(temp_path):
+                try: os.remove(temp_path)
+                except OSError: pass
+    # print(f"VideoProc - Thumbnails {list(written)} saved for: {video_path}") # Optional debug
+    return written
 
 def get_or_create_thumbnail(video_path: str, time_sec: float = 1.0, size: tuple = (128, 227)) -> str | None:
-    """Gets a thumbnail from cache or creates and caches it."""
+    """
+    Gets a thumbnail from cache or creates and caches it. The cache is keyed on the file's content hash,
+    and a miss writes all THUMBNAIL_SIZES (plus the requested size) from a single keyframe decode.
+    """
     if not os.path.exists(video_path):
         print(f"VideoProc - Error: Video file not found at {video_path} for thumbnail generation.")
         return None
 
-    video_filename = os.path.basename(video_path)
-    thumbnail_filename = f"{os.path.splitext(video_filename)[0]}_thumb_{size[0]}x{size[1]}.png"
-    thumbnail_cache_path = os.path.join(THUMBNAIL_CACHE_DIR, thumbnail_filename)
-
+    video_info = template_index.get_video_info(video_path) # Hash, duration: no decoder involved
+    if not video_info:
+        print(f"VideoProc - Error generating thumbnail for {video_path}: unreadable video.")
+        return None
+    size = tuple(size)
+    thumbnail_cache_path = _thumbnail_cache_path(video_path, video_info['sha256'], time_sec, size)
     if os.path.exists(thumbnail_cache_path):
         return thumbnail_cache_path
-    
+
     try:
-        # print(f"VideoProc - Generating thumbnail ({size[0]}x{size[1]}) for: {video_filename}...") # Optional debug
-        with VideoFileClip(video_path) as clip:
-            # Ensure time_sec is within video duration
-            actual_time_sec = min(time_sec, clip.duration - 0.1) if clip.duration > 0.1 else 0 
-            frame = clip.get_frame(actual_time_sec) 
-        pil_image = Image.fromarray(frame)
-        pil_image_resized = pil_image.resize(size, Image.Resampling.LANCZOS)
-        pil_image_resized.save(thumbnail_cache_path, "PNG")
-        # print(f"VideoProc - Thumbnail saved to: {thumbnail_cache_path}") # Optional debug
-        return thumbnail_cache_path
+        # print(f"VideoProc - Generating thumbnails for: {os.path.basename(video_path)}...") # Optional debug
+        sizes = list(THUMBNAIL_SIZES) + ([size] if size not in THUMBNAIL_SIZES else [])
+        return _create_thumbnail_set(video_path, video_info['sha256'], video_info['duration'], video_info['keyframes'], time_sec, sizes).get(size)
     except Exception as e:
         print(f"VideoProc - Error generating thumbnail for {video_path}: {e}")
         traceback.print_exc()
         return None
 
-def create_narrated_video(video_path: str, audio_path: str, output_path: str) -> bool:
+def _thumbnail_batch_worker(video_path: str, content_hash: str, duration: float, keyframes: list, time_sec: float, sizes: list) -> int:
+    """Process pool entry point for create_thumbnails_for_templates."""
+    try:
+        return len(_create_thumbnail_set(video_path, content_hash, duration, keyframes, time_sec, sizes))
+    except Exception as e:
+        print(f"VideoProc - Error generating thumbnails for {video_path}: {e}")
+        return 0
+
+def create_thumbnails_for_templates(time_sec: float = 1.0, sizes: tuple = None, max_workers: int = None) -> int:
+    """
+    Fills the thumbnail cache for every template in list_video_templates() using a process pool.
+    Templates whose thumbnails are all cached are skipped. Returns the number of thumbnail files written.
+    """
+    sizes = [tuple(sz) for sz in (sizes or THUMBNAIL_SIZES)]
+    pending = [
+        record for record in list_video_templates()
+        if not all(os.path.exists(_thumbnail_cache_path(record['path'], record['sha256'], time_sec, sz)) for sz in sizes)
+    ]
+    if not pending:
+        return 0
+    max_workers = max(1, min(len(pending), max_workers or os.cpu_count() or 1))
+    start_time = time.perf_counter()
+    written = 0
+    # Spawned, not forked: the GUI calls this from a worker thread of a process that already runs Tk
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [
+            executor.submit(_thumbnail_batch_worker, record['path'], record['sha256'], record['duration'], record['keyframes'], time_sec, sizes)
+            for record in pending
+        ]
+        for future in as_completed(futures):
+            written += future.result()
+    print(f"VideoProc - Created {written} thumbnails for {len(pending)} templates in {time.perf_counter() - start_time:.1f}s.")
+    return written
+
+def _fit_clip_to_duration(video_clip, target_duration: float):
+    """Loops or cuts a video clip so that it lasts exactly target_duration seconds."""
+    if target_duration > video_clip.duration:
+        # print(f"VideoProc - Audio ({target_duration:.2f}s) > Video ({video_clip.duration:.2f}s). Looping video.") # Optional debug
+        return vfx_loop(video_clip, duration=target_duration) # Loop already sets duration
+    elif target_duration < video_clip.duration:
+        # print(f"VideoProc - Audio ({target_duration:.2f}s) < Video ({video_clip.duration:.2f}s). Cutting video.") # Optional debug
+        return video_clip.subclip(0, target_duration)
+    return video_clip
+
+def _resolve_output_profile(output_profile=None) -> dict:
+    return output_profiles.get_output_profile(output_profile or OUTPUT_PROFILE)
+
+def _open_video_clip(video_path: str, profile: dict | None, audio: bool = False):
+    """Opens video_path decoded at the profile's size and fps (video only), or as it is when profile is None."""
+    if profile is not None:
+        return output_profiles.ProfileVideoClip(video_path, profile)
+    return VideoFileClip(video_path, audio=audio)
+
+def _open_background_clip(video_path: str, target_duration: float, scratch_dir: str | None, audio: bool = True, profile: dict = None) -> tuple:
+    """
+    Opens a template and fits it to target_duration. Returns (source_clip, fitted_clip); close both.
+    Templates shorter than target_duration are first extended at the container level with
+    ffmpeg_tools.build_stream_copy_loop (written into scratch_dir), so only the final pass decodes pixels.
+    Falls back to vfx_loop if the stream-copy loop cannot be built.
+    With TEMPLATE_MEZZANINE_ENABLED the template's mezzanine is decoded instead of the original (the
+    mezzanine has no audio track, so audio=True is only honoured for the original).
+    With a profile (see output_profiles) frames are cropped/scaled/resampled while decoding and no audio is read.
+    """
+    if profile is not None:
+        video_path = output_profiles.resolve_profile_source(video_path, profile, TEMPLATE_MEZZANINE_ENABLED)
+        audio = False
+    elif TEMPLATE_MEZZANINE_ENABLED:
+        source_path = template_ingest.resolve_render_source(video_path)
+        if source_path != video_path: audio = False
+        video_path = source_path
+    video_info = template_index.get_video_info(video_path) # Duration and keyframes without opening a decoder
+    if (STREAM_COPY_LOOP_ENABLED and scratch_dir and video_info and video_info['duration'] > 0
+            and target_duration > video_info['duration'] + 0.05):
+        looped_path = os.path.join(scratch_dir, f"looped_{os.path.splitext(os.path.basename(video_path))[0]}.mkv")
+        frame_duration = 1.0 / (video_info['fps'] or 24)
+        if ffmpeg_tools.build_stream_copy_loop(video_path, target_duration, looped_path, video_info['duration'], keyframe_times=video_info['keyframes'] or None):
+            looped_clip = _open_video_clip(looped_path, profile)
+            if looped_clip.duration >= target_duration - frame_duration:
+                # print(f"VideoProc - Using stream-copy loop ({looped_clip.duration:.2f}s) for {video_path}") # Optional debug
+                return looped_clip, _fit_clip_to_duration(looped_clip, target_duration)
+            print(f"VideoProc - Stream-copy loop too short ({looped_clip.duration:.2f}s < {target_duration:.2f}s), using vfx_loop.")
+            looped_clip.close()
+        else:
+            print("VideoProc - Stream-copy loop failed, using vfx_loop.")
+
+    video_clip = _open_video_clip(video_path, profile, audio=audio)
+    return video_clip, _fit_clip_to_duration(video_clip, target_duration)
+
+def _with_read_ahead(clip, fps: float, depth: int = None):
+    """Returns clip decoded DECODE_READ_AHEAD_FRAMES (or depth) frames ahead on a background thread; close it after encoding."""
+    depth = DECODE_READ_AHEAD_FRAMES if depth is None else depth
+    if not depth:
+        return clip
+    return frame_readahead.ReadAheadClip(clip, fps, depth)
+
+def _create_scratch_dir(output_path: str) -> str:
+    """Creates a per-job scratch directory next to the output file. Remove it with _remove_scratch_dir."""
+    return tempfile.mkdtemp(prefix="render_scratch_", dir=os.path.dirname(os.path.abspath(output_path)))
+
+def _remove_scratch_dir(scratch_dir: str | None):
+    if scratch_dir and os.path.exists(scratch_dir):
+        try: shutil.rmtree(scratch_dir)
+        except Exception as e: print(f"VideoProc - Warning: Failed to delete scratch directory {scratch_dir}: {e}")
+
+def _prepare_audio_track(source_path: str, scratch_dir: str, encoder_options: dict = None, stream_copy: bool = False) -> str | None:
+    """
+    Writes the audio track render stages mux with stream copy into scratch_dir.
+    The narration WAV is encoded here (the only lossy audio generation of a job); with stream_copy the
+    already encoded track of a previous stage's output is copied out instead. Returns None if there is no audio.
+    """
+    track_path = os.path.join(scratch_dir, "audio_track.m4a")
+    track_options = dict(encoder_options or {}, audio_codec='copy' if stream_copy else None)
+    if not ffmpeg_tools.write_audio_track(source_path, track_path, encoder_options=track_options):
+        print(f"VideoProc - Could not prepare the audio track of {os.path.basename(source_path)}.")
+        return None
+    return track_path
+
+def _write_video_clip(
+    final_clip,
+    output_path: str,
+    fps: float,
+    audio_track_path: str | None,
+    encoder_backend: str = None,
+    encoder_options: dict = None
+) -> bool:
+    """
+    Encodes final_clip with the selected backend and reports the achieved frames per second.
+    encoder_options may set 'preset', 'crf', 'pix_fmt' and 'threads' for either backend.
+    The clip's own audio is never decoded: audio_track_path (see _prepare_audio_track) is muxed with stream copy.
+    """
+    backend = encoder_backend or VIDEO_ENCODER_BACKEND
+    if backend not in VIDEO_ENCODER_BACKENDS:
+        print(f"VideoProc - Unknown encoder backend '{backend}', using 'moviepy'.")
+        backend = "moviepy"
+    options = encoder_options or {}
+    start_time = time.perf_counter()
+
+    if backend == "ffmpeg_pipe":
+        success = ffmpeg_tools.encode_clip_with_pipe(final_clip, output_path, fps, audio_path=audio_track_path,
+                                                     encoder_options=dict(options, audio_codec='copy'))
+    else:
+        ffmpeg_params = []
+        if options.get('crf') is not None and not options.get('video_bitrate'): ffmpeg_params += ['-crf', str(options['crf'])]
+        if options.get('pix_fmt'): ffmpeg_params += ['-pix_fmt', options['pix_fmt']]
+        final_clip.write_videofile(
+            output_path, codec="libx264",
+            audio=audio_track_path or False, # A file name makes MoviePy mux it with -acodec copy
+            preset=options.get('preset', 'medium'),
+            bitrate=options.get('video_bitrate'),
+            ffmpeg_params=ffmpeg_params or None,
+            threads=options.get('threads') or os.cpu_count() or 4, # Use available cores or default to 4
+            fps=fps
+        )
+        success = True
+
+    elapsed = time.perf_counter() - start_time
+    total_frames = int(round(final_clip.duration * fps)) if final_clip.duration else 0
+    if success and elapsed > 0:
+        print(f"VideoProc - {backend} encode of {os.path.basename(output_path)}: {total_frames} frames in {elapsed:.1f}s ({total_frames / elapsed:.1f} fps)")
+    return success
+
+def create_narrated_video(
+    video_path: str,
+    audio_path: str,
+    output_path: str,
+    encoder_backend: str = None,
+    encoder_options: dict = None,
+    output_profile=None
+) -> bool:
     """
     Combines a video file with an audio file.
     Original video audio is replaced. Video duration is adjusted to audio duration.
+    The video is cropped/scaled to output_profile (default OUTPUT_PROFILE) while decoding.
     """
     try:
         # print(f"VideoProc - Starting combination: Video='{video_path}', Audio='{audio_path}'") # Optional debug
+        profile = _resolve_output_profile(output_profile)
+        encoder_options = output_profiles.profile_encoder_options(profile, encoder_options)
 
-        video_clip = VideoFileClip(video_path)
         audio_clip = AudioFileClip(audio_path)
-
-        video_clip = video_clip.set_audio(audio_clip) # More direct way to set audio
+        scratch_dir = _create_scratch_dir(output_path)
 
         # Adjust video duration to match audio
-        if audio_clip.duration > video_clip.duration:
-            # print(f"VideoProc - Audio ({audio_clip.duration:.2f}s) > Video ({video_clip.duration:.2f}s). Looping video.") # Optional debug
-            final_video_clip = vfx_loop(video_clip, duration=audio_clip.duration)
-            # final_video_clip = final_video_clip.set_duration(audio_clip.duration) # Loop already sets duration
-        elif audio_clip.duration < video_clip.duration:
-            # print(f"VideoProc - Audio ({audio_clip.duration:.2f}s) < Video ({video_clip.duration:.2f}s). Cutting video.") # Optional debug
-            final_video_clip = video_clip.subclip(0, audio_clip.duration)
-        else:
-            final_video_clip = video_clip
+        video_clip, final_video_clip = _open_background_clip(video_path, audio_clip.duration, scratch_dir, audio=False, profile=profile)
+        final_video_clip = _with_read_ahead(final_video_clip, profile['fps'])
+        final_video_clip = final_video_clip.set_audio(audio_clip) # Original video audio is replaced
+        audio_track_path = _prepare_audio_track(audio_path, scratch_dir, encoder_options)
+        if audio_track_path is None:
+            raise Exception("Encoding the narration audio failed.")
 
         # print(f"VideoProc - Writing narrated video to: {output_path}") # Optional debug
-        final_video_clip.write_videofile(
-            output_path, 
-            codec="libx264", 
-            audio_codec="aac",
-            temp_audiofile=f'temp-audio-{os.path.basename(output_path)}.m4a', # Unique temp audio file
-            remove_temp=True,
-            threads=os.cpu_count() or 4, # Use available cores or default to 4
-            fps=video_clip.fps if video_clip.fps else 24 # Use original FPS or default
-        )
+        if not _write_video_clip(
+            final_video_clip, output_path,
+            fps=profile['fps'],
+            audio_track_path=audio_track_path,
+            encoder_backend=encoder_backend, encoder_options=encoder_options
+        ):
+            raise Exception("Encoder failed to write the narrated video.")
 
         # Close clips
         video_clip.close()
         audio_clip.close()
         if final_video_clip != video_clip: # If a new clip object was created (loop/subclip)
             final_video_clip.close()
+        _remove_scratch_dir(scratch_dir)
         
         # print("VideoProc - Audio and video combination complete.") # Optional debug
         return True
@@ -117,26 +387,15 @@ def create_narrated_video(video_path: str, audio_path: str, output_path: str) ->
         if 'video_clip' in locals() and hasattr(video_clip, 'close'): video_clip.close()
         if 'audio_clip' in locals() and hasattr(audio_clip, 'close'): audio_clip.close()
         if 'final_video_clip' in locals() and final_video_clip != video_clip and hasattr(final_video_clip, 'close'): final_video_clip.close()
+        if 'scratch_dir' in locals(): _remove_scratch_dir(scratch_dir)
         return False
 
 def srt_time_to_seconds(srt_time_obj) -> float:
     """Converts a pysrt time object to total seconds."""
     return srt_time_obj.hours * 3600 + srt_time_obj.minutes * 60 + srt_time_obj.seconds + srt_time_obj.milliseconds / 1000.0
 
-def burn_subtitles_on_video(
-    video_path: str, 
-    srt_path: str, 
-    output_path: str,
-    style_options: dict = None 
-) -> bool:
-    """Burns subtitles from an SRT file onto a video."""
-    if not os.path.exists(video_path):
-        print(f"Error SubBurn: Input video not found at '{video_path}'")
-        return False
-    if not os.path.exists(srt_path):
-        print(f"Error SubBurn: SRT file not found at '{srt_path}'")
-        return False
-
+def _resolve_subtitle_style(style_options: dict = None) -> tuple[dict, tuple]:
+    """Merges style_options over the default subtitle style and resolves the MoviePy position tuple."""
     default_style = {
         'font': 'Arial', 'fontsize': 24, 'color': 'white',
         'stroke_color': 'black', 'stroke_width': 1, 
@@ -158,64 +417,192 @@ def burn_subtitles_on_video(
         "Bottom": ('center', 0.85) # Default if choice is invalid
     }
     actual_pos_tuple = pos_map.get(position_choice, ('center', 0.85))
+    return current_style, actual_pos_tuple
+
+def _rasterize_subtitle_textclip(text: str, current_style: dict, box_width: int | None) -> np.ndarray:
+    """Renders one cue with ImageMagick (TextClip) and returns it as an RGBA uint8 array."""
+    textclip_creation_args = {
+        'txt': text,
+        # Bundled fonts (assets/fonts) are passed to ImageMagick by file path
+        'font': text_renderer.resolve_font_path(current_style['font']) or current_style['font'],
+        'fontsize': int(current_style['fontsize']),
+        'color': current_style['color'],
+        'bg_color': current_style['bg_color'],
+        'stroke_color': current_style['stroke_color'],
+        'stroke_width': float(current_style['stroke_width']),
+        'method': current_style['method'], # 'caption' for auto-wrap
+        'align': current_style['align']   # Alignment within the text box
+    }
+    if current_style['method'] == 'caption':
+        textclip_creation_args['size'] = (box_width, None) # Fixed width, auto height
+    if textclip_creation_args['stroke_width'] == 0:
+        # ImageMagick still draws a hairline outline with a stroke color and zero width
+        textclip_creation_args.pop('stroke_color', None)
+        textclip_creation_args.pop('stroke_width', None)
+
+    with TextClip(**textclip_creation_args) as txt_clip:
+        rgb = txt_clip.get_frame(0)
+        if txt_clip.mask is not None:
+            alpha = np.round(txt_clip.mask.get_frame(0) * 255).astype(np.uint8)
+        else:
+            alpha = np.full(rgb.shape[:2], 255, dtype=np.uint8)
+    return np.dstack([rgb.astype(np.uint8), alpha])
+
+def render_subtitle_bitmap(text: str, current_style: dict, box_width: int | None, engine: str = None, use_disk: bool = True) -> np.ndarray:
+    """
+    Returns the RGBA bitmap of a subtitle cue, served from the persistent cue cache when the same
+    text has already been rendered with the same style, box width and engine.
+    With use_disk=False the bitmap is only kept in the in-memory tier (previews never touch disk).
+    """
+    engine = engine or SUBTITLE_TEXT_ENGINE
+    if engine not in SUBTITLE_TEXT_ENGINES:
+        print(f"VideoProc - Unknown subtitle text engine '{engine}', using 'imagemagick'.")
+        engine = "imagemagick"
+    rasterize = text_renderer.render_text_rgba if engine == "pil" else _rasterize_subtitle_textclip
+    cache_key = subtitle_cache.make_cache_key(text, current_style, box_width, engine=engine)
+    return subtitle_cache.get_default_cache().get_or_create(
+        cache_key, lambda: rasterize(text, current_style, box_width), use_disk=use_disk
+    )
+
+def _build_subtitle_compositor(subs, frame_size: tuple, current_style: dict, actual_pos_tuple: tuple, box_width_ratio: float, lazy: bool = None) -> subtitle_compositor.SubtitleCompositor:
+    """
+    Creates an interval-indexed compositor with one positioned, timed bitmap per SRT cue, wrapped at
+    box_width_ratio of the frame width (see output_profiles.subtitle_box_width_ratio).
+    With lazy (default SUBTITLE_LAZY_CUES) the bitmaps are only rasterized while their cue is near the playhead.
+    """
+    lazy = SUBTITLE_LAZY_CUES if lazy is None else lazy
+    compositor = subtitle_compositor.SubtitleCompositor(frame_size)
+    text_clip_w = int(frame_size[0] * box_width_ratio) # Width for the text clip box
+
+    def render_cue(text: str) -> tuple:
+        cue_rgba = render_subtitle_bitmap(text, current_style, text_clip_w)
+        return cue_rgba, subtitle_compositor.resolve_cue_position(actual_pos_tuple, (cue_rgba.shape[1], cue_rgba.shape[0]), frame_size)
 
+    for sub_item in subs:
+        start_s = srt_time_to_seconds(sub_item.start)
+        end_s = srt_time_to_seconds(sub_item.end)
+        
+        if end_s - start_s <= 0: continue
+
+        if lazy:
+            compositor.add_lazy_cue(start_s, end_s, lambda text=sub_item.text: render_cue(text))
+        else:
+            compositor.add_cue(start_s, end_s, *render_cue(sub_item.text))
+    return compositor
+
+def _resolve_burn_backend(burn_backend: str = None) -> str:
+    burn_backend = burn_backend or SUBTITLE_BURN_BACKEND
+    if burn_backend not in SUBTITLE_BURN_BACKENDS:
+        print(f"VideoProc - Unknown subtitle burn backend '{burn_backend}', using 'compositor'.")
+        burn_backend = "compositor"
+    return burn_backend
+
+def _burn_with_libass(
+    video_path: str,
+    srt_path: str,
+    output_path: str,
+    current_style: dict,
+    actual_pos_tuple: tuple,
+    profile: dict,
+    audio_path: str = None,
+    duration: float = None,
+    encoder_options: dict = None,
+    require_cues: bool = False,
+    log_prefix: str = "SubBurn"
+) -> bool:
+    """
+    Converts the SRT to ASS in a scratch directory and lets ffmpeg burn it in while encoding video_path.
+    The profile's crop/scale/fps filter runs in the same filter graph, ahead of the ass filter.
+    video_path may be a narrated intermediate, so it is probed directly instead of going through the template index.
+    """
+    video_info = ffmpeg_tools.probe_video_info(video_path)
+    if not video_info:
+        print(f"{log_prefix} - Could not read video metadata of '{video_path}'.")
+        return False
+    scratch_dir = _create_scratch_dir(output_path)
+    try:
+        ass_path = os.path.join(scratch_dir, "subtitles.ass")
+        frame_size = output_profiles.profile_size(profile)
+        if not ass_subtitles.write_ass_file(srt_path, current_style, actual_pos_tuple, frame_size, ass_path,
+                                            box_width_ratio=output_profiles.subtitle_box_width_ratio(profile)):
+            print(f"{log_prefix} - No subtitle cues were converted to ASS. Check SRT content or timing.")
+            if require_cues: return False
+        loop_video = bool(duration and video_info['duration'] and duration > video_info['duration'])
+        return ffmpeg_tools.burn_ass_subtitles(
+            video_path, ass_path, output_path, audio_path=audio_path, duration=duration,
+            loop_video=loop_video, fonts_dir=text_renderer.FONTS_DIR, encoder_options=encoder_options,
+            pre_filter=output_profiles.decode_filter(profile)
+        )
+    finally:
+        _remove_scratch_dir(scratch_dir)
+
+def burn_subtitles_on_video(
+    video_path: str, 
+    srt_path: str, 
+    output_path: str,
+    style_options: dict = None,
+    encoder_backend: str = None,
+    encoder_options: dict = None,
+    burn_backend: str = None,
+    output_profile=None
+) -> bool:
+    """
+    Burns subtitles from an SRT file onto a video. burn_backend selects "compositor" or "libass" (see SUBTITLE_BURN_BACKEND).
+    The video is cropped/scaled to output_profile (default OUTPUT_PROFILE) while decoding; subtitle sizes follow the profile.
+    """
+    if not os.path.exists(video_path):
+        print(f"Error SubBurn: Input video not found at '{video_path}'")
+        return False
+    if not os.path.exists(srt_path):
+        print(f"Error SubBurn: SRT file not found at '{srt_path}'")
+        return False
 
+    profile = _resolve_output_profile(output_profile)
+    encoder_options = output_profiles.profile_encoder_options(profile, encoder_options)
+    current_style, actual_pos_tuple = _resolve_subtitle_style(style_options)
+    current_style = output_profiles.scale_subtitle_style(current_style, profile)
+
+    if _resolve_burn_backend(burn_backend) == "libass":
+        # The input already carries the encoded narration (see create_narrated_video), copy it through
+        return _burn_with_libass(video_path, srt_path, output_path, current_style, actual_pos_tuple, profile,
+                                 encoder_options=dict(encoder_options, audio_codec='copy'), require_cues=True, log_prefix="SubBurn")
+
+    scratch_dir = _create_scratch_dir(output_path)
     try:
         # print(f"SubBurn - Starting. Video: '{video_path}', SRT: '{srt_path}'") # Optional debug
         # print(f"SubBurn - Style options: {current_style}, Final position: {actual_pos_tuple}") # Optional debug
 
-        main_video_clip = VideoFileClip(video_path)
-        video_width, video_height = main_video_clip.size
+        main_video_clip = _open_video_clip(video_path, profile)
 
         subs = pysrt.open(srt_path, encoding='utf-8')
         
-        subtitle_clips = []
-        for sub_item in subs:
-            start_s = srt_time_to_seconds(sub_item.start)
-            end_s = srt_time_to_seconds(sub_item.end)
-            duration_s = end_s - start_s
-            
-            if duration_s <= 0: continue
-
-            text_clip_w = int(video_width * 0.90) # Width for the text clip box
-            
-            textclip_creation_args = {
-                'txt': sub_item.text,
-                'font': current_style['font'],
-                'fontsize': int(current_style['fontsize']),
-                'color': current_style['color'],
-                'bg_color': current_style['bg_color'],
-                'stroke_color': current_style['stroke_color'],
-                'stroke_width': float(current_style['stroke_width']),
-                'method': current_style['method'], # 'caption' for auto-wrap
-                'align': current_style['align']   # Alignment within the text box
-            }
-            if current_style['method'] == 'caption':
-                textclip_creation_args['size'] = (text_clip_w, None) # Fixed width, auto height
+        compositor = _build_subtitle_compositor(subs, tuple(main_video_clip.size), current_style, actual_pos_tuple,
+                                                output_profiles.subtitle_box_width_ratio(profile))
 
-            txt_clip = TextClip(**textclip_creation_args)
-            txt_clip = txt_clip.set_position(actual_pos_tuple, relative=True).set_duration(duration_s).set_start(start_s)
-            subtitle_clips.append(txt_clip)
-
-        if not subtitle_clips:
+        if not compositor.cue_count:
             print("SubBurn - No subtitle clips were generated. Check SRT content or timing.")
             main_video_clip.close()
             return False 
 
-        # print(f"SubBurn - Compositing video with {len(subtitle_clips)} subtitles.") # Optional debug
-        final_video = CompositeVideoClip([main_video_clip] + subtitle_clips, size=main_video_clip.size).set_audio(main_video_clip.audio)
+        # print(f"SubBurn - Compositing video with {compositor.cue_count} subtitles.") # Optional debug
+        decoded_clip = _with_read_ahead(main_video_clip, profile['fps'])
+        final_video = compositor.apply_to(decoded_clip)
         
+        # The input video already carries the encoded narration; it is copied out and muxed back without re-encoding
+        input_info = ffmpeg_tools.probe_video_info(video_path)
+        audio_track_path = _prepare_audio_track(video_path, scratch_dir, stream_copy=True) if input_info and input_info['has_audio'] else None
+
         # print(f"SubBurn - Writing video with burned subtitles to: {output_path}") # Optional debug
-        final_video.write_videofile(
-            output_path, codec="libx264", audio_codec="aac",
-            temp_audiofile=f'temp-subburn-audio-{os.path.basename(output_path)}.m4a', # Unique temp audio
-            remove_temp=True,
-            threads=os.cpu_count() or 4, fps=main_video_clip.fps if main_video_clip.fps else 24
-        )
+        if not _write_video_clip(
+            final_video, output_path,
+            fps=profile['fps'],
+            audio_track_path=audio_track_path,
+            encoder_backend=encoder_backend, encoder_options=encoder_options
+        ):
+            raise Exception("Encoder failed to write the subtitled video.")
         
+        decoded_clip.close()
         main_video_clip.close()
-        for tc in subtitle_clips: tc.close() # TextClips should be closed
-        final_video.close()
 
         # print("SubBurn - Subtitle burning process completed.") # Optional debug
         return True
@@ -223,111 +610,252 @@ def burn_subtitles_on_video(
     except Exception as e:
         print(f"Error SubBurn - An error occurred while burning subtitles: {e}")
         traceback.print_exc()
+        if 'decoded_clip' in locals() and decoded_clip != main_video_clip: decoded_clip.close()
         if 'main_video_clip' in locals() and hasattr(main_video_clip, 'close'): main_video_clip.close()
-        if 'subtitle_clips' in locals(): 
-            for tc in subtitle_clips: 
-                if hasattr(tc, 'close'): tc.close()
-        if 'final_video' in locals() and hasattr(final_video, 'close'): final_video.close()
+        return False
+    finally:
+        _remove_scratch_dir(scratch_dir)
+
+def render_final_video(
+    video_path: str,
+    audio_path: str,
+    srt_path: str,
+    output_path: str,
+    style_options: dict = None,
+    encoder_backend: str = None,
+    encoder_options: dict = None,
+    burn_backend: str = None,
+    parallel_chunks: int = None,
+    output_profile=None,
+    render_pipeline: str = None
+) -> bool:
+    """
+    Renders the final video in a single decode/encode pass.
+    The background template is looped or cut to the narration length, the narration
+    replaces the original audio and the SRT cues are burned in, all in one encode.
+    With burn_backend "libass" the whole pass runs inside one ffmpeg process.
+    parallel_chunks (default PARALLEL_RENDER_CHUNKS) other than 1 renders segmented across worker processes.
+    render_pipeline (default RENDER_PIPELINE) "processes" splits a serial render into decode/composite/encode processes.
+    output_profile (a name from output_profiles.OUTPUT_PROFILES or a profile dict, default OUTPUT_PROFILE) sets the
+    output size, fps and rate control; the template is cropped/scaled to it while decoding.
+    """
+    for label, path in (("Background video", video_path), ("Audio", audio_path), ("SRT file", srt_path)):
+        if not os.path.exists(path):
+            print(f"Error Render: {label} not found at '{path}'")
+            return False
+
+    profile = _resolve_output_profile(output_profile)
+    current_style, actual_pos_tuple = _resolve_subtitle_style(style_options)
+    current_style = output_profiles.scale_subtitle_style(current_style, profile)
+
+    if _resolve_burn_backend(burn_backend) == "libass":
+        try:
+            with AudioFileClip(audio_path) as audio_clip:
+                narration_duration = audio_clip.duration
+        except Exception as e:
+            print(f"Error Render - Could not read narration audio '{audio_path}': {e}")
+            return False
+        source_path = output_profiles.resolve_profile_source(video_path, profile, TEMPLATE_MEZZANINE_ENABLED)
+        return _burn_with_libass(source_path, srt_path, output_path, current_style, actual_pos_tuple, profile,
+                                 audio_path=audio_path, duration=narration_duration,
+                                 encoder_options=output_profiles.profile_encoder_options(profile, encoder_options), log_prefix="Render")
+
+    parallel_chunks = PARALLEL_RENDER_CHUNKS if parallel_chunks is None else parallel_chunks
+    if parallel_chunks != 1:
+        import parallel_render # Imported here, parallel_render itself builds on this module
+        return parallel_render.render_final_video_parallel(video_path, audio_path, srt_path, output_path, style_options=style_options,
+                                                           chunk_count=parallel_chunks or None, encoder_options=encoder_options,
+                                                           output_profile=profile)
+
+    render_pipeline = render_pipeline or RENDER_PIPELINE
+    if render_pipeline not in RENDER_PIPELINES:
+        print(f"Render - Unknown render pipeline '{render_pipeline}', using 'inline'.")
+        render_pipeline = "inline"
+    if render_pipeline == "processes":
+        import process_pipeline # Imported here, process_pipeline itself builds on this module
+        return process_pipeline.render_final_video_pipelined(video_path, audio_path, srt_path, output_path, style_options=style_options,
+                                                             encoder_options=encoder_options, output_profile=profile)
+
+    encoder_options = output_profiles.profile_encoder_options(profile, encoder_options)
+
+    try:
+        # print(f"Render - Starting. Video: '{video_path}', Audio: '{audio_path}', SRT: '{srt_path}'") # Optional debug
+        audio_clip = AudioFileClip(audio_path)
+        scratch_dir = _create_scratch_dir(output_path)
+        # Template audio is discarded, no need to decode it
+        video_clip, background_clip = _open_background_clip(video_path, audio_clip.duration, scratch_dir, audio=False, profile=profile)
+
+        subs = pysrt.open(srt_path, encoding='utf-8')
+        compositor = _build_subtitle_compositor(subs, tuple(background_clip.size), current_style, actual_pos_tuple,
+                                                output_profiles.subtitle_box_width_ratio(profile))
+        if not compositor.cue_count:
+            print("Render - Warning: No subtitle clips were generated. Check SRT content or timing.")
+
+        decoded_clip = _with_read_ahead(background_clip, profile['fps'])
+        final_video = compositor.apply_to(decoded_clip)
+        final_video = final_video.set_duration(audio_clip.duration).set_audio(audio_clip)
+        audio_track_path = _prepare_audio_track(audio_path, scratch_dir, encoder_options)
+        if audio_track_path is None:
+            raise Exception("Encoding the narration audio failed.")
+
+        # print(f"Render - Writing final video with {compositor.cue_count} subtitles to: {output_path}") # Optional debug
+        if not _write_video_clip(
+            final_video, output_path,
+            fps=profile['fps'],
+            audio_track_path=audio_track_path,
+            encoder_backend=encoder_backend, encoder_options=encoder_options
+        ):
+            raise Exception("Encoder failed to write the final video.")
+
+        decoded_clip.close()
+        video_clip.close()
+        audio_clip.close()
+        if background_clip != video_clip: background_clip.close()
+        _remove_scratch_dir(scratch_dir)
+
+        # print("Render - Final video completed.") # Optional debug
+        return True
+
+    except Exception as e:
+        print(f"Error Render - An error occurred while rendering the final video: {e}")
+        traceback.print_exc()
+        if 'decoded_clip' in locals() and decoded_clip != background_clip: decoded_clip.close()
+        if 'video_clip' in locals() and hasattr(video_clip, 'close'): video_clip.close()
+        if 'audio_clip' in locals() and hasattr(audio_clip, 'close'): audio_clip.close()
+        if 'background_clip' in locals() and background_clip != video_clip and hasattr(background_clip, 'close'): background_clip.close()
+        if 'scratch_dir' in locals(): _remove_scratch_dir(scratch_dir)
         return False
     
-# This function seems specific to an older preview logic not directly used by update_subtitle_preview_display in main.py.
-# It might be dead code if create_composite_preview_image is the primary method for previews.
-# Keeping for now, but mark as potentially unused.
-# def generate_subtitle_preview_image_file( # POTENTIALLY UNUSED
-#     text: str, 
-#     style_options: dict, 
-#     preview_width: int = 300 
-# ) -> str | None:
-#     try:
-#         position_choice = style_options.get('position_choice', 'Bottom') 
-#         text_align_map = {"Top": "North", "Center": "Center", "Bottom": "South"}
-#         text_align = text_align_map.get(position_choice, 'South')
-        
-#         fontsize = int(style_options.get('fontsize', 24))
-#         stroke_width = float(style_options.get('stroke_width', 1))
-
-#         textclip_kwargs = {
-#             'txt': text,
-#             'font': style_options.get('font', 'Arial'),
-#             'fontsize': fontsize,
-#             'color': style_options.get('color', 'white'),
-#             'bg_color': 'transparent', 
-#             'stroke_color': style_options.get('stroke_color'),
-#             'stroke_width': stroke_width,
-#             'method': 'caption', 
-#             'align': text_align, 
-#             'size': (preview_width, PREVIEW_SUBTITLE_HEIGHT) 
-#         }
-        
-#         if stroke_width == 0:
-#             textclip_kwargs.pop('stroke_color', None)
-#             textclip_kwargs.pop('stroke_width', None)
-
-#         # print(f"SubPreview Gen - Creating TextClip with: {textclip_kwargs}") # Optional debug
-#         # Use a unique temp file name to avoid conflicts if called multiple times
-#         temp_preview_file = f"_subtitle_preview_temp_{os.urandom(4).hex()}.png"
-#         with TextClip(**textclip_kwargs) as clip:
-#             clip.save_frame(temp_preview_file, t=0) 
-        
-#         return temp_preview_file # Return the unique name
-#     except Exception as e:
-#         print(f"SubPreview Gen - Error generating TextClip image for preview: {e}")
-#         traceback.print_exc()
-#         if 'temp_preview_file' in locals() and os.path.exists(temp_preview_file):
-#             try: os.remove(temp_preview_file)
-#             except Exception as e_del: print(f"SubPreview Gen - Error deleting preview: {e_del}")
-#         return None
-    
+def render_draft_video(
+    video_path: str,
+    audio_path: str,
+    srt_path: str,
+    output_path: str,
+    style_options: dict = None,
+    burn_backend: str = None
+) -> bool:
+    """
+    Renders a quick QA version of the final video: render_final_video at DRAFT_OUTPUT_PROFILE with
+    DRAFT_ENCODER_OPTIONS. Subtitle sizes are scaled to the draft frame, so layout matches the final render.
+    """
+    start_time = time.perf_counter()
+    success = render_final_video(video_path, audio_path, srt_path, output_path, style_options=style_options,
+                                 encoder_options=DRAFT_ENCODER_OPTIONS, burn_backend=burn_backend,
+                                 output_profile=DRAFT_OUTPUT_PROFILE)
+    if success:
+        print(f"Render - Draft {os.path.basename(output_path)} ready in {time.perf_counter() - start_time:.1f}s")
+    return success
+
+def multi_aspect_output_paths(output_path: str, profiles: list = None) -> dict:
+    """Maps each profile name (default MULTI_ASPECT_PROFILES) to <output base>_<profile><ext>."""
+    base_path, extension = os.path.splitext(output_path)
+    return {name: f"{base_path}_{name}{extension or '.mp4'}" for name in profiles or MULTI_ASPECT_PROFILES}
+
+def render_multi_aspect_video(
+    video_path: str,
+    audio_path: str,
+    srt_path: str,
+    output_paths: dict,
+    style_options: dict = None,
+    encoder_options: dict = None
+) -> bool:
+    """
+    Renders the final video in several output profiles from a single decode of the template.
+    output_paths maps profile names (see output_profiles.OUTPUT_PROFILES) to output files, e.g. from
+    multi_aspect_output_paths. One ffmpeg run splits the decoded frames into a crop/scale/fps + libass chain per
+    profile and encodes every output. Subtitles are laid out per profile: their own ASS frame, font size scaled
+    to the short side and line width from output_profiles.subtitle_box_width_ratio.
+    The narration is encoded once and stream-copied into every output.
+    """
+    for label, path in (("Background video", video_path), ("Audio", audio_path), ("SRT file", srt_path)):
+        if not os.path.exists(path):
+            print(f"Error MultiAspect: {label} not found at '{path}'")
+            return False
+    if not output_paths:
+        print("Error MultiAspect: No output profiles given.")
+        return False
+
+    profiles = {name: _resolve_output_profile(name) for name in output_paths}
+    base_style, actual_pos_tuple = _resolve_subtitle_style(style_options)
+    # One decode has to serve every profile: the mezzanine only if each profile would have used it
+    sources = {output_profiles.resolve_profile_source(video_path, profile, TEMPLATE_MEZZANINE_ENABLED) for profile in profiles.values()}
+    source_path = sources.pop() if len(sources) == 1 else video_path
+    video_info = template_index.get_video_info(source_path)
+    if not video_info:
+        print(f"Error MultiAspect: Could not read video metadata of '{source_path}'.")
+        return False
+
+    scratch_dir = _create_scratch_dir(next(iter(output_paths.values())))
+    try:
+        with AudioFileClip(audio_path) as audio_clip:
+            narration_duration = audio_clip.duration
+        audio_track_path = _prepare_audio_track(audio_path, scratch_dir, encoder_options)
+        if audio_track_path is None:
+            print("Error MultiAspect: Encoding the narration audio failed.")
+            return False
+
+        outputs = []
+        for name, profile in profiles.items():
+            current_style = output_profiles.scale_subtitle_style(base_style, profile)
+            ass_path = os.path.join(scratch_dir, f"subtitles_{profile['name']}.ass")
+            if not ass_subtitles.write_ass_file(srt_path, current_style, actual_pos_tuple, output_profiles.profile_size(profile), ass_path,
+                                                box_width_ratio=output_profiles.subtitle_box_width_ratio(profile)):
+                print(f"MultiAspect - Warning: No subtitle cues were converted to ASS for {name}.")
+            outputs.append({
+                'path': output_paths[name],
+                'filter': f"{output_profiles.decode_filter(profile)},{ffmpeg_tools.ass_filter(ass_path, text_renderer.FONTS_DIR)}",
+                'encoder_options': dict(output_profiles.profile_encoder_options(profile, encoder_options), audio_codec='copy'),
+            })
+        loop_video = bool(video_info['duration'] and narration_duration > video_info['duration'])
+        return ffmpeg_tools.encode_split_outputs(source_path, outputs, audio_path=audio_track_path,
+                                                 duration=narration_duration, loop_video=loop_video)
+
+    except Exception as e:
+        print(f"Error MultiAspect - An error occurred while rendering the outputs: {e}")
+        traceback.print_exc()
+        return False
+    finally:
+        _remove_scratch_dir(scratch_dir)
+
 def create_composite_preview_image(
-    base_video_thumbnail_path: str,
+    base_image,
     subtitle_text: str,
     style_options: dict
-) -> str | None:
-    """Creates a composite image of a video thumbnail with subtitle text overlaid."""
-    if not os.path.exists(base_video_thumbnail_path):
-        print(f"PreviewComp - Base video thumbnail not found: {base_video_thumbnail_path}")
+) -> Image.Image | None:
+    """
+    Creates a composite image of a video thumbnail with subtitle text overlaid, entirely in memory.
+    base_image may be a PIL image, an RGB(A) numpy array or a thumbnail path. Returns an RGBA PIL image.
+    """
+    if isinstance(base_image, str) and not os.path.exists(base_image):
+        print(f"PreviewComp - Base video thumbnail not found: {base_image}")
         return None
 
     try:
-        base_img_pil = Image.open(base_video_thumbnail_path).convert("RGBA")
+        if isinstance(base_image, str): base_img_pil = Image.open(base_image).convert("RGBA")
+        elif isinstance(base_image, np.ndarray): base_img_pil = Image.fromarray(base_image).convert("RGBA")
+        else: base_img_pil = base_image.convert("RGBA") # convert() always returns a copy, the caller's image is untouched
         base_width, base_height = base_img_pil.size
 
         text_clip_width = int(base_width * 0.90) 
-        text_clip_height_allowance = None # Auto height for TextClip
 
         position_choice = style_options.get('position_choice', 'Bottom')
         text_align_map = {"Top": "North", "Center": "Center", "Bottom": "South"}
         text_align = text_align_map.get(position_choice, 'South')
         
-        fontsize = int(style_options.get('fontsize', 36))
-        stroke_width = float(style_options.get('stroke_width', 1.5))
-
-        textclip_kwargs = {
-            'txt': subtitle_text,
+        preview_style = {
             'font': style_options.get('font', 'Arial'),
-            'fontsize': fontsize,
+            'fontsize': int(style_options.get('fontsize', 36)),
             'color': style_options.get('color', 'yellow'),
             'bg_color': 'transparent', # Crucial for overlay
             'stroke_color': style_options.get('stroke_color', 'black'),
-            'stroke_width': stroke_width,
+            'stroke_width': float(style_options.get('stroke_width', 1.5)),
             'method': 'caption', 
             'align': text_align, 
-            'size': (text_clip_width, text_clip_height_allowance) 
         }
-        if stroke_width == 0:
-            textclip_kwargs.pop('stroke_color', None)
-            textclip_kwargs.pop('stroke_width', None)
         
-        # print(f"PreviewComp - Creating TextClip for subtitle: '{subtitle_text[:20]}...' with {textclip_kwargs}") # Optional debug
-        # Save TextClip to a temporary PNG to get correct RGBA for compositing
-        with TextClip(**textclip_kwargs) as txt_clip:
-            txt_clip.save_frame(SUBTITLE_ONLY_PREVIEW_IMAGE_TEMP_FILE, t=0) 
-
-        if not os.path.exists(SUBTITLE_ONLY_PREVIEW_IMAGE_TEMP_FILE):
-            print("PreviewComp - Failed to generate temporary subtitle image from TextClip.")
-            return None
-            
-        subtitle_img_pil = Image.open(SUBTITLE_ONLY_PREVIEW_IMAGE_TEMP_FILE).convert("RGBA")
+        # print(f"PreviewComp - Rendering subtitle: '{subtitle_text[:20]}...' with {preview_style}") # Optional debug
+        subtitle_rgba = render_subtitle_bitmap(subtitle_text, preview_style, text_clip_width, use_disk=False) # Style tweaks are throwaway
+        subtitle_img_pil = Image.fromarray(subtitle_rgba, "RGBA")
         sub_width, sub_height = subtitle_img_pil.size
 
         # Calculate position for overlaying subtitle
@@ -341,34 +869,18 @@ def create_composite_preview_image(
         pos_x = max(0, min(pos_x, base_width - sub_width))   
 
         # print(f"PreviewComp - Compositing. Base: {base_width}x{base_height}, Sub: {sub_width}x{sub_height}, Pos: ({pos_x},{pos_y})") # Optional debug
-        composite_img = base_img_pil.copy() 
-        composite_img.paste(subtitle_img_pil, (pos_x, pos_y), subtitle_img_pil) # Use subtitle's alpha as mask
-
-        composite_img.save(COMBINED_PREVIEW_IMAGE_TEMP_FILE, "PNG")
-        # print(f"PreviewComp - Composite image saved: {COMBINED_PREVIEW_IMAGE_TEMP_FILE}") # Optional debug
-        
-        if os.path.exists(SUBTITLE_ONLY_PREVIEW_IMAGE_TEMP_FILE):
-            try: os.remove(SUBTITLE_ONLY_PREVIEW_IMAGE_TEMP_FILE)
-            except Exception as e_del: print(f"PreviewComp - Could not delete {SUBTITLE_ONLY_PREVIEW_IMAGE_TEMP_FILE}: {e_del}")
-            
-        return COMBINED_PREVIEW_IMAGE_TEMP_FILE
+        base_img_pil.paste(subtitle_img_pil, (pos_x, pos_y), subtitle_img_pil) # Use subtitle's alpha as mask
+        return base_img_pil
 
     except Exception as e:
         print(f"PreviewComp - Error creating composite image: {e}"); traceback.print_exc()
-        # Clean up temp files on error
-        if os.path.exists(SUBTITLE_ONLY_PREVIEW_IMAGE_TEMP_FILE):
-            try: os.remove(SUBTITLE_ONLY_PREVIEW_IMAGE_TEMP_FILE)
-            except Exception: pass
-        if os.path.exists(COMBINED_PREVIEW_IMAGE_TEMP_FILE):
-            try: os.remove(COMBINED_PREVIEW_IMAGE_TEMP_FILE)
-            except Exception: pass
         return None
 
 if __name__ == '__main__':
     print("--- Testing Video Processor Thumbnail Functions ---")
     # Ensure "video_templates" directory exists and contains some .mp4 files for testing.
     
-    videos = list_video_templates()
+    videos = [record['path'] for record in list_video_templates()]
     if videos:
         print(f"\nVideos found in '{VIDEO_TEMPLATES_DIR}':")
         for vid in videos:
@@ -396,10 +908,9 @@ if __name__ == '__main__':
                 'bg_color': 'transparent', # Important for preview
                 'position_choice': 'Bottom'
             }
-            composite_path = create_composite_preview_image(test_video_thumb, sample_text, sample_style)
-            if composite_path:
-                print(f"Composite preview image generated: {composite_path}")
-                # You can open this image to verify
+            composite_image = create_composite_preview_image(test_video_thumb, sample_text, sample_style)
+            if composite_image:
+                print(f"Composite preview image generated in memory: {composite_image.size} {composite_image.mode}")
             else:
                 print("Failed to generate composite preview image.")
         else: